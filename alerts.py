@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from database import get_connection, ALERT_TEXT_FIELDS
+from query_planner import normalize_term
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Markdown file with one '## name' section per watch list and one pattern per line
+WATCH_LISTS_FILE = os.environ.get('WATCH_LISTS') or os.path.join(BASE_DIR, 'watch_lists.md')
+
+# File delivery appends one JSON line per alert
+ALERTS_FILE = os.path.join(BASE_DIR, 'alerts.jsonl')
+
+# Fields each watch list is matched against; lists with other names use all of them
+TEXT_FIELDS = ALERT_TEXT_FIELDS
+WATCH_FIELDS = {
+    'clients': ('auftraggeber', 'vergabestelle'),
+    'keywords': ('ausschreibungstitel',),
+    'regions': ('leistungsort',),
+}
+
+# Patterns starting with this prefix are regular expressions, matched case-insensitively on the raw text
+REGEX_PREFIX = 're:'
+
+# Rows read from the database per batch
+BATCH_SIZE = 5000
+
+_LIST_MARKER_RE = re.compile(r'^(?:[-*+]|\d+[.)])\s+')
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def parse_watch_lists(content):
+    """
+    Read watch lists from markdown; '## name' starts a list, other '#' lines are comments
+
+        ## clients
+        - Bundesamt für Strahlenschutz
+        ## keywords
+        - Dosimetrie
+        - re:\\b4533\\d{4}\\b
+
+    Returns:
+        dict: {watch list name: [patterns]} in file order
+    """
+    watch_lists = {}
+    current = None
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith('##'):
+            name = line.lstrip('#').strip().lower()
+            current = watch_lists.setdefault(name, []) if name else None
+            continue
+        if line.startswith('#'):
+            continue
+        line = _LIST_MARKER_RE.sub('', line).strip()
+        if line and current is not None and line not in current:
+            current.append(line)
+    return {name: patterns for name, patterns in watch_lists.items() if patterns}
+
+def load_watch_lists(path=None):
+    """
+    Watch lists from WATCH_LISTS_FILE, or {} if the file does not exist
+    """
+    path = path or WATCH_LISTS_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return parse_watch_lists(f.read())
+
+def _trie_pattern(node):
+    # Regex for all words below a trie node; shared prefixes are matched once
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        return f'(?:{pattern})?'
+    return pattern
+
+class WatchMatcher:
+    """
+    All watch patterns compiled into one automaton per field
+
+    Literal patterns are normalized like search terms (case, umlauts,
+    punctuation) and merged into a trie, which is compiled into a single
+    regex. A lookahead at every word start finds overlapping matches, and
+    walking the trie along a match yields every pattern that is a prefix of
+    it, so 'Strahlenschutz' and 'Strahlenschutz Messung' both match
+    'Strahlenschutz-Messung' in one pass. Literal patterns match at the start of
+    a word and may continue inside it (German compounds). Regex patterns are
+    combined into one prefilter and only tested one by one on texts that pass.
+    """
+    def __init__(self, watch_lists):
+        self.fields = {}
+        for field in TEXT_FIELDS:
+            trie = {}
+            regexes = []
+            for name, patterns in watch_lists.items():
+                if field not in WATCH_FIELDS.get(name, TEXT_FIELDS):
+                    continue
+                for pattern in patterns:
+                    if pattern.startswith(REGEX_PREFIX):
+                        regexes.append((name, pattern, re.compile(pattern[len(REGEX_PREFIX):], re.IGNORECASE)))
+                        continue
+                    key = normalize_term(pattern)
+                    if not key:
+                        continue
+                    node = trie
+                    for char in key:
+                        node = node.setdefault(char, {})
+                    node.setdefault('', []).append((name, pattern))
+            if not trie and not regexes:
+                continue
+            literal = re.compile(r'(?<!\w)(?=(' + _trie_pattern(trie) + '))') if trie else None
+            prefilter = re.compile('|'.join(f'(?:{regex.pattern})' for _, _, regex in regexes),
+                                   re.IGNORECASE) if regexes else None
+            self.fields[field] = (trie, literal, prefilter, regexes)
+
+    def match(self, row):
+        """
+        Watch patterns matching a tender
+
+        Args:
+            row (dict): Tender row keyed by database column
+
+        Returns:
+            list: (watch list, pattern, field, matched text) tuples, one per watch list and pattern
+        """
+        found = {}
+        for field, (trie, literal, prefilter, regexes) in self.fields.items():
+            text = row.get(field)
+            if not text:
+                continue
+            if literal is not None:
+                for m in literal.finditer(normalize_term(text)):
+                    matched = m.group(1)
+                    node = trie
+                    for i, char in enumerate(matched):
+                        node = node[char]
+                        for name, pattern in node.get('', ()):
+                            found.setdefault((name, pattern), (field, matched[:i + 1]))
+            if prefilter is not None and prefilter.search(text):
+                for name, pattern, regex in regexes:
+                    m = regex.search(text)
+                    if m:
+                        found.setdefault((name, pattern), (field, m.group(0)))
+        return [(name, pattern, field, matched) for (name, pattern), (field, matched) in found.items()]
+
+def _record_alerts(conn, matcher, tenders):
+    # Match a batch of tender rows and store their alerts; returns the number of new alerts
+    alert_rows = [(tender['tender_key'], name, pattern, field, matched, _now())
+                  for tender in tenders for name, pattern, field, matched in matcher.match(dict(tender))]
+    changes_before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO alerts (tender_key, watch_list, pattern, field, matched_text, "
+                     "created_at) VALUES (?, ?, ?, ?, ?, ?)", alert_rows)
+    return conn.total_changes - changes_before
+
+def scan_new_tenders(watch_lists=None, rescan=False):
+    """
+    Match new and changed tenders against the watch lists and record alerts
+
+    The highest scanned tenders.id is kept in alert_state, so every scan only
+    reads new rows, in batches. The first scan of a database only records the
+    current highest id and alerts nothing. Tenders whose text fields changed after they
+    were scanned (detail pages of list-only runs, deadline watch) are queued
+    in alert_rescan by a trigger and matched again. Each (tender, watch list,
+    pattern) alerts once.
+
+    Args:
+        watch_lists (dict, optional): Watch lists, default from WATCH_LISTS_FILE
+        rescan (bool): Scan all stored tenders, e.g. after adding patterns
+
+    Returns:
+        int: Number of new alerts
+    """
+    watch_lists = load_watch_lists() if watch_lists is None else watch_lists
+    if not watch_lists:
+        logger.debug("No watch lists configured")
+        return 0
+    matcher = WatchMatcher(watch_lists)
+    columns = ', '.join(f't.{field}' for field in TEXT_FIELDS)
+
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        row = conn.execute("SELECT value FROM alert_state WHERE name = 'last_tender_id'").fetchone()
+        if row is None and not rescan:
+            # First scan of an existing database: start after the stored tenders instead of
+            # alerting the whole history; 'scan --rescan' alerts on the backlog explicitly
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tenders").fetchone()[0]
+            conn.execute("INSERT INTO alert_state (name, value) VALUES ('last_tender_id', ?)", (last_id,))
+            conn.commit()
+            logger.info(f"First alert scan: tenders up to id {last_id} are not alerted")
+            return 0
+        last_id = 0 if rescan else row['value']
+        scanned = new_alerts = 0
+        while True:
+            rows = conn.execute(f"SELECT t.id, t.tender_key, {columns} FROM tenders t "
+                                "WHERE t.id > ? ORDER BY t.id LIMIT ?", (last_id, BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            new_alerts += _record_alerts(conn, matcher, rows)
+            last_id = rows[-1]['id']
+            conn.execute("INSERT OR REPLACE INTO alert_state (name, value) VALUES ('last_tender_id', ?)", (last_id,))
+            conn.commit()
+            scanned += len(rows)
+
+        # Changed tenders; keys of deleted tenders have no text, match nothing and are dropped
+        changed = 0
+        while True:
+            rows = conn.execute(f"SELECT r.tender_key, {columns} FROM alert_rescan r "
+                                "LEFT JOIN tenders t ON t.tender_key = r.tender_key LIMIT ?", (BATCH_SIZE,)).fetchall()
+            if not rows:
+                break
+            new_alerts += _record_alerts(conn, matcher, rows)
+            conn.executemany("DELETE FROM alert_rescan WHERE tender_key = ?", [(row['tender_key'],) for row in rows])
+            conn.commit()
+            changed += len(rows)
+        logger.info(f"Scanned {scanned} new and {changed} changed tenders, {new_alerts} new alerts")
+        return new_alerts
+    finally:
+        conn.close()
+
+def get_alerts(undelivered_only=False):
+    """
+    Recorded alerts with the tender they refer to, oldest first
+
+    Returns:
+        list: dicts with the alert and tender columns
+    """
+    query = '''
+    SELECT a.id, a.watch_list, a.pattern, a.field, a.matched_text, a.created_at, a.delivered_at,
+           t.vergabe_id, t.ausschreibungstitel, t.auftraggeber, t.leistungsort, t.naechste_frist, t.link
+    FROM alerts a JOIN tenders t ON t.tender_key = a.tender_key
+    '''
+    if undelivered_only:
+        query += " WHERE a.delivered_at IS NULL"
+    query += " ORDER BY a.id"
+
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        return [dict(row) for row in conn.execute(query)]
+    finally:
+        conn.close()
+
+def deliver_file(alerts, path=None):
+    """
+    Append alerts as JSON lines to a local file
+    """
+    with open(path or ALERTS_FILE, 'a', encoding='utf-8') as f:
+        for alert in alerts:
+            f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+
+def deliver_smtp(alerts, host='localhost', port=1025, sender='alerts@localhost', recipients=('alerts@localhost',)):
+    """
+    Send all alerts in one plain-text mail
+
+    The defaults point at a local debugging SMTP server, e.g. 'python -m aiosmtpd -n -l localhost:1025'.
+    """
+    import smtplib
+    from email.message import EmailMessage
+
+    message = EmailMessage()
+    message['Subject'] = f"{len(alerts)} neue Ausschreibungen auf den Beobachtungslisten"
+    message['From'] = sender
+    message['To'] = ', '.join(recipients)
+    message.set_content('\n\n'.join(
+        f"[{alert['watch_list']}: {alert['pattern']}] {alert['ausschreibungstitel'] or alert['link']}\n"
+        f"Auftraggeber: {alert['auftraggeber'] or '-'}  Ort: {alert['leistungsort'] or '-'}  "
+        f"Frist: {alert['naechste_frist'] or '-'}\n{alert['link']}"
+        for alert in alerts))
+    with smtplib.SMTP(host, port, timeout=30) as smtp:
+        smtp.send_message(message)
+
+def deliver_alerts(method=None, **options):
+    """
+    Deliver undelivered alerts and mark them as delivered
+
+    Args:
+        method (str, optional): 'file' or 'smtp'; default 'smtp' if ALERT_SMTP (host:port) is set, else 'file'
+        **options: Passed to deliver_file() or deliver_smtp()
+
+    Returns:
+        int: Number of delivered alerts
+    """
+    alerts = get_alerts(undelivered_only=True)
+    if not alerts:
+        return 0
+
+    smtp_server = os.environ.get('ALERT_SMTP')
+    method = method or ('smtp' if smtp_server else 'file')
+    if method == 'smtp':
+        if smtp_server and 'host' not in options:
+            host, _, port = smtp_server.partition(':')
+            options.update(host=host, port=int(port or 25))
+        if os.environ.get('ALERT_MAIL_TO') and 'recipients' not in options:
+            options['recipients'] = os.environ['ALERT_MAIL_TO'].split(',')
+        deliver_smtp(alerts, **options)
+    elif method == 'file':
+        deliver_file(alerts, **options)
+    else:
+        raise ValueError(f"Unknown delivery method '{method}'")
+
+    conn = get_connection()
+
+    try:
+        conn.executemany("UPDATE alerts SET delivered_at = ? WHERE id = ?",
+                         [(_now(), alert['id']) for alert in alerts])
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(f"Delivered {len(alerts)} alerts by {method}")
+    return len(alerts)
+
+def process_new_tenders():
+    """
+    Scan new tenders and deliver the resulting alerts; errors are logged, not raised
+
+    Called after scrapes so that alerting never fails a run.
+    """
+    try:
+        if scan_new_tenders():
+            deliver_alerts()
+    except Exception as e:
+        logger.error(f"Alert processing failed: {e}")
+
+if __name__ == "__main__":
+    import argparse
+    import database
+
+    parser = argparse.ArgumentParser(description="Match new tenders against watch lists and deliver alerts")
+    parser.add_argument("--watch-lists", default=None, help="Watch list file (default: watch_lists.md)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="Record alerts for tenders inserted since the last scan")
+    scan.add_argument("--rescan", action="store_true", help="Scan all stored tenders")
+
+    deliver = commands.add_parser("deliver", help="Deliver undelivered alerts")
+    deliver.add_argument("--method", choices=("file", "smtp"), default=None)
+    deliver.add_argument("--file", default=None, help="JSON lines file for file delivery (default: alerts.jsonl)")
+
+    commands.add_parser("list", help="Show undelivered alerts")
+    args = parser.parse_args()
+
+    database.initialize_database()
+    if args.command == "scan":
+        scan_new_tenders(load_watch_lists(args.watch_lists), rescan=args.rescan)
+    elif args.command == "deliver":
+        if args.file:
+            delivered = deliver_alerts(args.method or 'file', path=args.file)
+        else:
+            delivered = deliver_alerts(args.method)
+        print(f"{delivered} alerts delivered")
+    else:
+        for alert in get_alerts(undelivered_only=True):
+            print(f"{alert['created_at']}  [{alert['watch_list']}: {alert['pattern']}]  "
+                  f"{alert['ausschreibungstitel']}  {alert['link']}")
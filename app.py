@@ -1,35 +1,18 @@
 import streamlit as st
-import pandas as pd
 import os
 import sys
 import tempfile
-import asyncio
-import shutil
-from evergabe_scrape import scrape_evergabe
+import time
 import database
-from PIL import Image
+import run_journal
+import query_planner
+import job_queue
+import gazetteer
+from tender_record import display_frame
 
 # Initialize the database when the app starts
 database.initialize_database()
 
-# Function to clean up debug_pages folder
-def cleanup_debug_pages():
-    debug_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug_pages')
-    if os.path.exists(debug_dir) and os.path.isdir(debug_dir):
-        try:
-            # Delete all files in the debug_pages folder
-            for filename in os.listdir(debug_dir):
-                file_path = os.path.join(debug_dir, filename)
-                if os.path.isfile(file_path):
-                    os.unlink(file_path)
-            st.info(f"Cleaned up debug_pages folder")
-        except Exception as e:
-            st.error(f"Error cleaning up debug_pages folder: {e}")
-    else:
-        # Create the directory if it doesn't exist
-        os.makedirs(debug_dir, exist_ok=True)
-        st.info(f"Created debug_pages folder")
-
 st.set_page_config(page_title="Evergabe Scraper", page_icon="🔍", layout="wide")
 
 # Custom CSS for better styling
@@ -57,9 +40,41 @@ Results are stored in a database and can be downloaded as CSV or Excel.""")
 with col2:
     header_image_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Header für AdvSolution2.png')
     if os.path.exists(header_image_path):
+        from PIL import Image
         header_image = Image.open(header_image_path)
         st.image(header_image, use_container_width=True)
 
+def load_database_tenders():
+    """
+    All stored tenders, or those within the radius when a location is entered,
+    filtered and ordered by relevance as selected
+    """
+    if near_location.strip():
+        # The slider's 0.0 means no filter, which also keeps tenders the model has not scored
+        return database.search_tenders(near=near_location.strip(), radius_km=radius_km,
+                                       min_relevance=min_relevance or None, by_relevance=sort_by_relevance)
+    if min_relevance or sort_by_relevance:
+        return database.search_tenders(min_relevance=min_relevance or None, by_relevance=sort_by_relevance)
+    return database.get_all_tenders()
+
+def rank_by_relevance(df):
+    """
+    Apply the relevance filter and order to the tenders of a run
+    """
+    if df.empty or 'Relevanz' not in df.columns:
+        return df
+    if min_relevance:
+        df = df[df['Relevanz'] >= min_relevance]
+    if sort_by_relevance:
+        df = df.sort_values('Relevanz', ascending=False, na_position='last', kind='stable')
+    return df
+
+# After a reload the session has no job yet; attach to the job the worker is
+# running or will run next, so its progress is shown and it is not submitted twice
+active_jobs = job_queue.get_active_jobs()
+if 'job_id' not in st.session_state and active_jobs:
+    st.session_state['job_id'] = active_jobs[0]['job_id']
+
 # Sidebar for inputs
 with st.sidebar:
     st.header("Search Options")
@@ -68,11 +83,25 @@ with st.sidebar:
     st.subheader("Option 1: Single Search Term")
     search_term = st.text_input("Enter a search term", value="strahlenschutz")
     max_days = st.slider("Days to look back", min_value=1, max_value=30, value=7)
+    list_only = st.checkbox("List-only fast mode", value=False,
+                            help="Only read the fields shown in the result list (one request per search term). "
+                                 "Detail pages can be fetched later with 'Fetch pending details'.")
+    budget_minutes = st.number_input("Time budget (minutes, 0 = unlimited)", min_value=0, value=0, step=5,
+                                     help="Stop fetching when the time is up: urgent deadlines and the newest "
+                                          "tenders are fetched first, the rest is saved without details and "
+                                          "can be resumed later")
+    download_documents = st.checkbox("Download tender documents", value=False,
+                                     help="After the scrape, download the files linked on the detail pages "
+                                          "into the document store")
     
     # Option 2: Upload MD file with search terms
     st.subheader("Option 2: Multiple Search Terms")
     st.markdown("Upload a markdown file with one search term per line")
     uploaded_file = st.file_uploader("Choose a markdown file", type=["md", "txt"])
+    merge_terms = st.checkbox("Merge overlapping search terms", value=False,
+                              help="Search terms that contain all words of a shorter term are not searched "
+                                   "separately; their hits are taken from the shorter term's results. Faster, "
+                                   "but hits that match only in the tender description are lost")
     
     # Display options
     st.subheader("Display Options")
@@ -83,62 +112,123 @@ with st.sidebar:
     st.subheader("Database Options")
     view_database = st.checkbox("View all database entries", value=False, 
                               help="Show all entries from the database instead of just the new ones")
+    near_location = st.text_input("Near (PLZ or city)", value="",
+                                  help="Only show database entries whose Leistungsort lies within the radius, "
+                                       "closest first")
+    if near_location.strip():
+        center = gazetteer.locate(near_location.strip())
+        if center is None:
+            st.warning(f"Unknown location: {near_location.strip()}")
+        elif center.precision == 'region':
+            st.caption(f"Approximate: {near_location.strip()} is placed at {center.place}, the lead city "
+                       f"of its PLZ region; distances can be off by several tens of km")
+    radius_km = st.slider("Radius (km)", min_value=10, max_value=500, value=100, step=10)
+    min_relevance = st.slider("Minimum relevance", min_value=0.0, max_value=1.0, value=0.0, step=0.05,
+                              help="Only show tenders the relevance model scores at least this high; "
+                                   "train the model on the Relevance page")
+    sort_by_relevance = st.checkbox("Sort by relevance", value=False,
+                                    help="Show the tenders the relevance model scores highest first")
+    
+    # Offer to resume a run that was interrupted (browser crash, closed session, ...)
+    interrupted_run = run_journal.find_interrupted_run()
+    resume_run = False
+    if interrupted_run:
+        st.subheader("Interrupted Run")
+        st.warning(f"A run started at {interrupted_run['started_at']} stopped after "
+                   f"{interrupted_run['done_terms']} of {interrupted_run['total_terms']} search terms")
+        resume_run = st.checkbox("Resume interrupted run", value=True,
+                                 help="Continue where the run stopped; tenders that were already saved are not fetched again")
     
     # Execution button
-    run_button = st.button("Run Scraper", type="primary")
+    run_button = st.button("Run Scraper", type="primary", disabled=bool(active_jobs),
+                           help="A scrape is already queued or running" if active_jobs else None)
+    
+    # Deferred detail enrichment for tenders stored by list-only runs
+    pending_details = database.count_pending_detail_tenders()
+    enrich_button = False
+    if pending_details:
+        enrich_button = st.button(f"Fetch pending details ({pending_details})", disabled=bool(active_jobs),
+                                  help="Visit the detail pages of tenders stored in list-only mode")
 
-# Function to process a single search term
-async def process_search_term(term, days):
-    with st.spinner(f"Scraping evergabe.de for: {term} (last {days} days)..."):
-        results_df = await scrape_evergabe(search_term=term, days=days)
-        return results_df
+# Fetch detail pages of list-only tenders in the background worker
+if enrich_button:
+    st.session_state['job_id'], _ = job_queue.submit_job(job_queue.ENRICH, {})
+    job_queue.ensure_worker()
 
 # Main content area
 if run_button:
-    cleanup_debug_pages()  # Call the cleanup function here
-    all_results = []
-    
-    # Process based on selected option
-    if uploaded_file is not None:
-        # Process the uploaded file with multiple search terms
-        content = uploaded_file.getvalue().decode("utf-8")
-        search_terms = [line.strip() for line in content.split("\n") if line.strip()]
-        
-        st.info(f"Found {len(search_terms)} search terms in the uploaded file")
-        
-        progress_bar = st.progress(0)
-        combined_df = pd.DataFrame()
+    if resume_run:
+        # The worker continues the interrupted run with its remaining search terms
+        params = {'resume_run_id': interrupted_run['run_id'], 'documents': download_documents,
+                  'budget_minutes': budget_minutes}
+    else:
+        if interrupted_run:
+            run_journal.abandon_run(interrupted_run['run_id'])
         
-        for i, term in enumerate(search_terms):
-            st.write(f"Processing search term: {term}")
-            df = asyncio.run(process_search_term(term, max_days))
-            if not df.empty:
-                combined_df = pd.concat([combined_df, df], ignore_index=True)
-            progress_bar.progress((i + 1) / len(search_terms))
+        if uploaded_file is not None:
+            # Process the uploaded file with multiple search terms
+            content = uploaded_file.getvalue().decode("utf-8")
+            search_terms = query_planner.parse_search_terms(content)
+            st.info(f"Found {len(search_terms)} unique search terms in the uploaded file")
+        else:
+            # Process the single search term
+            search_terms = [search_term]
         
-        df = combined_df
+        params = {'terms': search_terms, 'days': max_days, 'merge_subsumed': merge_terms, 'list_only': list_only,
+                  'documents': download_documents, 'budget_minutes': budget_minutes}
+    
+    # Scrapes run in the background worker; identical requests share one job
+    job_id, coalesced = job_queue.submit_job(job_queue.SCRAPE, params)
+    if coalesced:
+        st.info("The same scrape is already queued or running; showing its progress")
+    st.session_state['job_id'] = job_id
+    job_queue.ensure_worker()
+
+# Show the job of this session; while it is active the page polls its status
+job = job_queue.get_job(st.session_state['job_id']) if 'job_id' in st.session_state else None
+poll_job = job is not None and job['status'] in (job_queue.QUEUED, job_queue.RUNNING)
+show_results = False
+if poll_job:
+    if job['status'] == job_queue.QUEUED:
+        st.info("Waiting for the background worker...")
     else:
-        # Process the single search term
-        df = asyncio.run(process_search_term(search_term, max_days))
+        st.info(job['message'] or "Scraping...")
+        if job['progress_total']:
+            st.progress(job['progress_done'] / job['progress_total'],
+                        text=f"{job['progress_done']} of {job['progress_total']} search requests")
+    # Restart the worker if it stopped; its running job is requeued
+    job_queue.ensure_worker()
+elif job and job['status'] == job_queue.FAILED:
+    st.error(f"Scrape failed: {job['error']}")
+elif job and job['kind'] == job_queue.ENRICH:
+    st.success(f"Fetched details for {job['total_records']} tenders")
+elif job:
+    show_results = True
+
+if show_results:
+    total_records, new_records = job['total_records'] or 0, job['new_records'] or 0
+    df = display_frame(rank_by_relevance(run_journal.get_run_tenders(job['run_id'])))
     
     # Display results
     if not df.empty:
-        # Insert the results into the database and get the count of new entries
-        total_records, new_records = database.insert_tenders(df)
-        
         # Display summary
         st.success(f"Found {total_records} tender results, added {new_records} new entries to the database")
+        deferred = run_journal.get_deferred(job['run_id'])
+        if deferred['terms'] or deferred['tenders']:
+            st.warning(f"The time budget ran out: {deferred['tenders']} tenders were saved without their details "
+                       f"and {len(deferred['terms'])} search terms were not finished "
+                       f"({', '.join(deferred['terms'])}). Resume the run from the sidebar to continue.")
         
         # Decide which data to display based on user preference
         if view_database:
             st.subheader("All Database Entries")
-            display_df = database.get_all_tenders()
+            display_df = display_frame(load_database_tenders())
             if display_df.empty:
                 st.warning("No entries found in the database.")
                 st.stop()
         else:
             st.subheader("Newly Scraped Tender Results")
-            display_df = df
+            display_df = df.drop(columns=['id', 'scrape_date'])
         
         # Filter out columns where all values are "Nicht verfügbar" if option is selected
         if hide_empty_columns:
@@ -213,12 +303,12 @@ if run_button:
         st.warning("No results found. Try a different search term or check your internet connection.")
 
 # Add a section to view database contents without running the scraper
-if not run_button:
+if not show_results:
     st.subheader("Database Contents")
     view_db_button = st.button("View Database Contents")
     
     if view_db_button:
-        df = database.get_all_tenders()
+        df = display_frame(load_database_tenders())
         if not df.empty:
             st.success(f"Found {len(df)} entries in the database")
             
@@ -304,14 +394,45 @@ with st.expander("How to use this app"):
     2. Upload the file using the file uploader
     3. Click 'Run Scraper'
     
+    Duplicate terms (ignoring case, umlauts and ß/ss) are searched once. With "Merge overlapping search terms",
+    a term that contains all words of a shorter term is served from the shorter term's results; this is off by
+    default because hits that only match in the tender description are lost.
+    
+    #### List-only Fast Mode
+    - Check "List-only fast mode" to read only the fields shown in the result list (one request per search term)
+    - Use "Fetch pending details" later to visit the detail pages of these tenders
+    
+    #### Background Scraping
+    - Scrapes run in a background worker; the page shows the progress and can be refreshed or closed
+    - Starting the same scrape again (or from another session) joins the running job
+    - After a reload the page shows the queued or running job again; a new scrape can be started once it has finished
+    
     #### Database Features
-    - All scraped tenders are automatically saved to a database
+    - All scraped tenders are automatically saved to a database as soon as they are processed
+    - If a run is interrupted, it can be resumed from the sidebar without fetching finished tenders again
     - Only new tenders are added to the database (duplicates are ignored)
+    - A tender found under several search terms is stored once and lists all matching search terms
     - You can view all database entries by checking the "View all database entries" option
     - You can also view the database contents without running the scraper by clicking "View Database Contents"
+    - With a time budget, urgent deadlines and the newest tenders are fetched first; what is left when the time is up can be resumed later
+    - With "Download tender documents", the files linked on the detail pages are downloaded after the scrape
+    - Enter a PLZ or city under "Near" to only show database entries within the radius, closest first
+    - Without the full GeoNames postcode list a PLZ is placed at the lead city of its region; such locations are marked "ca." and their distances are approximate
+    
+    #### Statistics
+    - Open the "Statistics" page in the navigation for tenders per week and the top clients, locations and search terms
+    
+    #### Relevance
+    - On the "Relevance" page, mark tenders as relevant or not relevant and train the relevance model
+    - New tenders are scored when they are saved; use "Minimum relevance" and "Sort by relevance" to hide off-target tenders
     
     #### Results
     - Results are filtered for tenders published in the specified time period
     - You can download the results as CSV or Excel (with clickable links)
     - The Excel file contains clickable links to the tender pages
     """)
+
+# Poll the status of the active job
+if poll_job:
+    time.sleep(2)
+    st.rerun()
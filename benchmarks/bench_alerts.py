@@ -0,0 +1,73 @@
+"""
+Compare the compiled watch list matcher with testing every pattern per tender
+
+Usage:
+    python benchmarks/bench_alerts.py --patterns 5000 --tenders 20000
+
+Builds synthetic keyword and client watch lists and tenders, then matches
+them once by searching each pattern in each tender (the naive filter) and
+once with alerts.WatchMatcher, and prints the time of each.
+tests/test_alerts.py checks that both find the same matches.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import WatchMatcher, WATCH_FIELDS
+from query_planner import normalize_term
+
+WORDS = ['wartung', 'reinigung', 'bau', 'planung', 'sanierung', 'messung', 'gutachten', 'lieferung']
+
+def naive_match(normalized, row):
+    # normalized: {watch list: [(pattern, ' ' + normalized pattern)]}
+    found = set()
+    for name, patterns in normalized.items():
+        for field in WATCH_FIELDS[name]:
+            text = ' ' + normalize_term(row.get(field) or '')
+            for pattern, key in patterns:
+                if key in text:
+                    found.add((name, pattern))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--patterns', type=int, default=5000, help='Patterns per watch list')
+    parser.add_argument('--tenders', type=int, default=20000, help='Number of tenders')
+    args = parser.parse_args()
+
+    random.seed(1)
+    watch_lists = {
+        'keywords': [f'{random.choice(WORDS)} los{i}' for i in range(args.patterns)],
+        'clients': [f'Gemeinde Ort{i}' for i in range(args.patterns)],
+    }
+    rows = [{'ausschreibungstitel': f'{random.choice(WORDS)} Los{random.randrange(args.patterns * 4)} Anlage',
+             'auftraggeber': f'Gemeinde Ort{random.randrange(args.patterns * 4)}'}
+            for _ in range(args.tenders)]
+
+    start = time.perf_counter()
+    matcher = WatchMatcher(watch_lists)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [{(name, pattern) for name, pattern, _, _ in matcher.match(row)} for row in rows]
+    compiled_time = time.perf_counter() - start
+
+    sample = rows[:max(1, args.tenders // 20)]
+    start = time.perf_counter()
+    normalized = {name: [(pattern, ' ' + normalize_term(pattern)) for pattern in patterns]
+                  for name, patterns in watch_lists.items()}
+    for row in sample:
+        naive_match(normalized, row)
+    naive_time = (time.perf_counter() - start) * len(rows) / len(sample)
+
+    print(f"{2 * args.patterns} patterns, {args.tenders} tenders, {sum(map(len, compiled))} matches")
+    print(f"compile matcher:      {compile_time:8.2f} s")
+    print(f"compiled matcher:     {compiled_time:8.2f} s")
+    print(f"pattern by pattern:   {naive_time:8.2f} s (extrapolated from {len(sample)} tenders)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Track browser memory over a long run with the recycling browser pool
+
+Usage:
+    python benchmarks/bench_browser_pool.py --navigations 1000 --max-navigations 150
+
+Collects detail links from one search result page and cycles through them
+until the requested number of navigations is reached, printing the browser
+RSS every --report-every navigations. With recycling the RSS should stay flat.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from browser_pool import BrowserPool
+from crawl_profiles import LIST_WAIT_FOR, DETAIL_WAIT_FOR, lean_run_config
+from evergabe_scrape import get_tender_link
+from bench_browser_profile import search_url
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--term', default='strahlenschutz')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--navigations', type=int, default=1000)
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--max-navigations', type=int, default=150,
+                        help='Recycle a browser after this many navigations (0 disables recycling)')
+    parser.add_argument('--max-rss-mb', type=int, default=1500)
+    parser.add_argument('--report-every', type=int, default=50)
+    args = parser.parse_args()
+
+    max_navigations = args.max_navigations or float('inf')
+    detail_config = lean_run_config(wait_for=DETAIL_WAIT_FOR)
+
+    async with BrowserPool(size=args.pool_size, max_navigations=max_navigations,
+                           max_rss_mb=args.max_rss_mb) as pool:
+        result = await pool.arun(url=search_url(args.term, args.days),
+                                 config=lean_run_config(wait_for=LIST_WAIT_FOR))
+        items = BeautifulSoup(result.html, 'html.parser').select('#result_list > ul > li')
+        links = [link for _, link in map(get_tender_link, items) if link]
+        if not links:
+            print("No detail links found")
+            return
+
+        print(f"{'navigations':>11} {'RSS MB':>8} {'elapsed s':>10} {'recycled':>9}")
+        start = time.perf_counter()
+        urls = itertools.islice(itertools.cycle(links), args.navigations)
+        done = 0
+        for batch in iter(lambda: list(itertools.islice(urls, args.pool_size)), []):
+            await asyncio.gather(*(pool.arun(url=url, config=detail_config) for url in batch))
+            done += len(batch)
+            if done % args.report_every < len(batch):
+                print(f"{done:>11} {pool.rss_mb():>8.1f} {time.perf_counter() - start:>10.1f} "
+                      f"{pool.stats['recycled']:>9}")
+
+if __name__ == '__main__':
+    asyncio.run(main())
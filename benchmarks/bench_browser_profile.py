@@ -0,0 +1,88 @@
+"""
+Compare page latency and browser memory of the full and the lean crawl profile
+
+Usage:
+    python benchmarks/bench_browser_profile.py --term strahlenschutz --details 10
+
+Fetches the search result page for the term and the first N detail pages
+with each profile and prints median/max latency and peak browser RSS.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from crawl4ai import AsyncWebCrawler
+from crawl_profiles import (
+    LIST_WAIT_FOR, DETAIL_WAIT_FOR, install_request_blocking, process_tree_rss,
+    lean_browser_config, lean_run_config, full_browser_config, full_run_config
+)
+from evergabe_scrape import get_tender_link
+
+def search_url(term, days):
+    date_from = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    date_to = datetime.now().strftime('%Y-%m-%d')
+    return (f"https://www.evergabe.de/auftraege/auftrag-suchen?search[query]={term}"
+            f"&search[dateFrom]={date_from}&search[dateTo]={date_to}"
+            f"&search[orderBy]=date&search[orderDirection]=desc&page=1&per_page=100")
+
+async def run_profile(name, url, details):
+    if name == 'lean':
+        browser_config = lean_browser_config()
+        list_config = lean_run_config(wait_for=LIST_WAIT_FOR)
+        detail_config = lean_run_config(wait_for=DETAIL_WAIT_FOR)
+    else:
+        browser_config = full_browser_config()
+        list_config = detail_config = full_run_config()
+
+    latencies = []
+    peak_rss = 0
+    async with AsyncWebCrawler(config=browser_config) as crawler:
+        if name == 'lean':
+            install_request_blocking(crawler)
+
+        start = time.perf_counter()
+        result = await crawler.arun(url=url, config=list_config)
+        latencies.append(time.perf_counter() - start)
+        peak_rss = max(peak_rss, process_tree_rss())
+
+        soup = BeautifulSoup(result.html, 'html.parser')
+        items = soup.select('#result_list > ul > li')
+        links = [link for _, link in map(get_tender_link, items) if link][:details]
+
+        for link in links:
+            start = time.perf_counter()
+            await crawler.arun(url=link, config=detail_config)
+            latencies.append(time.perf_counter() - start)
+            peak_rss = max(peak_rss, process_tree_rss())
+
+    return {
+        'pages': len(latencies),
+        'median_s': statistics.median(latencies),
+        'max_s': max(latencies),
+        'total_s': sum(latencies),
+        'peak_rss_mb': peak_rss / 1024 / 1024,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--term', default='strahlenschutz')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--details', type=int, default=10, help='Number of detail pages per profile')
+    args = parser.parse_args()
+
+    url = search_url(args.term, args.days)
+    print(f"{'profile':<8} {'pages':>5} {'median s':>9} {'max s':>7} {'total s':>8} {'peak RSS MB':>12}")
+    for name in ('full', 'lean'):
+        stats = await run_profile(name, url, args.details)
+        print(f"{name:<8} {stats['pages']:>5} {stats['median_s']:>9.2f} {stats['max_s']:>7.2f} "
+              f"{stats['total_s']:>8.2f} {stats['peak_rss_mb']:>12.1f}")
+
+if __name__ == '__main__':
+    asyncio.run(main())
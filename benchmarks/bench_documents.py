@@ -0,0 +1,90 @@
+"""
+Download synthetic tender documents from a local file server, one at a time and concurrently
+
+Usage:
+    python benchmarks/bench_documents.py --documents 40 --size 2000000 --delay 0.2
+
+Serves generated files with documents.file_server (with latency per
+response, and breaking off the first transfer of every file after half of
+it), links them from archived detail pages of synthetic tenders, and runs
+queue_documents() and download_documents() against a temporary database and
+store: once sequentially and once with the default limits. Two host names
+of the same server (127.0.0.1 and localhost) exercise the per-host limit;
+every fifth file is a copy of another one to show the deduplication.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import documents
+import page_archive
+from tender_record import TenderRecord, TenderBatch, WEBSITE
+
+def setup(tmp, count, size, port):
+    # Files to serve, and one archived detail page per tender linking two of them
+    files = os.path.join(tmp, 'files')
+    os.makedirs(files)
+    content = None
+    for i in range(count):
+        if i % 5 != 1:
+            content = os.urandom(size)
+        with open(os.path.join(files, f'doc{i}.pdf'), 'wb') as f:
+            f.write(content)
+
+    archive = page_archive.PageArchive(os.path.join(tmp, 'archive'))
+    batch = TenderBatch()
+    for i in range((count + 1) // 2):
+        link = f'https://www.evergabe.de/auftraege/auftrag/{i}'
+        batch.append(TenderRecord(website=WEBSITE, vergabe_id=str(i), ausschreibungstitel=f'Ausschreibung {i}',
+                                  link=link), suchbegriff='begriff')
+        anchors = ''.join(f'<a href="http://{host}:{port}/doc{n}.pdf">Unterlage {n}</a>'
+                          for host, n in (('127.0.0.1', 2 * i), ('localhost', 2 * i + 1)) if n < count)
+        archive.add(link, f'<html><body><h1>Ausschreibung {i}</h1>{anchors}</body></html>', page_archive.DETAIL)
+    database.insert_tenders(batch)
+    return archive
+
+def run(label, args, **limits):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, 'tenders.db')
+        database.initialize_database()
+        server = documents.file_server(os.path.join(tmp, 'files'), 0, args.delay, args.size // 2, quiet=True)
+        archive = setup(tmp, args.documents, args.size, server.server_address[1])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        store = documents.DocumentStore(os.path.join(tmp, 'store'))
+
+        start = time.perf_counter()
+        documents.queue_documents(archive=archive)
+        first = asyncio.run(documents.download_documents(store=store, **limits))
+        # The broken-off transfers are resumed from their partial files
+        second = asyncio.run(documents.download_documents(store=store, **limits))
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+        stored = sum(len(names) for _, _, names in os.walk(os.path.join(store.path, 'objects')))
+        print(f"{label:>10}: {elapsed:6.2f} s, {stored} files stored")
+        print(f"{'':>12}first pass: {first}")
+        print(f"{'':>12}retry:      {second}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--documents', type=int, default=40, help='Number of linked files')
+    parser.add_argument('--size', type=int, default=2000000, help='File size in bytes')
+    parser.add_argument('--delay', type=float, default=0.2, help='Server latency per response in seconds')
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger('database').setLevel(logging.WARNING)
+    logging.getLogger('documents').setLevel(logging.ERROR)
+
+    run('sequential', args, concurrency=1, per_host=1)
+    run('concurrent', args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure the import time of the modules app.py and the CLI load at startup
+
+Usage:
+    python benchmarks/bench_import_time.py --repeat 5 --max-ms 300
+
+Imports each module in a fresh interpreter with -X importtime and prints the
+best cumulative import time. The run fails (exit code 1) if a module takes
+longer than --max-ms. That importing them loads none of the heavy
+dependencies is checked in tests/test_imports.py.
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported at the top of app.py and evergabe_scrape.py
+MODULES = ['evergabe_scrape', 'browser_pool', 'database', 'run_journal', 'query_planner', 'tender_record', 'job_queue']
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)$')
+
+def import_time_us(module):
+    """
+    Cumulative import time of module in microseconds, measured in a fresh interpreter
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match and match.group(3) == module and len(match.group(2)) == 1:
+            return int(match.group(1))
+    raise RuntimeError(f"No import time reported for {module}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=300, help='Fail if a module takes longer (0 disables)')
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<18} {'best ms':>8}")
+    for module in args.modules:
+        best_ms = min(import_time_us(module) for _ in range(args.repeat)) / 1000
+        print(f"{module:<18} {best_ms:>8.1f}")
+        if args.max_ms and best_ms > args.max_ms:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
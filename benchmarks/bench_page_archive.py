@@ -0,0 +1,74 @@
+"""
+Measure the size and speed of the page archive against loose HTML files
+
+Usage:
+    python benchmarks/bench_page_archive.py --pages 2000 --unchanged 0.7
+
+Generates synthetic detail pages of realistic size, of which the given share
+is fetched again unchanged (as on daily re-runs), writes them once as loose
+files like the former debug_pages folder and once into a PageArchive, and
+prints the bytes on disk, the write time and the time to read all pages back.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_archive import PageArchive, DETAIL
+
+def make_page(i):
+    rows = ''.join(f'<tr><td>Los {j}</td><td>Leistung {i}-{j} nach DIN {random.randint(1000, 9999)}</td></tr>'
+                   for j in range(40))
+    return (f'<html><head><script>var nonce="{random.random()}";</script></head><body>'
+            f'<h1>Ausschreibung {i}</h1><div id="award_procedure_places">Ausführungsort: {10000 + i} Stadt</div>'
+            f'<table>{rows}</table>' + '<div class="footer">Impressum Datenschutz Kontakt</div>' * 50 +
+            '</body></html>')
+
+def disk_usage(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--pages', type=int, default=2000, help='Number of fetches')
+    parser.add_argument('--unchanged', type=float, default=0.7, help='Share of fetches that repeat a known page')
+    args = parser.parse_args()
+
+    random.seed(1)
+    distinct = [make_page(i) for i in range(max(1, int(args.pages * (1 - args.unchanged))))]
+    fetches = [(i % len(distinct), distinct[i % len(distinct)]) for i in range(args.pages)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loose = os.path.join(tmp, 'debug_pages')
+        os.makedirs(loose)
+        start = time.perf_counter()
+        for n, (i, html) in enumerate(fetches):
+            with open(os.path.join(loose, f'tender_{i}_{n}.html'), 'w', encoding='utf-8') as f:
+                f.write(html)
+        loose_write = time.perf_counter() - start
+
+        archive = PageArchive(os.path.join(tmp, 'archive'))
+        start = time.perf_counter()
+        for i, html in fetches:
+            archive.add(f'https://www.evergabe.de/auftraege/auftrag/{i}', html, DETAIL)
+        archive_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for fetch in archive.fetches(DETAIL):
+            archive.read(fetch['digest'])
+        archive_read = time.perf_counter() - start
+
+        loose_bytes = disk_usage(loose)
+        archive_bytes = disk_usage(archive.path)
+
+    print(f"{len(fetches)} fetches, {len(distinct)} distinct pages")
+    print(f"{'':<14}{'MB on disk':>12}{'write s':>10}{'read s':>10}")
+    print(f"{'loose files':<14}{loose_bytes / 1e6:>12.2f}{loose_write:>10.2f}{'-':>10}")
+    print(f"{'page archive':<14}{archive_bytes / 1e6:>12.2f}{archive_write:>10.2f}{archive_read:>10.2f}")
+    print(f"archive is {loose_bytes / archive_bytes:.1f}x smaller")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare radius searches through the tender_locations R*Tree with a full scan
+
+Usage:
+    python benchmarks/bench_radius_search.py --sizes 10000 100000 --radius 100
+
+For each history size, fills a temporary database with synthetic tenders
+located at random gazetteer places (geocoded at insert time), then times
+database.search_tenders(near=..., radius_km=...) against computing the
+distance of every stored tender in pandas. tests/test_gazetteer.py checks
+that both find the same tenders.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import pandas  # noqa: F401  imported up front so the first timing does not include it
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import gazetteer
+from tender_record import TenderRecord, TenderBatch, WEBSITE
+
+CENTERS = ['München', 'Hamburg', '60311 Frankfurt', 'Leipzig', 'Freiburg im Breisgau']
+
+def fill(count):
+    random.seed(1)
+    places = sorted({place for _, _, place in gazetteer.get_gazetteer().places.values()})
+    for start in range(0, count, 10000):
+        batch = TenderBatch()
+        for i in range(start, min(count, start + 10000)):
+            record = TenderRecord(website=WEBSITE, vergabe_id=str(i), ausschreibungstitel=f'Ausschreibung {i}',
+                                  link=f'https://www.evergabe.de/auftraege/auftrag/{i}',
+                                  leistungsort=random.choice(places))
+            batch.append(record, suchbegriff='begriff')
+        database.insert_tenders(batch)
+
+def search_rtree(radius):
+    return [set(database.search_tenders(near=center, radius_km=radius)['Vergabe-ID']) for center in CENTERS]
+
+def search_scan(radius):
+    import sqlite3
+    import pandas as pd
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    df = pd.read_sql_query("SELECT vergabe_id, location_lat, location_lon FROM tenders", conn)
+    conn.close()
+    found = []
+    for center in CENTERS:
+        location = gazetteer.locate(center)
+        distances = [gazetteer.distance_km(lat, lon, location.lat, location.lon)
+                     for lat, lon in zip(df['location_lat'], df['location_lon'])]
+        found.append({vergabe_id for vergabe_id, distance in zip(df['vergabe_id'], distances)
+                      if distance is not None and distance <= radius})
+    return found
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='History sizes')
+    parser.add_argument('--radius', type=float, default=100, help='Search radius in km')
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger('database').setLevel(logging.WARNING)
+
+    print(f"{'tenders':>10}{'matches':>10}{'R*Tree ms':>12}{'scan ms':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DATABASE_PATH = os.path.join(tmp, 'tenders.db')
+            database.initialize_database()
+            fill(size)
+            rtree, rtree_time = timed(search_rtree, args.radius)
+            scan, scan_time = timed(search_scan, args.radius)
+            print(f"{size:>10}{sum(map(len, rtree)):>10}{rtree_time:>12.1f}{scan_time:>12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare scoring a batch of tenders in one vectorized pass with scoring them one by one
+
+Usage:
+    python benchmarks/bench_relevance.py --labels 2000 --sizes 1000 10000 100000
+
+Trains relevance.RelevanceModel on synthetic labelled tenders (titles built
+from relevant and off-target vocabularies with shared noise words) and times
+RelevanceModel.score() on whole batches against calling it for every tender
+separately, as a per-row scorer would at insert time. The accuracy on fresh
+tenders is checked in tests/test_relevance.py.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relevance import RelevanceModel
+
+RELEVANT = ['Strahlenschutzmessung', 'Dosimetrie', 'Strahlenschutzberatung', 'Radonmessung',
+            'Röntgenabnahmeprüfung', 'Kontaminationsmessung', 'Sachverständiger Strahlenschutz']
+OFF_TARGET = ['Straßenbau', 'Unterhaltsreinigung', 'Büromöbel', 'Winterdienst', 'Kantinenbewirtschaftung',
+              'Schutzkleidung', 'Messestand']
+NOISE = ['Rahmenvertrag', 'Los 1', 'Los 2', '2025', 'Neubau', 'Sanierung', 'Dienstleistung', 'Lieferung']
+CLIENTS = ['Stadt Köln', 'Land Berlin', 'Universitätsklinikum Essen', 'Bundesamt für Strahlenschutz',
+           'Landkreis Harz', 'Stadtwerke München']
+PLACES = ['50667 Köln', '10115 Berlin', '45147 Essen', '38226 Salzgitter', '80331 München']
+
+def tenders(count, seed):
+    rng = random.Random(seed)
+    rows, labels = [], []
+    for _ in range(count):
+        label = rng.random() < 0.3
+        words = [rng.choice(RELEVANT if label else OFF_TARGET)] + rng.sample(NOISE, 2)
+        rng.shuffle(words)
+        rows.append({'ausschreibungstitel': ' '.join(words), 'auftraggeber': rng.choice(CLIENTS),
+                     'vergabestelle': None, 'leistungsort': rng.choice(PLACES)})
+        labels.append(int(label))
+    return rows, labels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--labels', type=int, default=2000, help='Number of labelled training tenders')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Batch sizes to score')
+    args = parser.parse_args()
+
+    rows, labels = tenders(args.labels, seed=1)
+    start = time.perf_counter()
+    model = RelevanceModel.fit(rows, labels)
+    print(f"Trained on {args.labels} labels in {time.perf_counter() - start:.2f} s")
+
+    print(f"{'tenders':>10} {'batch':>10} {'per row':>10} {'speedup':>8}")
+    for size in args.sizes:
+        batch, _ = tenders(size, seed=3)
+        start = time.perf_counter()
+        model.score(batch)
+        batched = time.perf_counter() - start
+        start = time.perf_counter()
+        for row in batch:
+            model.score([row])
+        per_row = time.perf_counter() - start
+        print(f"{size:>10} {batched:>9.3f}s {per_row:>9.3f}s {per_row / batched:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare dashboard queries on tender_stats with aggregating get_all_tenders() in pandas
+
+Usage:
+    python benchmarks/bench_stats.py --sizes 10000 50000 200000
+
+For each history size, fills a temporary database with synthetic tenders
+(the triggers maintain tender_stats while inserting), then times the
+queries of the statistics page against the former approach of loading all
+tenders and grouping them in pandas.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import pandas  # noqa: F401  imported up front so the first timing does not include it
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from tender_record import TenderRecord, TenderBatch, WEBSITE
+
+def fill(count):
+    random.seed(1)
+    for start in range(0, count, 10000):
+        batch = TenderBatch()
+        for i in range(start, min(count, start + 10000)):
+            record = TenderRecord(website=WEBSITE, vergabe_id=str(i), ausschreibungstitel=f'Ausschreibung {i}',
+                                  link=f'https://www.evergabe.de/auftraege/auftrag/{i}',
+                                  auftraggeber=f'Auftraggeber {random.randrange(2000)}',
+                                  leistungsort=f'Ort {random.randrange(500)}',
+                                  veroeffentlicht_seit=f'{random.randint(1, 28):02d}.{random.randint(1, 12):02d}.2025 00:00')
+            batch.append(record, suchbegriff=f'begriff {random.randrange(50)}')
+        database.insert_tenders(batch)
+
+def dashboard_stats():
+    database.get_stats_overview()
+    database.get_stats('week', limit=26, by_value=True)
+    for dimension in ('client', 'location', 'term'):
+        database.get_stats(dimension, limit=20)
+
+def dashboard_pandas():
+    df = database.get_all_tenders()
+    len(df)
+    for column in ('Auftraggeber', 'Leistungsort', 'Suchbegriff', 'veröffentlicht seit'):
+        df.groupby(column).size().nlargest(20)
+
+def timed(func, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000], help='History sizes')
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger('database').setLevel(logging.WARNING)
+
+    print(f"{'tenders':>10}{'tender_stats ms':>18}{'pandas ms':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DATABASE_PATH = os.path.join(tmp, 'tenders.db')
+            database.initialize_database()
+            fill(size)
+            print(f"{size:>10}{timed(dashboard_stats):>18.1f}{timed(dashboard_pandas, 1):>12.1f}")
+
+if __name__ == '__main__':
+    main()
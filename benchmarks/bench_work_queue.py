@@ -0,0 +1,76 @@
+"""
+Drain a work queue with several local worker processes
+
+Usage:
+    python benchmarks/bench_work_queue.py --items 2000 --processes 4 --abandon 0.02
+
+Fills a temporary SQLite work queue with no-op items and drains it with
+several processes. A share of the leases (--abandon) is dropped without
+completing, as a crashed worker would; those items are handed out again after
+their lease expired. Prints the throughput; tests/test_work_queue.py checks
+that every item is completed exactly once.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import work_queue
+
+def drain(url, worker_id, abandon, lease_seconds, results):
+    queue = work_queue.open_queue(url)
+    completed = leased = 0
+    idle_since = time.monotonic()
+    while time.monotonic() - idle_since < lease_seconds + 1:
+        item = queue.lease(worker_id, lease_seconds=lease_seconds)
+        if item is None:
+            time.sleep(0.05)
+            continue
+        idle_since = time.monotonic()
+        leased += 1
+        if random.random() < abandon:
+            continue
+        completed += queue.complete(item)
+    results.put((worker_id, leased, completed))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--abandon', type=float, default=0.02, help='Share of leases dropped without completing')
+    parser.add_argument('--lease-seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = 'sqlite:///' + os.path.join(tmp, 'queue.db')
+        queue = work_queue.open_queue(url)
+        for i in range(args.items):
+            queue.put('detail', f'https://www.evergabe.de/auftraege/auftrag/{i}', {'terms': ['bench']})
+
+        results = multiprocessing.Queue()
+        start = time.perf_counter()
+        processes = [multiprocessing.Process(target=drain, args=(url, f'worker-{i}', args.abandon,
+                                                                 args.lease_seconds, results))
+                     for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        print(f"{'worker':<10} {'leased':>7} {'completed':>10}")
+        for worker_id, leased, completed in sorted(stats):
+            print(f"{worker_id:<10} {leased:>7} {completed:>10}")
+        total = sum(completed for _, _, completed in stats)
+        done = queue.counts().get(('detail', work_queue.DONE), 0)
+        print(f"{total} completions, {done} of {args.items} items done in {elapsed:.1f} s "
+              f"(including {args.lease_seconds:.1f} s idle wait)")
+
+if __name__ == '__main__':
+    main()
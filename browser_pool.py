@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from crawl_profiles import (
+    lean_browser_config, full_browser_config, install_request_blocking, process_tree_rss, child_pids
+)
+
+logger = logging.getLogger(__name__)
+
+# Error messages that mean the browser or page is gone rather than the site failing
+_CRASH_MARKERS = (
+    'target closed', 'browser has been closed', 'browser closed', 'page closed',
+    'context closed', 'connection closed', 'crashed', 'disconnected',
+)
+
+_HEALTH_CHECK_URL = 'raw:<html><body>ok</body></html>'
+
+class _Slot:
+    """
+    One browser instance of the pool, the processes it started and the number of navigations it has served
+    """
+    def __init__(self, index):
+        self.index = index
+        self.crawler = None
+        self.navigations = 0
+        self.pids = set()
+
+class BrowserPool:
+    """
+    Fixed-size pool of crawlers that recycles browsers before they grow too large
+
+    A browser is restarted after max_navigations page loads, when the RSS of its
+    own processes exceeds max_rss_mb, or when it crashed. Memory is checked every
+    memory_check_interval navigations of a browser. The pool exposes
+    the same arun(url=..., config=...) method as AsyncWebCrawler, so it can be
+    passed wherever a crawler is expected.
+
+    Usage:
+        async with BrowserPool(size=2) as pool:
+            result = await pool.arun(url=url, config=config)
+    """
+    def __init__(self, size=2, max_navigations=150, max_rss_mb=1500, lean=True, retries=1,
+                 memory_check_interval=10):
+        self.size = size
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.memory_check_interval = memory_check_interval
+        self.lean = lean
+        self.retries = retries
+        self.stats = {'navigations': 0, 'recycled': 0, 'crash_restarts': 0}
+        self._slots = []
+        self._idle = None
+        self._launch_lock = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        self._idle = asyncio.Queue()
+        self._launch_lock = asyncio.Lock()
+        for i in range(self.size):
+            slot = _Slot(i)
+            await self._launch(slot)
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+        logger.info(f"Browser pool started with {self.size} browsers")
+
+    async def close(self):
+        for slot in self._slots:
+            await self._shutdown(slot)
+        self._slots = []
+        logger.info(f"Browser pool closed: {self.stats}")
+
+    async def _launch(self, slot):
+        # Imported here so that the browser stack is only loaded when a browser is started
+        from crawl4ai import AsyncWebCrawler
+        browser_config = lean_browser_config() if self.lean else full_browser_config()
+        crawler = AsyncWebCrawler(config=browser_config)
+        if self.lean:
+            install_request_blocking(crawler)
+        # The processes that appear while the browser starts belong to this slot;
+        # launches are serialized so that two restarting slots cannot mix them up
+        async with self._launch_lock:
+            before = child_pids()
+            await crawler.start()
+            slot.pids = child_pids() - before
+        slot.crawler = crawler
+        slot.navigations = 0
+
+    async def _shutdown(self, slot):
+        if slot.crawler is None:
+            return
+        try:
+            await slot.crawler.close()
+        except Exception as e:
+            # A crashed browser may fail to close cleanly; the process is gone either way
+            logger.warning(f"Error closing browser {slot.index}: {e}")
+        slot.crawler = None
+
+    async def _restart(self, slot, reason):
+        logger.info(f"Restarting browser {slot.index} after {slot.navigations} navigations ({reason})")
+        await self._shutdown(slot)
+        await self._launch(slot)
+        if not await self.health_check(slot):
+            # One more attempt with a fresh process before giving up
+            await self._shutdown(slot)
+            await self._launch(slot)
+
+    async def health_check(self, slot):
+        """
+        Render a trivial page to verify the browser responds
+        """
+        from crawl4ai import CacheMode
+        from crawl4ai.async_configs import CrawlerRunConfig
+        try:
+            config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, verbose=False)
+            result = await slot.crawler.arun(url=_HEALTH_CHECK_URL, config=config)
+            return bool(result.success)
+        except Exception as e:
+            logger.warning(f"Health check of browser {slot.index} failed: {e}")
+            return False
+
+    def rss_mb(self, slot=None):
+        """
+        Current RSS in MB of the processes of one browser, or of all browsers of this process
+        """
+        if slot is None:
+            return process_tree_rss() / 1024 / 1024
+        return sum(process_tree_rss(pid, include_self=True) for pid in slot.pids) / 1024 / 1024
+
+    def _needs_recycle(self, slot):
+        if slot.navigations >= self.max_navigations:
+            return 'navigation limit'
+        # Only the browser about to navigate is measured, and only every few navigations
+        if (self.max_rss_mb and slot.navigations and slot.navigations % self.memory_check_interval == 0
+                and self.rss_mb(slot) > self.max_rss_mb):
+            return 'memory limit'
+        return None
+
+    @staticmethod
+    def _is_crash(error):
+        message = str(error or '').lower()
+        return any(marker in message for marker in _CRASH_MARKERS)
+
+    async def arun(self, url, config=None, **kwargs):
+        """
+        Fetch a page with the next idle browser, restarting it transparently if it crashed
+
+        Returns:
+            CrawlResult: Result of the last attempt
+        """
+        slot = await self._idle.get()
+        try:
+            reason = self._needs_recycle(slot)
+            if reason:
+                self.stats['recycled'] += 1
+                await self._restart(slot, reason)
+
+            for attempt in range(self.retries + 1):
+                try:
+                    result = await slot.crawler.arun(url=url, config=config, **kwargs)
+                except Exception as e:
+                    if attempt >= self.retries:
+                        raise
+                    logger.warning(f"Browser {slot.index} failed on {url}: {e}")
+                    self.stats['crash_restarts'] += 1
+                    await self._restart(slot, 'exception')
+                    continue
+
+                slot.navigations += 1
+                self.stats['navigations'] += 1
+                if not result.success and self._is_crash(result.error_message) and attempt < self.retries:
+                    logger.warning(f"Browser {slot.index} crashed on {url}: {result.error_message}")
+                    self.stats['crash_restarts'] += 1
+                    await self._restart(slot, 'crash')
+                    continue
+                return result
+        finally:
+            self._idle.put_nowait(slot)
@@ -0,0 +1,76 @@
+import re
+import hashlib
+from database import COLUMN_MAPPING, is_missing
+
+# Markup that changes on every request without changing the tender itself
+_BOILERPLATE_RE = re.compile(
+    r'<script\b[^>]*>.*?</script\s*>'
+    r'|<style\b[^>]*>.*?</style\s*>'
+    r'|<noscript\b[^>]*>.*?</noscript\s*>'
+    r'|<!--.*?-->'
+    r'|<(?:meta|link)\b[^>]*>'
+    r'|<input\b[^>]*type=["\']?hidden[^>]*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Per-request attributes such as CSP nonces and CSRF tokens
+_DYNAMIC_ATTR_RE = re.compile(
+    r'\s(?:nonce|[\w-]*csrf[\w-]*|[\w-]*token[\w-]*)\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>]+)',
+    re.IGNORECASE
+)
+
+# Relative times and countdowns ("noch 5 Tage", "vor 3 Stunden") change daily
+_RELATIVE_TIME_RE = re.compile(
+    r'\b(?:noch|vor|in)\s+\d+\s+(?:Sekunden?|Minuten?|Stunden?|Tagen?|Tage|Wochen?)\b',
+    re.IGNORECASE
+)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Fields compared between the stored row and a fresh extraction (display column -> database column)
+TRACKED_FIELDS = {
+    display: column for display, column in COLUMN_MAPPING.items()
+    if column not in ('suchbegriff', 'website', 'link')
+}
+
+def normalize_html(html):
+    """
+    Strip dynamic boilerplate from a page so that only real content changes affect its hash
+    """
+    if not html:
+        return ''
+    text = _BOILERPLATE_RE.sub(' ', html)
+    text = _DYNAMIC_ATTR_RE.sub('', text)
+    text = _RELATIVE_TIME_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def content_hash(html):
+    """
+    Normalized content hash of a detail page
+
+    Returns:
+        str: Hex SHA-256 digest of the page with dynamic boilerplate removed
+    """
+    return hashlib.sha256(normalize_html(html).encode('utf-8')).hexdigest()
+
+def changed_fields(stored, detail_data):
+    """
+    Compare freshly extracted values against the stored row
+
+    Placeholders for missing values never overwrite stored data.
+
+    Args:
+        stored (dict): Stored row keyed by database column name
+        detail_data (TenderRecord): Extracted tender data (a dict keyed by display column name also works)
+
+    Returns:
+        dict: Changed values keyed by database column name
+    """
+    changes = {}
+    for display, column in TRACKED_FIELDS.items():
+        value = detail_data.get(display)
+        if is_missing(value):
+            continue
+        if value != stored.get(column):
+            changes[column] = value
+    return changes
@@ -0,0 +1,210 @@
+import os
+from urllib.parse import urlsplit
+
+# crawl4ai is imported inside the config functions so that importing this module stays cheap
+
+# Resource types that are never needed to parse tender pages (we only read the HTML)
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet', 'imageset', 'texttrack', 'eventsource', 'websocket', 'manifest'}
+
+# Hosts whose scripts and XHRs are allowed; everything else is third party
+FIRST_PARTY_HOSTS = ('evergabe.de',)
+
+# Analytics and tracking hosts that are blocked for every resource type
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'facebook.com', 'hotjar.com', 'matomo.cloud', 'etracker.com', 'etracker.de',
+    'usercentrics.eu', 'cookiebot.com', 'consentmanager.net', 'bing.com', 'linkedin.com',
+)
+
+def _wait_for_selector(selector):
+    # Return as soon as the selector is in the DOM. There is deliberately no fallback
+    # to the load event: result lists are rendered by scripts after it, and reading
+    # them early silently yields no tenders. A page where the selector never appears
+    # runs into page_timeout and comes back unsuccessful (see evergabe_scrape.PageNotLoaded)
+    return f"css:{selector}"
+
+# Wait for the content we parse instead of waiting for the network to go idle; a search
+# without hits renders the "no results" notice instead of the list and loads as an empty list
+LIST_WAIT_FOR = _wait_for_selector('#result_list, .result-list, .tender-list, .no-results')
+DETAIL_WAIT_FOR = _wait_for_selector('#award_procedure_places, #file_number_contracting_authority, dl.row.dl-row')
+
+def _host_matches(host, domains):
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+def is_blocked(resource_type, url):
+    """
+    Decide whether the lean profile aborts a request
+
+    Args:
+        resource_type (str): Playwright resource type ('document', 'script', 'image', ...)
+        url (str): Request URL
+
+    Returns:
+        bool: True if the request should be aborted
+    """
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+
+    host = urlsplit(url).hostname or ''
+    if _host_matches(host, TRACKER_HOSTS):
+        return True
+
+    # Third-party scripts, frames and XHRs (chat widgets, consent banners, ...)
+    if resource_type in ('script', 'xhr', 'fetch', 'other') and host and not _host_matches(host, FIRST_PARTY_HOSTS):
+        return True
+
+    return False
+
+async def _route_request(route):
+    request = route.request
+    if is_blocked(request.resource_type, request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def _on_page_context_created(page, context, **kwargs):
+    # Intercept every request of the browser context
+    await context.route('**/*', _route_request)
+    return page
+
+def install_request_blocking(crawler):
+    """
+    Register the request interception hook on a crawler before it starts navigating
+    """
+    crawler.crawler_strategy.set_hook('on_page_context_created', _on_page_context_created)
+
+def lean_browser_config(headless=True):
+    """
+    Browser configuration without images, background networking and extensions
+    """
+    from crawl4ai.async_configs import BrowserConfig
+    return BrowserConfig(
+        headless=headless,
+        verbose=False,
+        extra_args=[
+            '--blink-settings=imagesEnabled=false',
+            '--disable-background-networking',
+            '--disable-extensions',
+            '--disable-component-update',
+            '--mute-audio',
+        ],
+    )
+
+def lean_run_config(wait_for=DETAIL_WAIT_FOR, page_timeout=30000):
+    """
+    Run configuration that returns as soon as the parsed containers are in the DOM
+
+    Args:
+        wait_for (str): crawl4ai wait condition, e.g. LIST_WAIT_FOR or DETAIL_WAIT_FOR
+        page_timeout (int): Navigation timeout in milliseconds
+    """
+    from crawl4ai import CacheMode
+    from crawl4ai.async_configs import CrawlerRunConfig
+    return CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        wait_until='domcontentloaded',
+        wait_for=wait_for,
+        page_timeout=page_timeout,
+        js_only=False,
+        verbose=False,
+    )
+
+def full_browser_config(headless=True):
+    """
+    Previous default browser configuration, kept for comparison measurements
+    """
+    from crawl4ai.async_configs import BrowserConfig
+    return BrowserConfig(headless=headless)
+
+def full_run_config():
+    """
+    Previous default run configuration (waits for network idle), kept for comparison measurements
+    """
+    from crawl4ai import CacheMode
+    from crawl4ai.async_configs import CrawlerRunConfig
+    return CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        wait_until='networkidle',
+        page_timeout=60000,
+        js_only=False,
+        verbose=True,
+    )
+
+def _children_map():
+    # Parent pid -> child pids of all processes, from /proc (Linux)
+    children = {}
+    try:
+        entries = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return children
+    for entry in entries:
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    return children
+
+def child_pids(pid=None):
+    """
+    Direct child processes of pid, used to tell which browser processes a crawler started
+
+    Returns:
+        set: Process IDs
+    """
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        return {child.pid for child in psutil.Process(pid).children()}
+    except ImportError:
+        pass
+    except Exception:
+        return set()
+    return set(_children_map().get(pid, []))
+
+def process_tree_rss(pid=None, include_self=False):
+    """
+    Resident memory of all descendant processes of pid (the browser and its renderers)
+
+    Uses psutil when it is installed and falls back to /proc on Linux.
+
+    Args:
+        pid (int, optional): Root process, default this process
+        include_self (bool): Also count the root process itself
+
+    Returns:
+        int: RSS in bytes, or 0 if it cannot be determined
+    """
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        process = psutil.Process(pid)
+        processes = process.children(recursive=True) + ([process] if include_self else [])
+        total = 0
+        for child in processes:
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    except ImportError:
+        pass
+    except Exception:
+        return 0
+
+    # /proc fallback: build the parent -> children map once
+    children = _children_map()
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = list(children.get(pid, [])) + ([pid] if include_self else [])
+    while stack:
+        child = stack.pop()
+        if child != pid:
+            stack.extend(children.get(child, []))
+        try:
+            with open(f'/proc/{child}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
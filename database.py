@@ -1,25 +1,522 @@
 import sqlite3
-import pandas as pd
 import os
+import re
+import hashlib
 import logging
+from datetime import datetime
+from urllib.parse import urlsplit
+from date_parsing import to_sortable, deadline_to_sortable
+import gazetteer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tenders.db')
+# TENDERS_DB points several scraper workers at one shared result store
+DATABASE_PATH = os.environ.get('TENDERS_DB') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tenders.db')
+
+# Placeholder values the scraper uses for fields it could not extract
+MISSING_VALUES = {None, '', '-', 'N/A', 'Nicht verfügbar'}
+
+# Mapping between the DataFrame columns used by the app and the database columns
+COLUMN_MAPPING = {
+    'Vergabe-ID': 'vergabe_id',
+    'Ausschreibungstitel': 'ausschreibungstitel',
+    'Auftraggeber': 'auftraggeber',
+    'Vergabestelle': 'vergabestelle',
+    'Link zur Ausschreibung': 'link',
+    'Leistungsort': 'leistungsort',
+    'veröffentlicht seit': 'veroeffentlicht_seit',
+    'nächste Frist': 'naechste_frist',
+    'Suchbegriff': 'suchbegriff',
+    'Website': 'website'
+}
+
+# Columns the scraper adds for bookkeeping; they are stored but not displayed
+INTERNAL_COLUMNS = ['content_hash', 'detail_status']
+
+# Geocoded place of a tender for radius searches. Without the full GeoNames
+# postcode list a PLZ resolves to the lead city of its two-digit region, which
+# can be tens of kilometers off, so those matches are marked as approximate
+LOCATION_LABEL_SQL = ("CASE WHEN t.location_precision = 'region' "
+                      "THEN 'ca. ' || t.location_place || ' (PLZ-Region)' "
+                      "ELSE t.location_place END AS \"Standort\"")
+
+# One row per tender; search term hits are aggregated from tender_hits
+TENDER_SELECT = '''
+SELECT t.id, t.vergabe_id, t.ausschreibungstitel, t.auftraggeber, t.vergabestelle,
+       t.link, t.leistungsort, t.veroeffentlicht_seit, t.naechste_frist,
+       (SELECT GROUP_CONCAT(h.suchbegriff, ', ') FROM tender_hits h
+        WHERE h.tender_key = t.tender_key) AS suchbegriff,
+       t.website, t.scrape_date, ROUND(t.relevance, 2) AS "Relevanz"
+FROM tenders t
+'''
+
+INSERT_TENDER_SQL = '''
+INSERT OR IGNORE INTO tenders
+(tender_key, vergabe_id, ausschreibungstitel, auftraggeber, vergabestelle,
+ link, leistungsort, veroeffentlicht_seit, naechste_frist, website, scrape_date,
+ veroeffentlicht_seit_ts, naechste_frist_ts, content_hash, detail_status,
+ location_lat, location_lon, location_place, location_precision, relevance)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_HIT_SQL = '''
+INSERT OR IGNORE INTO tender_hits (tender_key, suchbegriff, scrape_date)
+VALUES (?, ?, ?)
+'''
+
+# Offset of German local time for a sortable UTC timestamp ({ts}): CEST from the
+# last Sunday of March to the last Sunday of October, 01:00 UTC each
+_LOCAL_OFFSET_SQL = ("CASE WHEN {ts} >= date(substr({ts}, 1, 4) || '-03-25', 'weekday 0') || 'T01:00:00Z'"
+                     " AND {ts} < date(substr({ts}, 1, 4) || '-10-25', 'weekday 0') || 'T01:00:00Z'"
+                     " THEN '+2 hours' ELSE '+1 hours' END")
+
+# Summary dimensions of tender_stats and the SQL expression for the value of a
+# tenders row ({row} is NEW, OLD or a table alias). Publication weeks are
+# keyed by their Monday in local time, from veroeffentlicht_seit_ts or the scrape date.
+STATS_DIMENSIONS = {
+    'total': "''",
+    'client': "COALESCE({row}.auftraggeber, '')",
+    'location': "COALESCE({row}.leistungsort, '')",
+    'week': ("COALESCE(date({row}.veroeffentlicht_seit_ts, "
+             + _LOCAL_OFFSET_SQL.format(ts='{row}.veroeffentlicht_seit_ts')
+             + ", 'weekday 0', '-6 days'), date({row}.scrape_date, 'weekday 0', '-6 days'), '')"),
+}
+
+# Search terms are counted from tender_hits
+STATS_TERM = 'term'
+
+# Text fields alerts.py matches watch lists against; a change to one of them
+# queues an already scanned tender for another scan
+ALERT_TEXT_FIELDS = ('ausschreibungstitel', 'auftraggeber', 'vergabestelle', 'leistungsort')
 
 def get_connection():
     """
     Create a connection to the SQLite database
     """
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        # The worker process and the app write concurrently; wait for locks instead of failing
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30)
         return conn
     except sqlite3.Error as e:
         logger.error(f"Database connection error: {e}")
         raise
 
+def is_missing(value):
+    """
+    Check whether a scraped value is one of the placeholders for missing data
+    """
+    if isinstance(value, float) and value != value:  # NaN from pandas
+        return True
+    return value in MISSING_VALUES or (isinstance(value, str) and not value.strip())
+
+def make_tender_key(vergabe_id=None, link=None, title=None, website=None):
+    """
+    Build the stable key that identifies a tender across search terms and runs
+
+    The Vergabe-ID is preferred. If it could not be parsed, the key is derived
+    from the numeric ID at the end of the detail URL, then from the normalized
+    URL itself, and as a last resort from a hash of title and website.
+
+    Returns:
+        str: Tender key such as 'id:evergabe.de:12345' or 'url:evergabe.de/path'
+    """
+    site = 'unknown'
+    if not is_missing(website):
+        site = urlsplit(website if '//' in website else f'//{website}').netloc.lower()
+        site = site[4:] if site.startswith('www.') else site
+
+    if not is_missing(vergabe_id):
+        return f"id:{site}:{str(vergabe_id).strip()}"
+
+    if not is_missing(link):
+        parts = urlsplit(link)
+        path = parts.path.rstrip('/')
+        id_match = re.search(r'/(\d+)$', path)
+        if id_match:
+            return f"id:{site}:{id_match.group(1)}"
+        host = parts.netloc.lower()
+        host = host[4:] if host.startswith('www.') else host
+        return f"url:{host}{path}"
+
+    digest = hashlib.sha1(f"{title}|{website}".encode('utf-8')).hexdigest()
+    return f"hash:{digest}"
+
+def _ensure_columns(cursor, table, columns):
+    """
+    Add columns that were introduced after a database was first created
+    
+    Args:
+        cursor: Database cursor
+        table (str): Table name
+        columns (dict): Column name -> SQL type
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, sql_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
+def _create_schema(cursor):
+    """
+    Create all tables and their indexes
+    """
+    # One row per tender, identified by its tender key
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tenders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tender_key TEXT NOT NULL UNIQUE,
+        vergabe_id TEXT,
+        ausschreibungstitel TEXT,
+        auftraggeber TEXT,
+        vergabestelle TEXT,
+        link TEXT,
+        leistungsort TEXT,
+        veroeffentlicht_seit TEXT,
+        naechste_frist TEXT,
+        website TEXT,
+        scrape_date TEXT,
+        veroeffentlicht_seit_ts TEXT,
+        naechste_frist_ts TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        content_hash TEXT,
+        watch_hash TEXT,
+        last_checked TEXT,
+        detail_status TEXT NOT NULL DEFAULT 'done',
+        location_lat REAL,
+        location_lon REAL,
+        location_place TEXT,
+        location_precision TEXT,
+        relevance REAL
+    )
+    ''')
+    _ensure_columns(cursor, 'tenders', {
+        'veroeffentlicht_seit_ts': 'TEXT',
+        'naechste_frist_ts': 'TEXT',
+        'etag': 'TEXT',
+        'last_modified': 'TEXT',
+        'content_hash': 'TEXT',
+        'watch_hash': 'TEXT',
+        'last_checked': 'TEXT',
+        'detail_status': "TEXT NOT NULL DEFAULT 'done'",
+        'location_lat': 'REAL',
+        'location_lon': 'REAL',
+        'location_place': 'TEXT',
+        'location_precision': 'TEXT',
+        'relevance': 'REAL',
+    })
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tenders_naechste_frist_ts ON tenders(naechste_frist_ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tenders_veroeffentlicht_seit_ts ON tenders(veroeffentlicht_seit_ts)')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tenders_detail_pending ON tenders(detail_status) WHERE detail_status = 'pending'")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tenders_relevance ON tenders(relevance)')
+    _create_location_index(cursor)
+
+    # One row per (tender, search term) hit
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tender_hits (
+        tender_key TEXT NOT NULL REFERENCES tenders(tender_key),
+        suchbegriff TEXT NOT NULL,
+        scrape_date TEXT,
+        PRIMARY KEY (tender_key, suchbegriff)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tender_hits_suchbegriff ON tender_hits(suchbegriff)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tenders_link ON tenders(link)')
+
+    # Compact log of field changes detected on re-fetched detail pages
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tender_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tender_key TEXT NOT NULL,
+        changed_at TEXT NOT NULL,
+        field TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tender_changes_key ON tender_changes(tender_key)')
+
+    # Run journal: one row per scrape run and one row per term, list page and tender URL
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scrape_runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        days INTEGER,
+        status TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        finished_at TEXT,
+        total_records INTEGER NOT NULL DEFAULT 0,
+        new_records INTEGER NOT NULL DEFAULT 0,
+        plan TEXT
+    )
+    ''')
+    _ensure_columns(cursor, 'scrape_runs', {'plan': 'TEXT'})
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS run_items (
+        run_id INTEGER NOT NULL REFERENCES scrape_runs(run_id),
+        kind TEXT NOT NULL,
+        item_key TEXT NOT NULL,
+        parent TEXT,
+        position INTEGER,
+        status TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, kind, item_key)
+    ) WITHOUT ROWID
+    ''')
+    
+    # Background scrape jobs executed by scrape_worker.py; at most one queued or
+    # running job per parameter set, so identical requests share one job
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scrape_jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        params TEXT NOT NULL,
+        params_key TEXT NOT NULL,
+        status TEXT NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 1,
+        progress_done INTEGER NOT NULL DEFAULT 0,
+        progress_total INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        run_id INTEGER,
+        total_records INTEGER,
+        new_records INTEGER,
+        error TEXT,
+        worker_pid INTEGER,
+        submitted_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT
+    )
+    ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_scrape_jobs_active ON scrape_jobs(params_key) "
+                   "WHERE status IN ('queued', 'running')")
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job_workers (
+        pid INTEGER PRIMARY KEY,
+        started_at TEXT NOT NULL,
+        heartbeat_at TEXT NOT NULL
+    )
+    ''')
+
+    # Watch list matches recorded by alerts.py, one per tender, watch list and pattern
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tender_key TEXT NOT NULL REFERENCES tenders(tender_key),
+        watch_list TEXT NOT NULL,
+        pattern TEXT NOT NULL,
+        field TEXT NOT NULL,
+        matched_text TEXT,
+        created_at TEXT NOT NULL,
+        delivered_at TEXT,
+        UNIQUE (tender_key, watch_list, pattern)
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_undelivered ON alerts(id) WHERE delivered_at IS NULL')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alert_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER
+    )
+    ''')
+
+    # Tenders whose watched text changed after the alert scan had passed them
+    # (detail pages fetched later, deadline watch); alerts.py matches them again
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS alert_rescan (
+        tender_key TEXT PRIMARY KEY
+    ) WITHOUT ROWID
+    ''')
+    changed = ' OR '.join(f"OLD.{field} IS NOT NEW.{field}" for field in ALERT_TEXT_FIELDS)
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_alert_rescan "
+                   f"AFTER UPDATE OF {', '.join(ALERT_TEXT_FIELDS)} ON tenders "
+                   f"WHEN NEW.id <= COALESCE((SELECT value FROM alert_state WHERE name = 'last_tender_id'), 0) "
+                   f"AND ({changed}) "
+                   f"BEGIN INSERT OR IGNORE INTO alert_rescan (tender_key) VALUES (NEW.tender_key); END")
+
+    # Downloaded tender documents, stored once per content hash by documents.py
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS documents (
+        digest TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        content_type TEXT,
+        stored_at TEXT NOT NULL
+    )
+    ''')
+
+    # Document links found on the detail page of each tender and their download state
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tender_documents (
+        tender_key TEXT NOT NULL REFERENCES tenders(tender_key),
+        url TEXT NOT NULL,
+        name TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        digest TEXT REFERENCES documents(digest),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (tender_key, url)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tender_documents_url ON tender_documents(url)')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tender_documents_open ON tender_documents(status) "
+                   "WHERE status != 'done'")
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS document_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER
+    )
+    ''')
+
+    # Review decisions the relevance model of relevance.py is trained on: 1 relevant, 0 not relevant
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tender_labels (
+        tender_key TEXT PRIMARY KEY REFERENCES tenders(tender_key),
+        label INTEGER NOT NULL CHECK (label IN (0, 1)),
+        labeled_at TEXT NOT NULL
+    )
+    ''')
+
+    # Counters per client, location, search term and publication week for the statistics page
+    _create_stats_schema(cursor)
+
+def _stats_delta(dimension, value, delta):
+    statements = (f"INSERT INTO tender_stats (dimension, value, tenders) VALUES ('{dimension}', {value}, {delta}) "
+                  f"ON CONFLICT (dimension, value) DO UPDATE SET tenders = tenders + {delta};")
+    if delta < 0:
+        statements += f" DELETE FROM tender_stats WHERE dimension = '{dimension}' AND value = {value} AND tenders <= 0;"
+    return statements
+
+def rebuild_stats(cursor):
+    """
+    Recompute tender_stats from the tenders and tender_hits tables
+    """
+    cursor.execute("DELETE FROM tender_stats")
+    for dimension, expression in STATS_DIMENSIONS.items():
+        value = expression.format(row='t')
+        cursor.execute(f"INSERT INTO tender_stats (dimension, value, tenders) "
+                       f"SELECT '{dimension}', {value}, COUNT(*) FROM tenders t GROUP BY {value}")
+    cursor.execute(f"INSERT INTO tender_stats (dimension, value, tenders) "
+                   f"SELECT '{STATS_TERM}', suchbegriff, COUNT(*) FROM tender_hits GROUP BY suchbegriff")
+
+def _create_stats_schema(cursor):
+    """
+    Create tender_stats and the triggers that keep it up to date
+
+    Every insert, update and delete on tenders and tender_hits adjusts the
+    counters in the same transaction, so dashboards read a few small rows
+    instead of aggregating the whole history. A database that predates the
+    table, or whose triggers compute an older definition of a dimension, is
+    counted again from scratch.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tender_stats'")
+    exists = cursor.fetchone() is not None
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'tenders_stats_insert'")
+    row = cursor.fetchone()
+    if row and not all(expression.format(row='NEW') in row[0] for expression in STATS_DIMENSIONS.values()):
+        for trigger in ('tenders_stats_insert', 'tenders_stats_delete', 'tenders_stats_update'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        exists = False
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tender_stats (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        tenders INTEGER NOT NULL,
+        PRIMARY KEY (dimension, value)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tender_stats_top ON tender_stats(dimension, tenders DESC)')
+    if not exists:
+        rebuild_stats(cursor)
+
+    insert = ' '.join(_stats_delta(dimension, expression.format(row='NEW'), 1)
+                      for dimension, expression in STATS_DIMENSIONS.items())
+    delete = ' '.join(_stats_delta(dimension, expression.format(row='OLD'), -1)
+                      for dimension, expression in STATS_DIMENSIONS.items())
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_stats_insert AFTER INSERT ON tenders BEGIN {insert} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_stats_delete AFTER DELETE ON tenders BEGIN {delete} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_stats_update "
+                   f"AFTER UPDATE OF auftraggeber, leistungsort, veroeffentlicht_seit_ts, scrape_date ON tenders "
+                   f"BEGIN {delete} {insert} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tender_hits_stats_insert AFTER INSERT ON tender_hits "
+                   f"BEGIN {_stats_delta(STATS_TERM, 'NEW.suchbegriff', 1)} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tender_hits_stats_delete AFTER DELETE ON tender_hits "
+                   f"BEGIN {_stats_delta(STATS_TERM, 'OLD.suchbegriff', -1)} END")
+
+def _create_location_index(cursor):
+    """
+    Create the R*Tree of tender coordinates and the triggers that keep it in sync
+
+    tender_locations holds one point (min = max) per geocoded tender, keyed by
+    tenders.id, so radius searches are bounding box lookups in the R*Tree.
+    """
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS tender_locations USING rtree(
+        id, min_lat, max_lat, min_lon, max_lon
+    )
+    ''')
+    insert = ("INSERT OR REPLACE INTO tender_locations VALUES "
+              "(NEW.id, NEW.location_lat, NEW.location_lat, NEW.location_lon, NEW.location_lon);")
+    delete = "DELETE FROM tender_locations WHERE id = OLD.id;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_location_insert AFTER INSERT ON tenders "
+                   f"WHEN NEW.location_lat IS NOT NULL AND NEW.location_lon IS NOT NULL BEGIN {insert} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_location_delete AFTER DELETE ON tenders "
+                   f"BEGIN {delete} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_location_clear "
+                   f"AFTER UPDATE OF location_lat, location_lon ON tenders "
+                   f"WHEN NEW.location_lat IS NULL OR NEW.location_lon IS NULL BEGIN {delete} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS tenders_location_update "
+                   f"AFTER UPDATE OF location_lat, location_lon ON tenders "
+                   f"WHEN NEW.location_lat IS NOT NULL AND NEW.location_lon IS NOT NULL BEGIN {insert} END")
+
+def _locate(text):
+    """
+    Coordinates of a Leistungsort as (lat, lon, place, precision), all None if unknown
+    """
+    location = gazetteer.locate(text)
+    if location is None:
+        return None, None, None, None
+    return location.lat, location.lon, location.place, location.precision
+
+def _migrate_legacy_schema(cursor):
+    """
+    Move rows from the old single-table layout into tenders and tender_hits
+
+    The old table declared vergabe_id UNIQUE, so hits for a second search term
+    were dropped on insert. Those hits cannot be recovered here; every stored
+    row is kept and new hits are recorded from now on.
+    """
+    cursor.execute("PRAGMA table_info(tenders)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'suchbegriff' not in columns or 'tender_key' in columns:
+        return
+
+    logger.info("Migrating legacy tenders table to tenders/tender_hits layout")
+    cursor.execute("ALTER TABLE tenders RENAME TO tenders_legacy")
+    _create_schema(cursor)
+
+    cursor.execute('''
+    SELECT vergabe_id, ausschreibungstitel, auftraggeber, vergabestelle, link,
+           leistungsort, veroeffentlicht_seit, naechste_frist, suchbegriff,
+           website, scrape_date
+    FROM tenders_legacy ORDER BY id
+    ''')
+    legacy_rows = cursor.fetchall()
+
+    tender_rows = []
+    hit_rows = []
+    for row in legacy_rows:
+        key = make_tender_key(row[0], row[4], row[1], row[9])
+        tender_rows.append((key,) + row[:8] + row[9:] + (to_sortable(row[6]), deadline_to_sortable(row[7]), None, 'done')
+                           + _locate(row[5]) + (None,))
+        if not is_missing(row[8]):
+            hit_rows.append((key, row[8], row[10]))
+
+    cursor.executemany(INSERT_TENDER_SQL, tender_rows)
+    cursor.executemany(INSERT_HIT_SQL, hit_rows)
+    cursor.execute("DROP TABLE tenders_legacy")
+    logger.info(f"Migrated {len(legacy_rows)} legacy rows")
+
 def initialize_database():
     """
     Create the database tables if they don't exist
@@ -28,24 +525,13 @@ def initialize_database():
     cursor = conn.cursor()
     
     try:
-        # Create the tenders table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tenders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            vergabe_id TEXT UNIQUE,
-            ausschreibungstitel TEXT,
-            auftraggeber TEXT,
-            vergabestelle TEXT,
-            link TEXT,
-            leistungsort TEXT,
-            veroeffentlicht_seit TEXT,
-            naechste_frist TEXT,
-            suchbegriff TEXT,
-            website TEXT,
-            scrape_date TEXT,
-            UNIQUE(vergabe_id, suchbegriff)
-        )
-        ''')
+        # WAL lets the app read job status while the worker writes
+        cursor.execute('PRAGMA journal_mode=WAL')
+        _migrate_legacy_schema(cursor)
+        _create_schema(cursor)
+        # Watch list alerts start with the tenders stored from now on (alerts.scan_new_tenders)
+        cursor.execute("INSERT OR IGNORE INTO alert_state (name, value) "
+                       "SELECT 'last_tender_id', COALESCE(MAX(id), 0) FROM tenders")
         
         conn.commit()
         logger.info("Database initialized successfully")
@@ -55,89 +541,88 @@ def initialize_database():
     finally:
         conn.close()
 
-def insert_tenders(df):
+def _value(row, column):
+    value = row.get(column)
+    return None if is_missing(value) else value
+
+def insert_tenders(df, scrape_date=None):
     """
-    Insert tenders from a DataFrame into the database
-    Only inserts tenders that don't already exist in the database
+    Insert tenders from a DataFrame or a tender_record.TenderBatch into the database
+    Each tender is stored once; every search term it was found under is
+    recorded as a separate hit in tender_hits. Placeholders for missing
+    values are stored as NULL.
+    
+    Args:
+        df: DataFrame or TenderBatch
+        scrape_date (str, optional): Scrape date to record, default now
     
     Returns:
         tuple: (total_records, new_records)
     """
-    if df.empty:
+    if len(df) == 0:
         logger.info("No tenders to insert")
         return 0, 0
     
-    # Rename DataFrame columns to match database columns
-    column_mapping = {
-        'Vergabe-ID': 'vergabe_id',
-        'Ausschreibungstitel': 'ausschreibungstitel',
-        'Auftraggeber': 'auftraggeber',
-        'Vergabestelle': 'vergabestelle',
-        'Link zur Ausschreibung': 'link',
-        'Leistungsort': 'leistungsort',
-        'veröffentlicht seit': 'veroeffentlicht_seit',
-        'nächste Frist': 'naechste_frist',
-        'Suchbegriff': 'suchbegriff',
-        'Website': 'website'
-    }
-    
-    # Create a copy of the DataFrame with renamed columns
-    df_db = df.rename(columns=column_mapping)
+    if hasattr(df, 'rows'):
+        rows = list(df.rows())
+    else:
+        # Rename the display columns of a DataFrame to the database columns
+        rows = df.rename(columns=COLUMN_MAPPING).to_dict('records')
     
     # Add scrape date
-    from datetime import datetime
-    df_db['scrape_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    # Select only the columns we need
-    columns = ['vergabe_id', 'ausschreibungstitel', 'auftraggeber', 'vergabestelle', 
-               'link', 'leistungsort', 'veroeffentlicht_seit', 'naechste_frist', 
-               'suchbegriff', 'website', 'scrape_date']
-    
-    df_db = df_db[columns]
+    scrape_date = scrape_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # The whole batch is scored in one vectorized pass; None while no model is trained
+    import relevance
+    scores = relevance.score_rows(rows)
+
+    tender_rows = []
+    hit_rows = []
+    for row, score in zip(rows, scores):
+        key = make_tender_key(row.get('vergabe_id'), row.get('link'),
+                              row.get('ausschreibungstitel'), row.get('website'))
+        tender_rows.append((
+            key,
+            _value(row, 'vergabe_id'),
+            _value(row, 'ausschreibungstitel'),
+            _value(row, 'auftraggeber'),
+            _value(row, 'vergabestelle'),
+            _value(row, 'link'),
+            _value(row, 'leistungsort'),
+            _value(row, 'veroeffentlicht_seit'),
+            _value(row, 'naechste_frist'),
+            _value(row, 'website'),
+            scrape_date,
+            to_sortable(row.get('veroeffentlicht_seit')),
+            deadline_to_sortable(row.get('naechste_frist')),
+            _value(row, 'content_hash'),
+            'pending' if row.get('detail_status') == 'pending' else 'done'
+        ) + _locate(_value(row, 'leistungsort')) + (score,))
+        if not is_missing(row.get('suchbegriff')):
+            hit_rows.append((key, row['suchbegriff'], scrape_date))
     
     # Connect to the database
     conn = get_connection()
-    total_records = len(df_db)
+    total_records = len(tender_rows)
     new_records = 0
     
     try:
-        # For each row in the DataFrame, try to insert it
-        for _, row in df_db.iterrows():
-            try:
-                cursor = conn.cursor()
-                cursor.execute('''
-                INSERT OR IGNORE INTO tenders 
-                (vergabe_id, ausschreibungstitel, auftraggeber, vergabestelle, 
-                 link, leistungsort, veroeffentlicht_seit, naechste_frist, 
-                 suchbegriff, website, scrape_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row['vergabe_id'],
-                    row['ausschreibungstitel'],
-                    row['auftraggeber'],
-                    row['vergabestelle'],
-                    row['link'],
-                    row['leistungsort'],
-                    row['veroeffentlicht_seit'],
-                    row['naechste_frist'],
-                    row['suchbegriff'],
-                    row['website'],
-                    row['scrape_date']
-                ))
-                
-                if cursor.rowcount > 0:
-                    new_records += 1
-                
-            except sqlite3.Error as e:
-                logger.error(f"Error inserting tender: {e}")
-                continue
+        # rowcount, unlike total_changes, leaves out the rows written by triggers
+        cursor = conn.cursor()
+        cursor.executemany(INSERT_TENDER_SQL, tender_rows)
+        new_records = cursor.rowcount
+        
+        cursor.executemany(INSERT_HIT_SQL, hit_rows)
+        new_hits = cursor.rowcount
         
         conn.commit()
-        logger.info(f"Inserted {new_records} new tenders out of {total_records} total")
+        logger.info(f"Inserted {new_records} new tenders and {new_hits} new search term hits "
+                    f"out of {total_records} total")
         
     except Exception as e:
         logger.error(f"Error during database insertion: {e}")
         conn.rollback()
+        new_records = 0
     finally:
         conn.close()
     
@@ -150,29 +635,16 @@ def get_all_tenders():
     Returns:
         pandas.DataFrame: DataFrame containing all tenders
     """
+    import pandas as pd
     conn = get_connection()
     
     try:
-        # Reverse the column mapping to match the app's expected column names
-        column_mapping = {
-            'vergabe_id': 'Vergabe-ID',
-            'ausschreibungstitel': 'Ausschreibungstitel',
-            'auftraggeber': 'Auftraggeber',
-            'vergabestelle': 'Vergabestelle',
-            'link': 'Link zur Ausschreibung',
-            'leistungsort': 'Leistungsort',
-            'veroeffentlicht_seit': 'veröffentlicht seit',
-            'naechste_frist': 'nächste Frist',
-            'suchbegriff': 'Suchbegriff',
-            'website': 'Website'
-        }
-        
         # Query the database
-        df = pd.read_sql_query("SELECT * FROM tenders", conn)
+        df = pd.read_sql_query(TENDER_SELECT + " ORDER BY t.id", conn)
         
         # Rename columns to match the app's expected column names
         if not df.empty:
-            df = df.rename(columns=column_mapping)
+            df = df.rename(columns={v: k for k, v in COLUMN_MAPPING.items()})
         
         return df
     
@@ -182,51 +654,100 @@ def get_all_tenders():
     finally:
         conn.close()
 
-def search_tenders(search_term=None, days=None):
+def search_tenders(search_term=None, days=None, deadline_after=None, deadline_before=None,
+                   near=None, radius_km=None, min_relevance=None, by_relevance=False):
     """
-    Search for tenders in the database based on search term and/or days
+    Search for tenders in the database based on search term, days, deadline, location and/or relevance
     
     Args:
         search_term (str, optional): Search term to filter by
         days (int, optional): Number of days to look back
+        deadline_after (datetime or str, optional): Only tenders whose deadline is after this time
+        deadline_before (datetime or str, optional): Only tenders whose deadline is before this time
+        near (str or tuple, optional): PLZ, place name or (lat, lon) to search around
+        radius_km (float, optional): Only tenders within this distance of near
+        min_relevance (float, optional): Only tenders the relevance model scores at least this high
+        by_relevance (bool): Most relevant tenders first (before the distance order)
         
     Returns:
-        pandas.DataFrame: DataFrame containing matching tenders
+        pandas.DataFrame: DataFrame containing matching tenders; with near,
+        sorted by an added 'Entfernung (km)' column and with the resolved
+        'Standort', marked 'ca.' where only the PLZ region is known
+
+    The bundled gazetteer has no postcode coordinates: without the GeoNames
+    postcode list (see gazetteer.GEONAMES_FILE) a PLZ, both in near and in the
+    stored Leistungsort, is placed at the lead city of its two-digit region, so
+    distances and the radius limit can be off by several tens of kilometers.
     """
+    import pandas as pd
+    
+    center = None
+    if near is not None:
+        if isinstance(near, str):
+            location = gazetteer.locate(near)
+            if location is None:
+                logger.warning(f"Unknown location: {near}")
+                return pd.DataFrame()
+            center = (location.lat, location.lon)
+        else:
+            center = tuple(near)
+    
     conn = get_connection()
     
     try:
-        query = "SELECT * FROM tenders WHERE 1=1"
+        query = TENDER_SELECT + " WHERE 1=1"
         params = []
         
+        if center:
+            # The R*Tree narrows the search to the bounding box, the exact
+            # distance is only computed for the tenders inside it
+            conn.create_function('distance_km', 4, gazetteer.distance_km, deterministic=True)
+            query = query.replace("\nFROM tenders t",
+                                  ",\n       distance_km(t.location_lat, t.location_lon, ?, ?) AS distance,"
+                                  "\n       " + LOCATION_LABEL_SQL + "\nFROM tenders t")
+            params.extend(center)
+            if radius_km:
+                query += (" AND t.id IN (SELECT id FROM tender_locations"
+                          " WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?)"
+                          " AND distance <= ?")
+                params.extend(gazetteer.bounding_box(center[0], center[1], radius_km))
+                params.append(radius_km)
+        
         if search_term:
-            query += " AND suchbegriff LIKE ?"
+            query += (" AND EXISTS (SELECT 1 FROM tender_hits h"
+                      " WHERE h.tender_key = t.tender_key AND h.suchbegriff LIKE ?)")
             params.append(f"%{search_term}%")
         
         if days:
-            query += " AND julianday('now') - julianday(scrape_date) <= ?"
+            query += " AND julianday('now') - julianday(t.scrape_date) <= ?"
             params.append(days)
         
-        # Reverse the column mapping to match the app's expected column names
-        column_mapping = {
-            'vergabe_id': 'Vergabe-ID',
-            'ausschreibungstitel': 'Ausschreibungstitel',
-            'auftraggeber': 'Auftraggeber',
-            'vergabestelle': 'Vergabestelle',
-            'link': 'Link zur Ausschreibung',
-            'leistungsort': 'Leistungsort',
-            'veroeffentlicht_seit': 'veröffentlicht seit',
-            'naechste_frist': 'nächste Frist',
-            'suchbegriff': 'Suchbegriff',
-            'website': 'Website'
-        }
+        if deadline_after:
+            query += " AND t.naechste_frist_ts >= ?"
+            params.append(to_sortable(deadline_after))
+        
+        if deadline_before:
+            query += " AND t.naechste_frist_ts <= ?"
+            params.append(deadline_to_sortable(deadline_before))
+        
+        if min_relevance is not None:
+            query += " AND t.relevance >= ?"
+            params.append(min_relevance)
+        
+        order = ["t.relevance IS NULL", "t.relevance DESC"] if by_relevance else []
+        if center:
+            order += ["distance IS NULL", "distance"]
+        query += " ORDER BY " + ', '.join(order + ["t.id"])
         
         # Query the database
         df = pd.read_sql_query(query, conn, params=params)
         
         # Rename columns to match the app's expected column names
         if not df.empty:
-            df = df.rename(columns=column_mapping)
+            df = df.rename(columns={v: k for k, v in COLUMN_MAPPING.items()})
+            if center:
+                df = df.rename(columns={'distance': 'Entfernung (km)'})
+                df['Entfernung (km)'] = df['Entfernung (km)'].round(1)
         
         return df
     
@@ -235,3 +756,349 @@ def search_tenders(search_term=None, days=None):
         return pd.DataFrame()
     finally:
         conn.close()
+
+def get_open_tenders(limit=None):
+    """
+    Retrieve tenders whose deadline is still in the future, closest deadline first
+    
+    Args:
+        limit (int, optional): Maximum number of tenders to return
+        
+    Returns:
+        list: Dicts with tender_key, link, the stored field values and the
+            validators (etag, last_modified, watch_hash) of the last re-check
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    
+    try:
+        query = '''
+        SELECT tender_key, vergabe_id, ausschreibungstitel, auftraggeber, vergabestelle,
+               link, leistungsort, veroeffentlicht_seit, naechste_frist,
+               naechste_frist_ts, etag, last_modified, watch_hash, last_checked
+        FROM tenders
+        WHERE naechste_frist_ts > strftime('%Y-%m-%dT%H:%M:%SZ', 'now')
+        ORDER BY naechste_frist_ts ASC
+        '''
+        params = []
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in conn.execute(query, params)]
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving open tenders: {e}")
+        return []
+    finally:
+        conn.close()
+
+def get_pending_detail_tenders(limit=None):
+    """
+    Retrieve tenders stored by a list-only scrape whose detail page has not been fetched yet
+    
+    Args:
+        limit (int, optional): Maximum number of tenders to return
+        
+    Returns:
+        list: Dicts keyed by database column name, newest first
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    
+    try:
+        query = TENDER_SELECT + " WHERE t.detail_status = 'pending' ORDER BY t.id DESC"
+        params = []
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in conn.execute(query, params)]
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving tenders with pending details: {e}")
+        return []
+    finally:
+        conn.close()
+
+def count_pending_detail_tenders():
+    """
+    Count the tenders whose detail page has not been fetched yet
+    
+    Returns:
+        int: Number of tenders with detail_status 'pending'
+    """
+    conn = get_connection()
+    
+    try:
+        return conn.execute("SELECT COUNT(*) FROM tenders WHERE detail_status = 'pending'").fetchone()[0]
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error counting tenders with pending details: {e}")
+        return 0
+    finally:
+        conn.close()
+
+def get_tender_by_link(link):
+    """
+    Retrieve a stored tender by its detail page link
+    
+    Returns:
+        dict: Row keyed by database column name, or None if the link is unknown
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    
+    try:
+        row = conn.execute("SELECT * FROM tenders WHERE link = ? LIMIT 1", (link,)).fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving tender {link}: {e}")
+        return None
+    finally:
+        conn.close()
+
+def update_tender(tender_key, fields=None, etag=None, last_modified=None, content_hash=None,
+                  detail_status=None, watch_hash=None):
+    """
+    Record a re-check of a tender and write the fields that actually changed
+    Every changed field is also appended to the tender_changes log
+    
+    Args:
+        tender_key (str): Key of the tender to update
+        fields (dict, optional): Changed values keyed by database column name
+        etag (str, optional): ETag header of the last response
+        last_modified (str, optional): Last-Modified header of the last response
+        content_hash (str, optional): Hash of the page rendered by the scraper
+        detail_status (str, optional): 'done' once the detail page has been extracted
+        watch_hash (str, optional): Hash of the raw HTTP response of deadline_watch.py;
+            kept apart from content_hash because raw and rendered pages never hash alike
+    """
+    updates = dict(fields or {})
+    if 'veroeffentlicht_seit' in updates:
+        updates['veroeffentlicht_seit_ts'] = to_sortable(updates['veroeffentlicht_seit'])
+    if 'naechste_frist' in updates:
+        updates['naechste_frist_ts'] = deadline_to_sortable(updates['naechste_frist'])
+    if 'leistungsort' in updates:
+        (updates['location_lat'], updates['location_lon'], updates['location_place'],
+         updates['location_precision']) = _locate(updates['leistungsort'])
+    if etag is not None:
+        updates['etag'] = etag
+    if last_modified is not None:
+        updates['last_modified'] = last_modified
+    if content_hash is not None:
+        updates['content_hash'] = content_hash
+    if detail_status is not None:
+        updates['detail_status'] = detail_status
+    if watch_hash is not None:
+        updates['watch_hash'] = watch_hash
+    updates['last_checked'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    conn = get_connection()
+
+    try:
+        # A changed title, client or location changes the relevance score
+        import relevance
+        if any(column in relevance.FIELD_PREFIXES for column in updates):
+            columns = list(relevance.FIELD_PREFIXES)
+            stored = conn.execute(f"SELECT {', '.join(columns)} FROM tenders WHERE tender_key = ?",
+                                  (tender_key,)).fetchone()
+            if stored:
+                row = dict(zip(columns, stored))
+                row.update({column: updates[column] for column in columns if column in updates})
+                updates['relevance'] = relevance.score_rows([row])[0]
+        assignments = ', '.join(f"{column} = ?" for column in updates)
+
+        if fields:
+            columns = ', '.join(fields)
+            old_row = conn.execute(f"SELECT {columns} FROM tenders WHERE tender_key = ?",
+                                   (tender_key,)).fetchone()
+            if old_row:
+                changed_at = updates['last_checked']
+                conn.executemany('''
+                INSERT INTO tender_changes (tender_key, changed_at, field, old_value, new_value)
+                VALUES (?, ?, ?, ?, ?)
+                ''', [
+                    (tender_key, changed_at, column, old_value, fields[column])
+                    for column, old_value in zip(fields, old_row)
+                    if old_value != fields[column]
+                ])
+        
+        conn.execute(f"UPDATE tenders SET {assignments} WHERE tender_key = ?",
+                     list(updates.values()) + [tender_key])
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Error updating tender {tender_key}: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+def get_tender_changes(tender_key=None):
+    """
+    Retrieve the change log, newest first
+    
+    Args:
+        tender_key (str, optional): Only return changes of this tender
+        
+    Returns:
+        pandas.DataFrame: DataFrame with tender_key, changed_at, field, old_value, new_value
+    """
+    import pandas as pd
+    conn = get_connection()
+    
+    try:
+        query = "SELECT tender_key, changed_at, field, old_value, new_value FROM tender_changes"
+        params = []
+        if tender_key:
+            query += " WHERE tender_key = ?"
+            params.append(tender_key)
+        query += " ORDER BY id DESC"
+        return pd.read_sql_query(query, conn, params=params)
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving tender changes: {e}")
+        return pd.DataFrame()
+    finally:
+        conn.close()
+
+def get_stats(dimension, limit=None, by_value=False):
+    """
+    Tender counts per value of a summary dimension, read from tender_stats
+    
+    Args:
+        dimension (str): 'client', 'location', 'week', 'term' or 'total'
+        limit (int, optional): Maximum number of rows
+        by_value (bool): Order by value descending (e.g. newest weeks first) instead of by count
+        
+    Returns:
+        pandas.DataFrame: DataFrame with value and tenders
+    """
+    import pandas as pd
+    conn = get_connection()
+    
+    try:
+        query = "SELECT value, tenders FROM tender_stats WHERE dimension = ?"
+        query += " ORDER BY value DESC" if by_value else " ORDER BY tenders DESC"
+        params = [dimension]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return pd.read_sql_query(query, conn, params=params)
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving statistics for {dimension}: {e}")
+        return pd.DataFrame(columns=['value', 'tenders'])
+    finally:
+        conn.close()
+
+def get_stats_overview():
+    """
+    Number of tenders and of distinct values per summary dimension
+    
+    Returns:
+        dict: {'tenders': int, 'client': int, 'location': int, 'week': int, 'term': int}
+    """
+    conn = get_connection()
+    
+    try:
+        overview = {dimension: 0 for dimension in (*STATS_DIMENSIONS, STATS_TERM) if dimension != 'total'}
+        overview.update(conn.execute("SELECT dimension, COUNT(*) FROM tender_stats WHERE dimension != 'total' "
+                                     "GROUP BY dimension").fetchall())
+        row = conn.execute("SELECT tenders FROM tender_stats WHERE dimension = 'total'").fetchone()
+        overview['tenders'] = row[0] if row else 0
+        return overview
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving statistics overview: {e}")
+        return {}
+    finally:
+        conn.close()
+
+def backfill_dates():
+    """
+    Fill the sortable date columns for rows stored before they existed
+    
+    The conversion runs inside SQLite as one UPDATE per column, so existing
+    databases are converted in bulk without loading rows into Python.
+    
+    Returns:
+        int: Number of rows updated
+    """
+    conn = get_connection()
+    
+    try:
+        conn.create_function('to_sortable', 1, to_sortable, deterministic=True)
+        conn.create_function('deadline_to_sortable', 1, deadline_to_sortable, deterministic=True)
+        cursor = conn.cursor()
+        cursor.execute('''
+        UPDATE tenders SET veroeffentlicht_seit_ts = to_sortable(veroeffentlicht_seit)
+        WHERE veroeffentlicht_seit_ts IS NULL AND veroeffentlicht_seit IS NOT NULL
+        ''')
+        updated = cursor.rowcount
+        cursor.execute('''
+        UPDATE tenders SET naechste_frist_ts = deadline_to_sortable(naechste_frist)
+        WHERE naechste_frist_ts IS NULL AND naechste_frist IS NOT NULL
+        ''')
+        updated += cursor.rowcount
+        conn.commit()
+        logger.info(f"Backfilled {updated} date values")
+        return updated
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error backfilling dates: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+def backfill_locations(force=False):
+    """
+    Geocode the Leistungsort of rows stored without coordinates or without
+    their precision (rows geocoded before it was recorded)
+
+    Each distinct location text is looked up once; the triggers add the
+    coordinates to the tender_locations R*Tree.
+
+    Args:
+        force (bool): Also re-geocode rows that already have coordinates,
+                      e.g. after installing the full GeoNames postcode list
+    
+    Returns:
+        int: Number of rows updated
+    """
+    conn = get_connection()
+    
+    try:
+        where = "leistungsort IS NOT NULL" + ("" if force else
+                                              " AND (location_lat IS NULL OR location_precision IS NULL)")
+        texts = [row[0] for row in conn.execute(f"SELECT DISTINCT leistungsort FROM tenders WHERE {where}")]
+        updates = [_locate(text) + (text,) for text in texts]
+        cursor = conn.executemany(f'''
+        UPDATE tenders SET location_lat = ?, location_lon = ?, location_place = ?, location_precision = ?
+        WHERE leistungsort = ? AND {where}
+        ''', [update for update in updates if force or update[0] is not None])
+        updated = cursor.rowcount
+        conn.commit()
+        logger.info(f"Backfilled locations of {updated} tenders from {len(texts)} distinct places")
+        return updated
+    
+    except sqlite3.Error as e:
+        logger.error(f"Error backfilling locations: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Maintenance commands for the tenders database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("backfill-dates", help="Convert stored date strings into sortable values")
+    locations_parser = subparsers.add_parser("backfill-locations", help="Geocode stored Leistungsort values")
+    locations_parser.add_argument("--force", action="store_true", help="Also re-geocode tenders with coordinates")
+    args = parser.parse_args()
+    
+    initialize_database()
+    if args.command == "backfill-dates":
+        backfill_dates()
+    elif args.command == "backfill-locations":
+        backfill_locations(args.force)
@@ -0,0 +1,126 @@
+import re
+from datetime import datetime, timezone
+from dateutil import tz
+
+# All dates on evergabe.de are given in German local time
+LOCAL_TZ = tz.gettz('Europe/Berlin')
+
+# Format used to store and display dates scraped from the portal
+DISPLAY_DATE_FORMAT = '%d.%m.%Y'
+DISPLAY_DATETIME_FORMAT = '%d.%m.%Y %H:%M'
+
+# Format of the sortable database columns (UTC, lexicographic order == time order)
+SORTABLE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Fast path: values already in display format ("12.03.2025" or "12.03.2025 10:00")
+_DISPLAY_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})(?: (\d{2}):(\d{2}))?')
+
+# German dates anywhere in free text, optionally followed by a time ("12.3.2025, 10:00 Uhr")
+_GERMAN_RE = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})(?:\s*,?\s*(\d{1,2})[:.](\d{2})(?!\.\d{4}))?')
+
+# ISO 8601 dates as used in meta tags and <time datetime="..."> attributes
+_ISO_RE = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?(Z|[+-]\d{2}:?\d{2})?)?'
+)
+
+def _build(year, month, day, hour=None, minute=None, second=None, tzinfo=None, end_of_day=False):
+    """
+    Build a timezone-aware datetime from regex groups, or None if the date is invalid
+    """
+    has_time = hour is not None
+    if not has_time:
+        hour, minute, second = (23, 59, 0) if end_of_day else (0, 0, 0)
+    try:
+        value = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0),
+                         tzinfo=tzinfo or LOCAL_TZ)
+    except ValueError:
+        return None, False
+    return value, has_time
+
+def _parse_offset(offset):
+    """
+    Convert an ISO 8601 offset like 'Z', '+01:00' or '+0100' into a tzinfo
+    """
+    if not offset:
+        return None
+    if offset == 'Z':
+        return timezone.utc
+    sign = -1 if offset[0] == '-' else 1
+    digits = offset[1:].replace(':', '')
+    return tz.tzoffset(None, sign * (int(digits[:2]) * 3600 + int(digits[2:]) * 60))
+
+def parse_date(text, end_of_day=False):
+    """
+    Find the first date in a piece of text and return it as a timezone-aware datetime
+
+    Args:
+        text (str): Free text such as "Angebotsfrist: 15.04.2025 09:00 Uhr" or an ISO timestamp
+        end_of_day (bool): Use 23:59 instead of 00:00 for dates without a time,
+            which is the right choice for deadlines
+
+    Returns:
+        tuple: (datetime or None, bool has_time)
+    """
+    if not text or not isinstance(text, str):
+        return None, False
+
+    text = text.strip()
+
+    # Fast path for values that are already normalized
+    match = _DISPLAY_RE.fullmatch(text) or _GERMAN_RE.search(text)
+    if match:
+        day, month, year, hour, minute = match.groups()
+        return _build(year, month, day, hour, minute, end_of_day=end_of_day)
+
+    match = _ISO_RE.search(text)
+    if match:
+        year, month, day, hour, minute, second, offset = match.groups()
+        return _build(year, month, day, hour, minute, second, _parse_offset(offset), end_of_day)
+
+    return None, False
+
+def format_display(value, has_time=True):
+    """
+    Format a datetime in the German display format used in the app and the database
+    """
+    if value is None:
+        return None
+    value = value.astimezone(LOCAL_TZ)
+    return value.strftime(DISPLAY_DATETIME_FORMAT if has_time else DISPLAY_DATE_FORMAT)
+
+def normalize_date_text(text, default='-'):
+    """
+    Normalize free text containing a date to "dd.mm.yyyy" or "dd.mm.yyyy HH:MM"
+
+    Args:
+        text (str): Text to search for a date
+        default: Value to return if no date is found
+
+    Returns:
+        str: Normalized date string, or default
+    """
+    value, has_time = parse_date(text)
+    if value is None:
+        return default
+    return format_display(value, has_time)
+
+def to_sortable(text, end_of_day=False):
+    """
+    Convert a scraped date string (or datetime) into the sortable UTC form stored in the database
+
+    Returns:
+        str: e.g. '2025-03-12T09:00:00Z', or None if no date could be parsed
+    """
+    if isinstance(text, datetime):
+        value = text if text.tzinfo else text.replace(tzinfo=LOCAL_TZ)
+    else:
+        value, _ = parse_date(text, end_of_day=end_of_day)
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc).strftime(SORTABLE_FORMAT)
+
+def deadline_to_sortable(text):
+    """
+    Sortable form of a deadline; date-only deadlines count until the end of the day
+    """
+    return to_sortable(text, end_of_day=True)
@@ -0,0 +1,115 @@
+import logging
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import database
+from change_detection import content_hash, changed_fields
+from evergabe_scrape import extract_tender_data
+
+logger = logging.getLogger(__name__)
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/120.0 Safari/537.36',
+    'Accept-Language': 'de-DE,de;q=0.9',
+}
+
+def check_tender(session, tender, timeout=30):
+    """
+    Re-check one open tender with a conditional request
+
+    Args:
+        session (requests.Session): HTTP session to use
+        tender (dict): Row from database.get_open_tenders()
+        timeout (int): Request timeout in seconds
+
+    Returns:
+        str: 'not_modified', 'unchanged', 'changed' or 'error'
+    """
+    headers = {}
+    if tender.get('etag'):
+        headers['If-None-Match'] = tender['etag']
+    if tender.get('last_modified'):
+        headers['If-Modified-Since'] = tender['last_modified']
+
+    try:
+        response = session.get(tender['link'], headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        logger.error(f"Error fetching {tender['link']}: {e}")
+        return 'error'
+
+    if response.status_code == 304:
+        database.update_tender(tender['tender_key'])
+        return 'not_modified'
+
+    if response.status_code != 200:
+        logger.error(f"Unexpected status {response.status_code} for {tender['link']}")
+        return 'error'
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    page_hash = content_hash(response.text)
+
+    # Compared with the hash of the last re-check only: the scraper hashes the
+    # rendered page into content_hash, which never matches the raw response
+    if page_hash == tender.get('watch_hash'):
+        database.update_tender(tender['tender_key'], etag=etag, last_modified=last_modified)
+        return 'unchanged'
+
+    detail_data = extract_tender_data(response.text, tender['link'])
+    changes = changed_fields(tender, detail_data)
+    database.update_tender(tender['tender_key'], changes, etag=etag,
+                           last_modified=last_modified, watch_hash=page_hash)
+
+    if changes:
+        logger.info(f"Tender {tender['tender_key']} changed: {', '.join(sorted(changes))}")
+        return 'changed'
+    return 'unchanged'
+
+def watch_deadlines(limit=None, workers=2, delay=(1.0, 2.0)):
+    """
+    Re-check the detail pages of all open tenders, closest deadline first
+
+    Args:
+        limit (int, optional): Maximum number of tenders to re-check
+        workers (int): Number of parallel requests
+        delay (tuple): Range of the random pause after each request in seconds
+
+    Returns:
+        dict: Count of tenders per result ('not_modified', 'unchanged', 'changed', 'error')
+    """
+    database.initialize_database()
+    tenders = database.get_open_tenders(limit=limit)
+    logger.info(f"Re-checking {len(tenders)} open tenders")
+
+    summary = {'not_modified': 0, 'unchanged': 0, 'changed': 0, 'error': 0}
+    if not tenders:
+        return summary
+
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+
+    def run(tender):
+        status = check_tender(session, tender)
+        # Short pause so we don't overload the server
+        time.sleep(random.uniform(*delay))
+        return status
+
+    # map() submits in priority order, so the closest deadlines are checked first
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for status in executor.map(run, tenders):
+            summary[status] += 1
+
+    logger.info(f"Deadline watch finished: {summary}")
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-check open tenders for changed deadlines and details")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of tenders to re-check")
+    parser.add_argument("--workers", type=int, default=2, help="Number of parallel requests")
+    args = parser.parse_args()
+
+    watch_deadlines(limit=args.limit, workers=args.workers)
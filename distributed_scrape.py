@@ -0,0 +1,233 @@
+import os
+import sys
+import socket
+import random
+import asyncio
+import logging
+import subprocess
+from datetime import date, datetime, timedelta
+import database
+import alerts
+import query_planner
+import work_queue
+from tender_record import TenderRecord, TenderBatch
+
+logger = logging.getLogger(__name__)
+
+# Kinds of work items: a planned search request, one date shard of its result
+# list, and one tender detail page
+TERM = 'term'
+PAGE = 'page'
+DETAIL = 'detail'
+
+# Detail pages first so that started terms are finished before new ones are opened
+PRIORITIES = {TERM: 0, PAGE: 1, DETAIL: 2}
+
+def enqueue_terms(queue, search_terms, days=7, list_only=False, merge_subsumed=False, shard_days=None):
+    """
+    Plan the search terms and add one TERM item per search request
+
+    Returns:
+        int: Number of added items
+    """
+    from evergabe_scrape import SHARD_DAYS
+
+    plan = query_planner.plan_queries(search_terms, merge_subsumed=merge_subsumed)
+    added = 0
+    for planned in plan:
+        payload = {'planned': planned._asdict(), 'days': days, 'list_only': list_only,
+                   'shard_days': shard_days or SHARD_DAYS, 'date_to': date.today().isoformat()}
+        added += queue.put(TERM, f"{planned.query}|{days}|{payload['date_to']}", payload, PRIORITIES[TERM])
+    logger.info(f"Queued {added} of {len(plan)} search requests")
+    return added
+
+def handle_term(queue, item):
+    """
+    Split the look-back window of a search request into PAGE items, one per date shard
+    """
+    from evergabe_scrape import split_date_window
+
+    payload = item.payload
+    date_to = date.fromisoformat(payload['date_to'])
+    date_from = date_to - timedelta(days=payload['days'])
+    if payload['days'] <= payload['shard_days']:
+        shards = [(date_from, date_to)]
+    else:
+        shards = split_date_window(date_from, date_to, payload['shard_days'])
+
+    query = payload['planned']['query']
+    for start, end in shards:
+        queue.put(PAGE, f"{query}|{start}|{end}",
+                  {'planned': payload['planned'], 'list_only': payload['list_only'],
+                   'date_from': start.isoformat(), 'date_to': end.isoformat()},
+                  PRIORITIES[PAGE])
+
+async def handle_page(queue, item, crawler, list_config):
+    """
+    Fetch the result list of one date shard and add a DETAIL item per tender
+
+    A tender found by several search requests gets one DETAIL item whose terms are merged.
+    """
+    from evergabe_scrape import fetch_list_shard, extract_tender_from_list_item
+    from query_planner import terms_for_hit
+
+    payload = item.payload
+    planned = query_planner.PlannedQuery(**payload['planned'])
+    tenders = await fetch_list_shard(crawler, planned.query, date.fromisoformat(payload['date_from']),
+                                     date.fromisoformat(payload['date_to']), list_config, [], planned)
+    for tender in tenders:
+        record = extract_tender_from_list_item(tender, planned.query)
+        if record is None:
+            continue
+        queue.put(DETAIL, record.link,
+                  {'record': record.as_row(), 'terms': terms_for_hit(record, planned),
+                   'list_only': payload['list_only']},
+                  PRIORITIES[DETAIL], merge_field='terms')
+
+async def handle_detail(queue, item, crawler, detail_config):
+    """
+    Fetch a tender detail page and store one hit per search term in the result store
+    """
+    from evergabe_scrape import fetch_tender_details
+
+    payload = item.payload
+    record = TenderRecord(**payload['record'])
+    if payload['list_only']:
+        record.detail_status = 'pending'
+    else:
+        await fetch_tender_details(record, crawler, detail_config, record.suchbegriff)
+
+    rows = TenderBatch()
+    for term in payload['terms']:
+        rows.append(record, suchbegriff=term)
+    database.insert_tenders(rows)
+    return not payload['list_only']
+
+async def _keep_leased(queue, item, lease_seconds):
+    while True:
+        await asyncio.sleep(lease_seconds / 3)
+        if not queue.heartbeat(item, lease_seconds):
+            logger.warning(f"Lost the lease on {item.kind} {item.key}")
+            return
+
+async def run_worker(queue_url=None, worker_id=None, idle_exit=60, lean=True,
+                     lease_seconds=work_queue.DEFAULT_LEASE_SECONDS):
+    """
+    Lease and process items until the queue stayed empty for idle_exit seconds
+
+    Returns:
+        dict: Number of completed items per kind
+    """
+    from browser_pool import BrowserPool
+    from crawl_profiles import LIST_WAIT_FOR, DETAIL_WAIT_FOR, lean_run_config, full_run_config
+
+    queue = work_queue.open_queue(queue_url)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    database.initialize_database()
+
+    if lean:
+        list_config = lean_run_config(wait_for=LIST_WAIT_FOR)
+        detail_config = lean_run_config(wait_for=DETAIL_WAIT_FOR)
+    else:
+        list_config = detail_config = full_run_config()
+
+    completed = {TERM: 0, PAGE: 0, DETAIL: 0}
+    idle_since = datetime.now()
+    async with BrowserPool(size=1, lean=lean) as pool:
+        while True:
+            item = queue.lease(worker_id, lease_seconds=lease_seconds)
+            if item is None:
+                if (datetime.now() - idle_since).total_seconds() > idle_exit:
+                    break
+                await asyncio.sleep(2)
+                continue
+
+            keeper = asyncio.create_task(_keep_leased(queue, item, lease_seconds))
+            fetched = False
+            try:
+                if item.kind == TERM:
+                    handle_term(queue, item)
+                elif item.kind == PAGE:
+                    await handle_page(queue, item, pool, list_config)
+                    fetched = True
+                else:
+                    fetched = await handle_detail(queue, item, pool, detail_config)
+                if queue.complete(item):
+                    completed[item.kind] += 1
+            except Exception as e:
+                logger.warning(f"{worker_id}: {item.kind} {item.key} failed: {e}")
+                queue.fail(item, e)
+            finally:
+                keeper.cancel()
+            idle_since = datetime.now()
+
+            # Kurze Pause, um den Server nicht zu überlasten (nur nach echten Anfragen)
+            if fetched:
+                await asyncio.sleep(random.uniform(1.0, 2.0))
+
+    queue.close()
+    alerts.process_new_tenders()
+    logger.info(f"{worker_id} finished: {completed}")
+    return completed
+
+def start_local_workers(count, queue_url=None, idle_exit=60):
+    """
+    Start count worker processes on this host and wait for them to drain the queue
+
+    Returns:
+        list: Exit codes of the workers
+    """
+    # --queue is an option of the main parser, so it goes before the subcommand
+    command = [sys.executable, os.path.abspath(__file__)]
+    if queue_url:
+        command += ['--queue', queue_url]
+    command += ['work', '--idle-exit', str(idle_exit)]
+    processes = [subprocess.Popen(command) for _ in range(count)]
+    return [process.wait() for process in processes]
+
+def print_status(queue):
+    counts = queue.counts()
+    kinds = sorted({kind for kind, _ in counts}, key=lambda kind: PRIORITIES.get(kind, 9))
+    statuses = (work_queue.PENDING, work_queue.LEASED, work_queue.DONE, work_queue.FAILED)
+    print(f"{'kind':<8}" + ''.join(f"{status:>9}" for status in statuses))
+    for kind in kinds:
+        print(f"{kind:<8}" + ''.join(f"{counts.get((kind, status), 0):>9}" for status in statuses))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distribute scrapes over several worker processes or hosts")
+    parser.add_argument("--queue", default=None,
+                        help="Work queue URL, e.g. sqlite:////mnt/shared/work_queue.db (default: work_queue.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Queue search terms")
+    enqueue.add_argument("--term", action="append", default=[], help="Search term (repeatable)")
+    enqueue.add_argument("--terms-file", help="Markdown or text file with one search term per line")
+    enqueue.add_argument("--days", type=int, default=7, help="Number of days to look back")
+    enqueue.add_argument("--list-only", action="store_true", help="Only read the result lists")
+    enqueue.add_argument("--merge", action="store_true",
+                         help="Serve overlapping terms from the results of shorter ones (may lose hits)")
+
+    work = commands.add_parser("work", help="Process queued items")
+    work.add_argument("--processes", type=int, default=1, help="Number of local worker processes")
+    work.add_argument("--idle-exit", type=int, default=60,
+                      help="Exit after this many seconds without available items")
+
+    commands.add_parser("status", help="Show the number of items per kind and status")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        terms = list(args.term)
+        if args.terms_file:
+            with open(args.terms_file, encoding='utf-8') as f:
+                terms += query_planner.parse_search_terms(f.read())
+        enqueue_terms(work_queue.open_queue(args.queue), terms, days=args.days, list_only=args.list_only,
+                      merge_subsumed=args.merge)
+    elif args.command == "work":
+        if args.processes > 1:
+            start_local_workers(args.processes, args.queue, args.idle_exit)
+        else:
+            asyncio.run(run_worker(args.queue, idle_exit=args.idle_exit))
+    else:
+        print_status(work_queue.open_queue(args.queue))
@@ -0,0 +1,471 @@
+import os
+import re
+import json
+import asyncio
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+from collections import defaultdict
+from urllib.parse import urljoin, urlsplit, unquote
+from database import get_connection
+import page_archive
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows; downloads of the same URL are not serialized there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# DOCUMENT_STORE points several scraper workers at one shared document store
+STORE_DIR = os.environ.get('DOCUMENT_STORE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'documents')
+
+# Downloads running at the same time, in total and per host
+CONCURRENCY = 8
+PER_HOST = 2
+
+# A failed download is retried by later runs until it has failed this often
+MAX_ATTEMPTS = 3
+
+# Bytes read per chunk and (connect, read) timeouts in seconds
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (10, 60)
+
+# Links to files with these extensions are tender documents ...
+DOCUMENT_EXTENSIONS = {'.pdf', '.zip', '.7z', '.doc', '.docx', '.xls', '.xlsx', '.odt', '.ods', '.rtf',
+                       '.txt', '.xml', '.gaeb', '.x83', '.d83', '.p83', '.dwg', '.dxf'}
+# ... and so are links whose URL contains one of these words
+DOCUMENT_URL_WORDS = ('download', 'dokument', 'document', 'unterlagen', 'attachment')
+
+# Download states in tender_documents
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+_FILENAME_RE = re.compile(r'''filename\*\s*=\s*[\w-]+'[^']*'([^;]+)|filename\s*=\s*"?([^";]+)"?''', re.IGNORECASE)
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _expected_length(response):
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+def _range_start(response):
+    match = re.match(r'bytes (\d+)-', response.headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+class DocumentStore:
+    """
+    Content-addressed file store for downloaded tender documents
+
+    A finished download is kept as objects/<ab>/<sha256>, so a file linked by
+    many tenders, or published again under another URL, is stored once.
+    Downloads in progress live in partial/, named after the URL, with a JSON
+    sidecar holding the validator (ETag or Last-Modified) of the response; an
+    interrupted download is continued with a Range request guarded by
+    If-Range, so it starts over if the file changed in the meantime. One
+    download of a URL runs at a time per store: fetch() holds an exclusive
+    lock on the URL's lock file in partial/, which is kept for later fetches.
+    """
+    def __init__(self, path=None):
+        self.path = path or STORE_DIR
+        os.makedirs(os.path.join(self.path, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.path, 'partial'), exist_ok=True)
+
+    def object_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], digest)
+
+    def _partial_path(self, url):
+        return os.path.join(self.path, 'partial', hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def fetch(self, url):
+        """
+        Download url into the store, resuming a partial download of it
+
+        Blocking; download_documents() runs it in worker threads. A fetch of
+        a URL that another thread or process of the same store is downloading
+        waits until that download has ended. A transfer that breaks off raises
+        and leaves the partial file for the next attempt.
+
+        Returns:
+            dict: digest, size, content_type, filename (from Content-Disposition),
+                  resumed (bytes reused from an earlier attempt) and stored
+                  (False if the content was already in the store)
+        """
+        partial = self._partial_path(url)
+        with open(partial + '.lock', 'a') as lock:
+            # Released when the lock file is closed, also if the process dies
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._fetch(url, partial)
+
+    def _fetch(self, url, partial):
+        import requests
+
+        part_file, sidecar = partial + '.part', partial + '.json'
+        offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+        state = {}
+        if offset and os.path.exists(sidecar):
+            with open(sidecar, encoding='utf-8') as f:
+                state = json.load(f)
+
+        headers = {}
+        if offset and state.get('validator'):
+            headers = {'Range': f'bytes={offset}-', 'If-Range': state['validator']}
+
+        with requests.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 416 and offset:
+                # Nothing left to fetch if the partial file already has the full size
+                if response.headers.get('Content-Range', '').rpartition('/')[2] == str(offset):
+                    return self._finish(url, part_file, sidecar, state, offset, resumed=offset)
+                os.remove(part_file)
+            response.raise_for_status()
+
+            resumed = offset if response.status_code == 206 and _range_start(response) == offset else 0
+            validator = response.headers.get('ETag')
+            if not validator or validator.startswith('W/'):
+                # Weak ETags cannot be used with If-Range
+                validator = response.headers.get('Last-Modified')
+            disposition = _FILENAME_RE.search(response.headers.get('Content-Disposition', ''))
+            state = {'url': url, 'validator': validator,
+                     'content_type': response.headers.get('Content-Type', '').split(';')[0] or None,
+                     'filename': unquote(disposition.group(1) or disposition.group(2)).strip() if disposition else None}
+            with open(sidecar, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+
+            expected = _expected_length(response)
+            received = 0
+            with open(part_file, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    received += len(chunk)
+            if expected is not None and received < expected:
+                raise IOError(f"Incomplete download: {received} of {expected} bytes")
+
+        return self._finish(url, part_file, sidecar, state, resumed + received, resumed)
+
+    def _finish(self, url, part_file, sidecar, state, size, resumed):
+        sha = hashlib.sha256()
+        with open(part_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        target = self.object_path(digest)
+        stored = not os.path.exists(target)
+        if stored:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(part_file, target)
+        else:
+            os.remove(part_file)
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        logger.debug(f"Downloaded {url} ({size} bytes, {'new' if stored else 'duplicate'} {digest[:12]})")
+        return {'digest': digest, 'size': size, 'content_type': state.get('content_type'),
+                'filename': state.get('filename'), 'resumed': resumed, 'stored': stored}
+
+# One store per path and process
+_stores = {}
+
+def get_store(path=None):
+    path = path or STORE_DIR
+    if path not in _stores:
+        _stores[path] = DocumentStore(path)
+    return _stores[path]
+
+def extract_document_links(html_content, base_url=None):
+    """
+    Links to tender documents on a detail page
+
+    Returns:
+        list: (absolute URL, link text or file name) pairs in page order
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content or '', 'html.parser')
+
+    links = {}
+    for anchor in soup.find_all('a', href=True):
+        url = urljoin(base_url or '', anchor['href'].strip()).split('#')[0]
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or url == base_url:
+            continue
+        path = unquote(parts.path)
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in DOCUMENT_EXTENSIONS and not any(word in url.lower() for word in DOCUMENT_URL_WORDS):
+            continue
+        links.setdefault(url, anchor.get_text(' ', strip=True) or os.path.basename(path) or None)
+    return list(links.items())
+
+def queue_documents(rescan=False, archive=None):
+    """
+    Record the document links of detail pages archived since the last call
+
+    The latest archived version of each detail page is parsed for document
+    links; each (tender, URL) pair is recorded once as pending. The highest
+    processed archive fetch_id is kept in document_state, like the alert scan.
+
+    Args:
+        rescan (bool): Parse all archived detail pages again
+        archive (page_archive.PageArchive, optional): Archive to read, default the shared one
+
+    Returns:
+        int: Number of newly recorded document links
+    """
+    archive = archive or page_archive.get_archive()
+    conn = get_connection()
+
+    try:
+        row = conn.execute("SELECT value FROM document_state WHERE name = 'last_fetch_id'").fetchone()
+        last_id = 0 if rescan or row is None else row[0]
+        fetches = archive.fetches(page_archive.DETAIL, latest_only=True, after_id=last_id)
+        if not fetches:
+            return 0
+
+        document_rows = []
+        for fetch in fetches:
+            tender = conn.execute("SELECT tender_key FROM tenders WHERE link = ?", (fetch['url'],)).fetchone()
+            if tender is None:
+                continue
+            for url, name in extract_document_links(archive.read(fetch['digest']), fetch['url']):
+                document_rows.append((tender[0], url, name, _now()))
+
+        changes_before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO tender_documents (tender_key, url, name, updated_at) "
+                         "VALUES (?, ?, ?, ?)", document_rows)
+        queued = conn.total_changes - changes_before
+        conn.execute("INSERT OR REPLACE INTO document_state (name, value) VALUES ('last_fetch_id', ?)",
+                     (max(fetch['fetch_id'] for fetch in fetches),))
+        conn.commit()
+        logger.info(f"Found {queued} new document links on {len(fetches)} detail pages")
+        return queued
+    finally:
+        conn.close()
+
+def _record_download(conn, url, result, error):
+    if result is not None:
+        conn.execute("INSERT OR IGNORE INTO documents (digest, size, content_type, stored_at) VALUES (?, ?, ?, ?)",
+                     (result['digest'], result['size'], result['content_type'], _now()))
+        conn.execute("UPDATE tender_documents SET status = ?, digest = ?, error = NULL, attempts = attempts + 1, "
+                     "name = COALESCE(name, ?), updated_at = ? WHERE url = ? AND status != ?",
+                     (DONE, result['digest'], result['filename'], _now(), url, DONE))
+    else:
+        conn.execute("UPDATE tender_documents SET status = ?, error = ?, attempts = attempts + 1, updated_at = ? "
+                     "WHERE url = ? AND status != ?", (FAILED, error, _now(), url, DONE))
+    conn.commit()
+
+async def download_documents(limit=None, concurrency=CONCURRENCY, per_host=PER_HOST, store=None):
+    """
+    Download pending tender documents concurrently into the document store
+
+    Every URL is fetched once, however many tenders link it; links to a URL
+    that was already downloaded for another tender are resolved without a
+    request. Downloads run in threads, at most concurrency at a time and
+    per_host per host, and each result is written to tender_documents as it
+    arrives, so a cancelled run keeps everything finished so far.
+
+    Args:
+        limit (int, optional): Maximum number of URLs to download
+        concurrency (int): Downloads at the same time
+        per_host (int): Downloads at the same time from one host
+        store (DocumentStore, optional): Target store, default the shared one
+
+    Returns:
+        dict: Counts of downloaded, duplicate (content already stored), resumed and failed
+              URLs, and of links reused from another tender's download
+    """
+    store = store or get_store()
+    conn = get_connection()
+    counts = {'downloaded': 0, 'duplicate': 0, 'resumed': 0, 'failed': 0, 'reused': 0}
+
+    try:
+        cursor = conn.execute('''
+        UPDATE tender_documents SET status = 'done', error = NULL, updated_at = ?,
+            digest = (SELECT d.digest FROM tender_documents d WHERE d.url = tender_documents.url AND d.status = 'done')
+        WHERE status != 'done' AND url IN (SELECT url FROM tender_documents WHERE status = 'done')
+        ''', (_now(),))
+        counts['reused'] = cursor.rowcount
+        conn.commit()
+        urls = [row[0] for row in conn.execute(
+            "SELECT url FROM tender_documents WHERE status != 'done' AND attempts < ? "
+            "GROUP BY url ORDER BY MIN(updated_at), url LIMIT ?", (MAX_ATTEMPTS, limit or -1))]
+        if not urls:
+            return counts
+        logger.info(f"Downloading {len(urls)} documents")
+
+        loop = asyncio.get_running_loop()
+        total_slots = asyncio.Semaphore(concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+        async def download(url):
+            # Wait for a slot of the host first, so that queued downloads of a
+            # busy host do not hold slots other hosts could use
+            async with host_slots[urlsplit(url).netloc], total_slots:
+                try:
+                    return url, await loop.run_in_executor(None, store.fetch, url), None
+                except Exception as e:
+                    return url, None, str(e)
+
+        for finished in asyncio.as_completed([download(url) for url in urls]):
+            url, result, error = await finished
+            _record_download(conn, url, result, error)
+            if error:
+                logger.warning(f"Download failed: {url}: {error}")
+                counts['failed'] += 1
+                continue
+            counts['downloaded' if result['stored'] else 'duplicate'] += 1
+            counts['resumed'] += bool(result['resumed'])
+        logger.info(f"Documents: {counts['downloaded']} downloaded, {counts['duplicate']} duplicates, "
+                    f"{counts['resumed']} resumed, {counts['failed']} failed")
+        return counts
+    finally:
+        conn.close()
+
+async def download_new_documents():
+    """
+    Queue the document links of new detail pages and download them; errors are logged, not raised
+
+    Called after scrapes that asked for documents, so that downloads never fail a run.
+    """
+    try:
+        queue_documents()
+        return await download_documents()
+    except Exception as e:
+        logger.error(f"Document download failed: {e}")
+
+def get_documents(tender_key=None):
+    """
+    Document links with their download state and stored file path
+
+    Returns:
+        list: dicts with tender_key, url, name, status, digest, size, content_type, error and path
+    """
+    query = '''
+    SELECT td.tender_key, td.url, td.name, td.status, td.digest, d.size, d.content_type, td.error
+    FROM tender_documents td LEFT JOIN documents d ON d.digest = td.digest
+    '''
+    params = []
+    if tender_key:
+        query += " WHERE td.tender_key = ?"
+        params.append(tender_key)
+    query += " ORDER BY td.tender_key, td.url"
+
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        documents = [dict(row) for row in conn.execute(query, params)]
+    finally:
+        conn.close()
+    store = get_store()
+    for document in documents:
+        document['path'] = store.object_path(document['digest']) if document['digest'] else None
+    return documents
+
+def file_server(directory, port=8000, delay=0.0, drop_after=None, quiet=False):
+    """
+    HTTP server for a directory with Range and If-Range support, to test downloads locally
+
+    python -m http.server ignores Range headers, so resuming cannot be tried
+    against it. delay adds seconds of latency to every response; with
+    drop_after, the first response for each file breaks off after that many
+    bytes, as an unreliable server would. quiet turns off the request log.
+    """
+    import time
+    import functools
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+    dropped = set()
+
+    class RangeRequestHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+        def do_GET(self):
+            path = self.translate_path(self.path)
+            if not os.path.isfile(path):
+                return super().do_GET()
+            time.sleep(delay)
+
+            size = os.path.getsize(path)
+            etag = f'"{os.stat(path).st_mtime_ns:x}-{size:x}"'
+            start = 0
+            match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+            if match and self.headers.get('If-Range', etag) == etag:
+                start = int(match.group(1))
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', self.guess_type(path))
+            self.send_header('Content-Length', str(size - start))
+            self.send_header('ETag', etag)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+
+            limit = None
+            if drop_after is not None and path not in dropped:
+                dropped.add(path)
+                limit = drop_after
+            with open(path, 'rb') as f:
+                f.seek(start)
+                sent = 0
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    if limit is not None and sent + len(chunk) > limit:
+                        self.wfile.write(chunk[:limit - sent])
+                        self.close_connection = True
+                        return
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+
+    return ThreadingHTTPServer(('', port), functools.partial(RangeRequestHandler, directory=directory))
+
+if __name__ == "__main__":
+    import argparse
+    import database
+    import documents
+
+    parser = argparse.ArgumentParser(description="Download the documents linked on tender detail pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    queue = commands.add_parser("queue", help="Record document links of newly archived detail pages")
+    queue.add_argument("--rescan", action="store_true", help="Parse all archived detail pages")
+
+    download = commands.add_parser("download", help="Download pending documents")
+    download.add_argument("--limit", type=int, default=None, help="Maximum number of documents")
+    download.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Downloads at the same time")
+    download.add_argument("--per-host", type=int, default=PER_HOST, help="Downloads at the same time per host")
+
+    list_parser = commands.add_parser("list", help="Show document links and their download state")
+    list_parser.add_argument("--tender", default=None, help="Only documents of this tender key")
+
+    serve_parser = commands.add_parser("serve", help="Serve a directory with Range support for local tests")
+    serve_parser.add_argument("directory")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--delay", type=float, default=0.0, help="Seconds of latency per response")
+    serve_parser.add_argument("--drop-after", type=int, default=None,
+                              help="Break off the first response for each file after this many bytes")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = documents.file_server(args.directory, args.port, args.delay, args.drop_after)
+        print(f"Serving {args.directory} on http://localhost:{args.port}/")
+        server.serve_forever()
+    else:
+        database.initialize_database()
+    if args.command == "queue":
+        documents.queue_documents(rescan=args.rescan)
+    elif args.command == "download":
+        print(asyncio.run(documents.download_documents(args.limit, args.concurrency, args.per_host)))
+    elif args.command == "list":
+        for document in documents.get_documents(args.tender):
+            print(f"{document['status']:8} {document['tender_key']}  {document['name'] or ''}  {document['url']}")
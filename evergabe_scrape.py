@@ -1,625 +1,835 @@
-import pandas as pd
 from datetime import datetime, timedelta
-import os
 import time
 import random
 import asyncio
-from bs4 import BeautifulSoup
-from crawl4ai import AsyncWebCrawler, CacheMode
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+import contextlib
+from collections import namedtuple, defaultdict
+from urllib.parse import quote_plus
+from date_parsing import normalize_date_text
+from change_detection import content_hash, changed_fields
+import database
+from tender_record import TenderRecord, TenderBatch, WEBSITE
+import run_journal
+import alerts
+import documents
+import run_budget
+import extraction_profile
+import page_archive
+from crawl_profiles import LIST_WAIT_FOR, DETAIL_WAIT_FOR, lean_run_config, full_run_config
+from browser_pool import BrowserPool
+from query_planner import terms_for_hit
 
-# Ensure debug directory exists
-os.makedirs('debug_pages', exist_ok=True)
+class PageNotLoaded(Exception):
+    """
+    Raised when a page did not load or its content never appeared within the page timeout
 
-# Save HTML content for debugging
-def save_debug_page(page_num, content):
-    with open(f'debug_pages/page_{page_num}.html', 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"Saved debug HTML to debug_pages/page_{page_num}.html")
+    Such a page is an error, not an empty result: its tenders are retried instead of
+    being recorded as not found.
+    """
 
-# Save individual tender page for debugging
-def save_debug_tender(tender_id, content):
-    with open(f'debug_pages/tender_{tender_id}.html', 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"Saved tender HTML to debug_pages/tender_{tender_id}.html")
+# Raise PageNotLoaded for an unsuccessful crawl4ai result
+def check_loaded(result, url):
+    if not getattr(result, 'success', True) or not result.html:
+        raise PageNotLoaded(f"{url}: {getattr(result, 'error_message', None) or 'keine Seite geladen'}")
+    return result
 
 # Extract data from HTML content using BeautifulSoup
 def extract_tender_data(html_content, tender_url=None, search_term=None):
-    data = {
-        'Website': 'https://www.evergabe.de',
-        'Suchbegriff': search_term if search_term else 'Nicht verfügbar',
-        'Ausschreibungstitel': 'Nicht verfügbar',
-        'Auftraggeber': 'Nicht verfügbar',
-        'Vergabestelle': 'Nicht verfügbar',
-        'Link zur Ausschreibung': tender_url if tender_url else 'Nicht verfügbar',
-        'Leistungsort': 'Nicht verfügbar',
-        'veröffentlicht seit': 'Nicht verfügbar',
-        'nächste Frist': 'Nicht verfügbar',
-        'Vergabe-ID': 'Nicht verfügbar'
-    }
-    
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract title
-        title_elem = soup.select_one('h1, .title, .headline, .tender-title')
-        if title_elem:
-            data['Ausschreibungstitel'] = title_elem.get_text(strip=True)
-        
-        # Extract client and awarding authority
-        authority_elements = soup.select('.authority, .client, .contracting-authority, .awarding-authority')
-        for elem in authority_elements:
-            text = elem.get_text(strip=True)
-            if 'auftraggeber' in text.lower() and data['Auftraggeber'] == 'Nicht verfügbar':
-                parts = text.split(':', 1)
-                if len(parts) > 1:
-                    data['Auftraggeber'] = parts[1].strip()
-            elif 'vergabestelle' in text.lower() and data['Vergabestelle'] == 'Nicht verfügbar':
-                parts = text.split(':', 1)
-                if len(parts) > 1:
-                    data['Vergabestelle'] = parts[1].strip()
-        
-        # Extract location
-        # First, try to find the specific "Ausführungsort:" field as shown in the screenshot
-        ausfuehrungsort_found = False
-        
-        # Look for the specific section with ID "award_procedure_places" which contains the location
-        award_places_section = soup.find(id="award_procedure_places")
-        if award_places_section:
-            # Look for the headline that says "Ausführungsort"
-            headlines = award_places_section.find_all("h2", class_="headline")
-            for headline in headlines:
-                if "Ausführungsort" in headline.get_text():
-                    # Location is often in a list item with an icon
-                    location_list = award_places_section.find("ul", class_="list-iconized")
-                    if location_list:
-                        location_items = location_list.find_all("li")
-                        for item in location_items:
-                            # Get the text excluding the icon
-                            location_text = item.get_text(strip=True)
-                            if location_text:
-                                data['Leistungsort'] = location_text
+    data = TenderRecord(website=WEBSITE, suchbegriff=search_term or None, link=tender_url or None)
+    with extraction_profile.strategy(extraction_profile.PAGE, data):
+        try:
+            with extraction_profile.strategy('BeautifulSoup parse', data):
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(html_content, 'html.parser')
+        
+            # Extract title
+            with extraction_profile.strategy('Titel: h1/.title', data, 'ausschreibungstitel'):
+                title_elem = soup.select_one('h1, .title, .headline, .tender-title')
+                if title_elem:
+                    data.ausschreibungstitel = title_elem.get_text(strip=True)
+        
+            # Extract client and awarding authority
+            with extraction_profile.strategy('Auftraggeber/Vergabestelle: authority classes', data, 'auftraggeber', 'vergabestelle'):
+                authority_elements = soup.select('.authority, .client, .contracting-authority, .awarding-authority')
+                for elem in authority_elements:
+                    text = elem.get_text(strip=True)
+                    if 'auftraggeber' in text.lower() and data.auftraggeber is None:
+                        parts = text.split(':', 1)
+                        if len(parts) > 1:
+                            data.auftraggeber = parts[1].strip()
+                    elif 'vergabestelle' in text.lower() and data.vergabestelle is None:
+                        parts = text.split(':', 1)
+                        if len(parts) > 1:
+                            data.vergabestelle = parts[1].strip()
+        
+            # Extract location
+            # First, try to find the specific "Ausführungsort:" field as shown in the screenshot
+            with extraction_profile.strategy('Leistungsort: #award_procedure_places', data, 'leistungsort'):
+                ausfuehrungsort_found = False
+        
+                # Look for the specific section with ID "award_procedure_places" which contains the location
+                award_places_section = soup.find(id="award_procedure_places")
+                if award_places_section:
+                    # Look for the headline that says "Ausführungsort"
+                    headlines = award_places_section.find_all("h2", class_="headline")
+                    for headline in headlines:
+                        if "Ausführungsort" in headline.get_text():
+                            # Location is often in a list item with an icon
+                            location_list = award_places_section.find("ul", class_="list-iconized")
+                            if location_list:
+                                location_items = location_list.find_all("li")
+                                for item in location_items:
+                                    # Get the text excluding the icon
+                                    location_text = item.get_text(strip=True)
+                                    if location_text:
+                                        data.leistungsort = location_text
+                                        ausfuehrungsort_found = True
+                                        break
+        
+            # If not found in the dedicated section, try other methods
+            if not ausfuehrungsort_found:
+                with extraction_profile.strategy("Leistungsort: 'Ausführungsort:' label", data, 'leistungsort'):
+                    # Look for elements with the exact label "Ausführungsort:" 
+                    ausfuehrungsort_labels = soup.find_all(string=lambda text: text and "Ausführungsort:" in text)
+                    for label in ausfuehrungsort_labels:
+                        # The location is often in the next sibling or parent's next sibling
+                        parent = label.parent
+                        if parent:
+                            # Try to find the location text which is often in a nearby element
+                            next_element = parent.next_sibling
+                            if next_element and next_element.string and next_element.string.strip():
+                                data.leistungsort = next_element.string.strip()
+                                ausfuehrungsort_found = True
+                                break
+                            # If not in next sibling, try parent's next sibling
+                            parent_next = parent.parent.next_sibling if parent.parent else None
+                            if parent_next and parent_next.string and parent_next.string.strip():
+                                data.leistungsort = parent_next.string.strip()
                                 ausfuehrungsort_found = True
                                 break
         
-        # If not found in the dedicated section, try other methods
-        if not ausfuehrungsort_found:
-            # Look for elements with the exact label "Ausführungsort:" 
-            ausfuehrungsort_labels = soup.find_all(string=lambda text: text and "Ausführungsort:" in text)
-            for label in ausfuehrungsort_labels:
-                # The location is often in the next sibling or parent's next sibling
-                parent = label.parent
-                if parent:
-                    # Try to find the location text which is often in a nearby element
-                    next_element = parent.next_sibling
-                    if next_element and next_element.string and next_element.string.strip():
-                        data['Leistungsort'] = next_element.string.strip()
-                        ausfuehrungsort_found = True
-                        break
-                    # If not in next sibling, try parent's next sibling
-                    parent_next = parent.parent.next_sibling if parent.parent else None
-                    if parent_next and parent_next.string and parent_next.string.strip():
-                        data['Leistungsort'] = parent_next.string.strip()
-                        ausfuehrungsort_found = True
-                        break
-        
-        # If not found with direct label, try to find it in a table or definition list
-        if not ausfuehrungsort_found:
-            # Look for dt/dd pairs or table rows
-            dt_elements = soup.select('dt, th')
-            for dt in dt_elements:
-                if "Ausführungsort:" in dt.get_text() or "Ausführungsort" in dt.get_text():
-                    # Find the corresponding dd or td
-                    dd = dt.find_next('dd') if dt.name == 'dt' else dt.find_next('td')
-                    if dd and dd.get_text(strip=True):
-                        data['Leistungsort'] = dd.get_text(strip=True)
-                        ausfuehrungsort_found = True
-                        break
+            # If not found with direct label, try to find it in a table or definition list
+            if not ausfuehrungsort_found:
+                with extraction_profile.strategy('Leistungsort: dt/th label', data, 'leistungsort'):
+                    # Look for dt/dd pairs or table rows
+                    dt_elements = soup.select('dt, th')
+                    for dt in dt_elements:
+                        if "Ausführungsort:" in dt.get_text() or "Ausführungsort" in dt.get_text():
+                            # Find the corresponding dd or td
+                            dd = dt.find_next('dd') if dt.name == 'dt' else dt.find_next('td')
+                            if dd and dd.get_text(strip=True):
+                                data.leistungsort = dd.get_text(strip=True)
+                                ausfuehrungsort_found = True
+                                break
         
-        # Try another approach - look for elements with class containing location information
-        if not ausfuehrungsort_found:
-            location_elements = soup.select('.ausfuehrungsort, .ausführungsort, .ort, .location')
-            for elem in location_elements:
-                if elem.get_text(strip=True):
-                    data['Leistungsort'] = elem.get_text(strip=True)
-                    ausfuehrungsort_found = True
-                    break
+            # Try another approach - look for elements with class containing location information
+            if not ausfuehrungsort_found:
+                with extraction_profile.strategy('Leistungsort: location classes', data, 'leistungsort'):
+                    location_elements = soup.select('.ausfuehrungsort, .ausführungsort, .ort, .location')
+                    for elem in location_elements:
+                        if elem.get_text(strip=True):
+                            data.leistungsort = elem.get_text(strip=True)
+                            ausfuehrungsort_found = True
+                            break
         
-        # Fallback to the original method if still not found
-        if not ausfuehrungsort_found:
-            location_elements = soup.select('.location, .place-of-performance, span[title*="ort"]')
-            for elem in location_elements:
-                text = elem.get_text(strip=True)
-                if text and ('leistungsort' in text.lower() or 'ausführungsort' in text.lower()) and data['Leistungsort'] == 'Nicht verfügbar':
-                    parts = text.split(':', 1)
-                    if len(parts) > 1:
-                        location_part = parts[1].strip()
-                        # Clean up location if it contains a zip code
-                        if ' ' in location_part and any(c.isdigit() for c in location_part):
-                            # Try to extract just the city name
-                            location = ' '.join(location_part.split()[1:]) if location_part.split()[0].isdigit() else location_part
-                        else:
-                            location = location_part.strip()
-                        data['Leistungsort'] = location
-                        break
+            # Fallback to the original method if still not found
+            if not ausfuehrungsort_found:
+                with extraction_profile.strategy('Leistungsort: .location with label', data, 'leistungsort'):
+                    location_elements = soup.select('.location, .place-of-performance, span[title*="ort"]')
+                    for elem in location_elements:
+                        text = elem.get_text(strip=True)
+                        if text and ('leistungsort' in text.lower() or 'ausführungsort' in text.lower()) and data.leistungsort is None:
+                            parts = text.split(':', 1)
+                            if len(parts) > 1:
+                                location_part = parts[1].strip()
+                                # Clean up location if it contains a zip code
+                                if ' ' in location_part and any(c.isdigit() for c in location_part):
+                                    # Try to extract just the city name
+                                    location = ' '.join(location_part.split()[1:]) if location_part.split()[0].isdigit() else location_part
+                                else:
+                                    location = location_part.strip()
+                                data.leistungsort = location
+                                break
         
-        # If Leistungsort is still not found, try looking for specific elements with Ausführungsort
-        if data['Leistungsort'] == 'Nicht verfügbar':
-            # Look for elements containing Ausführungsort
-            ausfuehrungsort_elements = soup.find_all(lambda tag: tag.name and 'ausführungsort' in tag.get_text().lower())
-            for elem in ausfuehrungsort_elements:
-                text = elem.get_text(strip=True)
-                parts = text.split(':', 1)
-                if len(parts) > 1:
-                    location_part = parts[1].strip()
-                    # Clean up location if it contains a zip code
-                    if ' ' in location_part and any(c.isdigit() for c in location_part):
-                        # Try to extract just the city name
-                        location = ' '.join(location_part.split()[1:]) if location_part.split()[0].isdigit() else location_part
-                    else:
-                        location = location_part.strip()
-                    data['Leistungsort'] = location
-                    break
+            # If Leistungsort is still not found, try looking for specific elements with Ausführungsort
+            if data.leistungsort is None:
+                with extraction_profile.strategy('Leistungsort: any element with Ausführungsort', data, 'leistungsort'):
+                    # Look for elements containing Ausführungsort
+                    ausfuehrungsort_elements = soup.find_all(lambda tag: tag.name and 'ausführungsort' in tag.get_text().lower())
+                    for elem in ausfuehrungsort_elements:
+                        text = elem.get_text(strip=True)
+                        parts = text.split(':', 1)
+                        if len(parts) > 1:
+                            location_part = parts[1].strip()
+                            # Clean up location if it contains a zip code
+                            if ' ' in location_part and any(c.isdigit() for c in location_part):
+                                # Try to extract just the city name
+                                location = ' '.join(location_part.split()[1:]) if location_part.split()[0].isdigit() else location_part
+                            else:
+                                location = location_part.strip()
+                            data.leistungsort = location
+                            break
         
-        # Extract tender ID (Vergabe-ID)
-        vergabe_id_found = False
+            # Extract tender ID (Vergabe-ID)
+            with extraction_profile.strategy('Vergabe-ID: h2 heading', data, 'vergabe_id'):
+                vergabe_id_found = False
         
-        # Look for the specific heading pattern: "Vergabe-ID <span class="small">(bei evergabe.de)</span>"
-        vergabe_id_headings = soup.select('h2.headline:contains("Vergabe-ID")')
-        if not vergabe_id_headings:
-            # Try with a more general selector
-            vergabe_id_headings = soup.find_all(lambda tag: tag.name == 'h2' and 'Vergabe-ID' in tag.get_text())
+                # Look for the specific heading pattern: "Vergabe-ID <span class="small">(bei evergabe.de)</span>"
+                vergabe_id_headings = soup.select('h2.headline:contains("Vergabe-ID")')
+                if not vergabe_id_headings:
+                    # Try with a more general selector
+                    vergabe_id_headings = soup.find_all(lambda tag: tag.name == 'h2' and 'Vergabe-ID' in tag.get_text())
             
-        for heading in vergabe_id_headings:
-            # The ID is often in the text right after the heading
-            next_text = heading.next_sibling
-            if next_text and next_text.strip().isdigit():
-                data['Vergabe-ID'] = next_text.strip()
-                vergabe_id_found = True
-                break
-            # Sometimes the ID is within the same element
-            heading_text = heading.get_text(strip=True)
-            import re
-            id_match = re.search(r'Vergabe-ID.*?([0-9]+)', heading_text)
-            if id_match:
-                data['Vergabe-ID'] = id_match.group(1)
-                vergabe_id_found = True
-                break
-        
-        # If not found with the heading approach, try the parent div that contains the heading
-        if not vergabe_id_found:
-            file_number_divs = soup.select('#file_number_contracting_authority')
-            for div in file_number_divs:
-                # Look for text content after the heading
-                for element in div.find_all(text=True, recursive=True):
-                    if element.strip().isdigit():
-                        data['Vergabe-ID'] = element.strip()
+                for heading in vergabe_id_headings:
+                    # The ID is often in the text right after the heading
+                    next_text = heading.next_sibling
+                    if next_text and next_text.strip().isdigit():
+                        data.vergabe_id = next_text.strip()
                         vergabe_id_found = True
                         break
-                if vergabe_id_found:
-                    break
-        
-        # If still not found, use the previous approach as fallback
-        if not vergabe_id_found:
-            tender_id_elements = soup.select('.vergabe-id, .tender-id, .reference-number, .reference, .id')
-            for elem in tender_id_elements:
-                elem_text = elem.get_text(strip=True)
-                if any(term in elem_text.lower() for term in ['vergabe-id', 'vergabeid', 'tender-id', 'id:', 'reference', 'referenznummer']):
-                    # Extract the ID
-                    id_parts = elem_text.split(':', 1)
-                    if len(id_parts) > 1:
-                        # Extract just the numeric part
-                        import re
-                        id_match = re.search(r'\d+', id_parts[1])
-                        if id_match:
-                            data['Vergabe-ID'] = id_match.group(0)
-                            vergabe_id_found = True
-                        else:
-                            data['Vergabe-ID'] = id_parts[1].strip()
-                            vergabe_id_found = True
-                    else:
-                        # If no colon, check if there's a number pattern
-                        import re
-                        id_match = re.search(r'\d+', elem_text)
-                        if id_match:
-                            data['Vergabe-ID'] = id_match.group(0)
-                            vergabe_id_found = True
-        
-        # If Vergabe-ID is still not found, try to extract from URL
-        if not vergabe_id_found and tender_url:
-            # Try to extract ID from the URL
-            import re
-            id_match = re.search(r'/(\d+)(?:\?|$)', tender_url)
-            if id_match:
-                data['Vergabe-ID'] = id_match.group(1)
-                vergabe_id_found = True
-        
-        # Extract Angebotsfrist (due date) - specific to the format shown in the image
-        # Look for the Angebotsfrist element which typically contains date and time
-        angebotsfrist_elements = soup.select('.angebotsfrist, div:contains("Angebotsfrist"), span:contains("Angebotsfrist")')
-        if not angebotsfrist_elements:
-            # Try with more specific CSS selectors based on the image
-            angebotsfrist_elements = soup.select('.tag-container, .frist-container, .deadline-container')
-        
-        for elem in angebotsfrist_elements:
-            elem_text = elem.get_text(strip=True)
-            if 'angebotsfrist' in elem_text.lower() or 'frist' in elem_text.lower():
-                # Extract the date and time
-                # The format might be like "15.04.2025 09:00 Uhr"
-                date_parts = elem_text.split(':', 1)
-                if len(date_parts) > 1:
-                    # Clean the date string to only include date and time
-                    date_str = date_parts[1].strip()
-                    # Extract date and time using regex
-                    import re
-                    date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', date_str)
-                    if date_match:
-                        date, time = date_match.groups()
-                        data['nächste Frist'] = f"{date} {time}"
-                    else:
-                        # If regex fails, check if there's a date pattern without time
-                        date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', date_str)
-                        if date_only_match:
-                            data['nächste Frist'] = date_only_match.group(1)
-                        else:
-                            # If no date pattern found, use "-"
-                            data['nächste Frist'] = '-'
-                else:
-                    # If no colon separator, try to extract date directly using regex
+                    # Sometimes the ID is within the same element
+                    heading_text = heading.get_text(strip=True)
                     import re
-                    date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', elem_text)
-                    if date_match:
-                        date, time = date_match.groups()
-                        data['nächste Frist'] = f"{date} {time}"
-                    else:
-                        # Check if there's a date pattern without time
-                        date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', elem_text)
-                        if date_only_match:
-                            data['nächste Frist'] = date_only_match.group(1)
-                        else:
-                            # If no date pattern found, use "-"
-                            data['nächste Frist'] = '-'
-                break
-        
-        # If still not found, try looking for time elements with specific attributes
-        if data['nächste Frist'] == 'Nicht verfügbar':
-            time_elements = soup.select('time')
-            for time_elem in time_elements:
-                if time_elem.get('title') and ('frist' in time_elem.get('title').lower() or 'angebot' in time_elem.get('title').lower()):
-                    time_text = time_elem.get_text(strip=True) or time_elem.get('datetime')
-                    # Clean the time text
-                    time_text = time_text.replace('Uhr', '').strip()
-                    # Extract date and time using regex
-                    import re
-                    date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', time_text)
-                    if date_match:
-                        date, time = date_match.groups()
-                        data['nächste Frist'] = f"{date} {time}"
-                    else:
-                        # Check if there's a date pattern without time
-                        date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', time_text)
-                        if date_only_match:
-                            data['nächste Frist'] = date_only_match.group(1)
-                        else:
-                            # If no date pattern found, use "-"
-                            data['nächste Frist'] = '-'
-                    break
+                    id_match = re.search(r'Vergabe-ID.*?([0-9]+)', heading_text)
+                    if id_match:
+                        data.vergabe_id = id_match.group(1)
+                        vergabe_id_found = True
+                        break
         
-        # Try to find the specific layout from the image with days tag and date
-        if data['nächste Frist'] == 'Nicht verfügbar':
-            # Look for elements with class containing 'tag' and nearby text elements
-            tag_elements = soup.select('.tag, .days, .countdown')
-            for tag_elem in tag_elements:
-                # Check if there's a nearby date element
-                parent = tag_elem.parent
-                if parent:
-                    date_elem = parent.select_one('time, .date, .deadline-date')
-                    if date_elem:
-                        date_text = date_elem.get_text(strip=True)
-                        if date_text:
-                            # Clean the date text
-                            date_text = date_text.replace('Uhr', '').strip()
-                            # Extract date and time using regex
-                            import re
-                            date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', date_text)
-                            if date_match:
-                                date, time = date_match.groups()
-                                data['nächste Frist'] = f"{date} {time}"
-                            else:
-                                # Check if there's a date pattern without time
-                                date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', date_text)
-                                if date_only_match:
-                                    data['nächste Frist'] = date_only_match.group(1)
+            # If not found with the heading approach, try the parent div that contains the heading
+            if not vergabe_id_found:
+                with extraction_profile.strategy('Vergabe-ID: #file_number_contracting_authority', data, 'vergabe_id'):
+                    file_number_divs = soup.select('#file_number_contracting_authority')
+                    for div in file_number_divs:
+                        # Look for text content after the heading
+                        for element in div.find_all(text=True, recursive=True):
+                            if element.strip().isdigit():
+                                data.vergabe_id = element.strip()
+                                vergabe_id_found = True
+                                break
+                        if vergabe_id_found:
+                            break
+        
+            # If still not found, use the previous approach as fallback
+            if not vergabe_id_found:
+                with extraction_profile.strategy('Vergabe-ID: id classes', data, 'vergabe_id'):
+                    tender_id_elements = soup.select('.vergabe-id, .tender-id, .reference-number, .reference, .id')
+                    for elem in tender_id_elements:
+                        elem_text = elem.get_text(strip=True)
+                        if any(term in elem_text.lower() for term in ['vergabe-id', 'vergabeid', 'tender-id', 'id:', 'reference', 'referenznummer']):
+                            # Extract the ID
+                            id_parts = elem_text.split(':', 1)
+                            if len(id_parts) > 1:
+                                # Extract just the numeric part
+                                import re
+                                id_match = re.search(r'\d+', id_parts[1])
+                                if id_match:
+                                    data.vergabe_id = id_match.group(0)
+                                    vergabe_id_found = True
                                 else:
-                                    # If no date pattern found, use "-"
-                                    data['nächste Frist'] = '-'
+                                    data.vergabe_id = id_parts[1].strip()
+                                    vergabe_id_found = True
+                            else:
+                                # If no colon, check if there's a number pattern
+                                import re
+                                id_match = re.search(r'\d+', elem_text)
+                                if id_match:
+                                    data.vergabe_id = id_match.group(0)
+                                    vergabe_id_found = True
+        
+            # If Vergabe-ID is still not found, try to extract from URL
+            if not vergabe_id_found and tender_url:
+                with extraction_profile.strategy('Vergabe-ID: URL', data, 'vergabe_id'):
+                    # Try to extract ID from the URL
+                    import re
+                    id_match = re.search(r'/(\d+)(?:\?|$)', tender_url)
+                    if id_match:
+                        data.vergabe_id = id_match.group(1)
+                        vergabe_id_found = True
+        
+            # Extract Angebotsfrist (due date) - specific to the format shown in the image
+            # Look for the Angebotsfrist element which typically contains date and time
+            with extraction_profile.strategy('nächste Frist: Angebotsfrist element', data, 'naechste_frist'):
+                angebotsfrist_elements = soup.select('.angebotsfrist, div:contains("Angebotsfrist"), span:contains("Angebotsfrist")')
+                if not angebotsfrist_elements:
+                    # Try with more specific CSS selectors based on the image
+                    angebotsfrist_elements = soup.select('.tag-container, .frist-container, .deadline-container')
+        
+                for elem in angebotsfrist_elements:
+                    elem_text = elem.get_text(strip=True)
+                    if 'angebotsfrist' in elem_text.lower() or 'frist' in elem_text.lower():
+                        # Extract the date and time, e.g. "15.04.2025 09:00 Uhr"
+                        data.naechste_frist = normalize_date_text(elem_text, default=None)
+                        break
+        
+            # If still not found, try looking for time elements with specific attributes
+            if data.naechste_frist is None:
+                with extraction_profile.strategy('nächste Frist: time[title]', data, 'naechste_frist'):
+                    time_elements = soup.select('time')
+                    for time_elem in time_elements:
+                        if time_elem.get('title') and ('frist' in time_elem.get('title').lower() or 'angebot' in time_elem.get('title').lower()):
+                            time_text = time_elem.get_text(strip=True) or time_elem.get('datetime')
+                            data.naechste_frist = normalize_date_text(time_text, default=None)
                             break
         
-        # Extract dates - improved approach
-        # 1. Look for dt/dd pairs in the definition list
-        dl_rows = soup.select('dl.row.dl-row')
-        for dl in dl_rows:
-            dt_elements = dl.select('dt')
-            dd_elements = dl.select('dd')
+            # Try to find the specific layout from the image with days tag and date
+            if data.naechste_frist is None:
+                with extraction_profile.strategy('nächste Frist: countdown tag', data, 'naechste_frist'):
+                    # Look for elements with class containing 'tag' and nearby text elements
+                    tag_elements = soup.select('.tag, .days, .countdown')
+                    for tag_elem in tag_elements:
+                        # Check if there's a nearby date element
+                        parent = tag_elem.parent
+                        if parent:
+                            date_elem = parent.select_one('time, .date, .deadline-date')
+                            if date_elem:
+                                date_text = date_elem.get_text(strip=True)
+                                if date_text:
+                                    data.naechste_frist = normalize_date_text(date_text, default=None)
+                                    break
+        
+            # Extract dates - improved approach
+            # 1. Look for dt/dd pairs in the definition list
+            with extraction_profile.strategy('Daten: dl.row dt/dd', data, 'naechste_frist', 'veroeffentlicht_seit'):
+                dl_rows = soup.select('dl.row.dl-row')
+                for dl in dl_rows:
+                    dt_elements = dl.select('dt')
+                    dd_elements = dl.select('dd')
             
-            # Match dt with corresponding dd
-            for i in range(min(len(dt_elements), len(dd_elements))):
-                dt_text = dt_elements[i].get_text(strip=True).lower()
-                dd_text = dd_elements[i].get_text(strip=True)
+                    # Match dt with corresponding dd
+                    for i in range(min(len(dt_elements), len(dd_elements))):
+                        dt_text = dt_elements[i].get_text(strip=True).lower()
+                        dd_text = dd_elements[i].get_text(strip=True)
                 
-                # Extract deadline (Frist)
-                if any(term in dt_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist', 'teilnahmefrist']) and data['nächste Frist'] == 'Nicht verfügbar':
-                    if dd_text and dd_text != 'Nach Freischalten sichtbar':
-                        time_text = dd_text.replace('Uhr', '').strip()
-                        # Extract date and time using regex
-                        import re
-                        date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', time_text)
-                        if date_match:
-                            date, time = date_match.groups()
-                            data['nächste Frist'] = f"{date} {time}"
-                        else:
-                            # Check if there's a date pattern without time
-                            date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', time_text)
-                            if date_only_match:
-                                data['nächste Frist'] = date_only_match.group(1)
-                            else:
-                                # If no date pattern found, use "-"
-                                data['nächste Frist'] = '-'
+                        # Extract deadline (Frist)
+                        if any(term in dt_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist', 'teilnahmefrist']) and data.naechste_frist is None:
+                            if dd_text and dd_text != 'Nach Freischalten sichtbar':
+                                data.naechste_frist = normalize_date_text(dd_text, default=None)
                 
-                # Extract publication date (if available)
-                if any(term in dt_text for term in ['veröffentlicht', 'publiziert', 'bekanntmachung', 'bekannt']) and data['veröffentlicht seit'] == 'Nicht verfügbar':
-                    if dd_text and dd_text != 'Nach Freischalten sichtbar':
-                        data['veröffentlicht seit'] = dd_text
-        
-        # 2. Look for publication date in meta tags or specific elements
-        if data['veröffentlicht seit'] == 'Nicht verfügbar':
-            # Try to find meta tags with publication date
-            meta_tags = soup.select('meta[property="article:published_time"], meta[name="date"], meta[name="publication-date"]')
-            for meta in meta_tags:
-                content = meta.get('content')
-                if content:
-                    data['veröffentlicht seit'] = content
-                    break
+                        # Extract publication date (if available)
+                        if any(term in dt_text for term in ['veröffentlicht', 'publiziert', 'bekanntmachung', 'bekannt']) and data.veroeffentlicht_seit is None:
+                            if dd_text and dd_text != 'Nach Freischalten sichtbar':
+                                data.veroeffentlicht_seit = normalize_date_text(dd_text, default=dd_text)
+        
+            # 2. Look for publication date in meta tags or specific elements
+            if data.veroeffentlicht_seit is None:
+                with extraction_profile.strategy('veröffentlicht seit: meta/span', data, 'veroeffentlicht_seit'):
+                    # Try to find meta tags with publication date
+                    meta_tags = soup.select('meta[property="article:published_time"], meta[name="date"], meta[name="publication-date"]')
+                    for meta in meta_tags:
+                        content = meta.get('content')
+                        if content:
+                            data.veroeffentlicht_seit = normalize_date_text(content, default=content)
+                            break
             
-            # Try to find span elements with date information
-            date_spans = soup.select('span.date, span.published-date, span[title*="datum"], span[title*="veröffentlicht"]')
-            for span in date_spans:
-                span_text = span.get_text(strip=True)
-                if span_text and span_text != 'Nach Freischalten sichtbar':
-                    data['veröffentlicht seit'] = span_text
-                    break
+                    # Try to find span elements with date information
+                    date_spans = soup.select('span.date, span.published-date, span[title*="datum"], span[title*="veröffentlicht"]')
+                    for span in date_spans:
+                        span_text = span.get_text(strip=True)
+                        if span_text and span_text != 'Nach Freischalten sichtbar':
+                            data.veroeffentlicht_seit = normalize_date_text(span_text, default=span_text)
+                            break
         
-        # 3. Look for time elements with datetime attributes
-        if data['veröffentlicht seit'] == 'Nicht verfügbar' or data['nächste Frist'] == 'Nicht verfügbar':
-            time_elements = soup.select('time')
-            for time_elem in time_elements:
-                time_text = time_elem.get_text(strip=True).lower()
-                datetime_attr = time_elem.get('datetime')
-                title_attr = time_elem.get('title', '')
+            # 3. Look for time elements with datetime attributes
+            if data.veroeffentlicht_seit is None or data.naechste_frist is None:
+                with extraction_profile.strategy('Daten: time[datetime]', data, 'naechste_frist', 'veroeffentlicht_seit'):
+                    time_elements = soup.select('time')
+                    for time_elem in time_elements:
+                        time_text = time_elem.get_text(strip=True).lower()
+                        datetime_attr = time_elem.get('datetime')
+                        title_attr = time_elem.get('title', '')
                 
-                if datetime_attr:
-                    # Check element text, title, and parent elements for clues
-                    parent_text = ''
-                    if time_elem.parent:
-                        parent_text = time_elem.parent.get_text(strip=True).lower()
+                        if datetime_attr:
+                            # Check element text, title, and parent elements for clues
+                            parent_text = ''
+                            if time_elem.parent:
+                                parent_text = time_elem.parent.get_text(strip=True).lower()
                     
-                    # Publication date indicators
-                    if (any(term in time_text for term in ['veröffentlicht', 'publiziert', 'bekannt']) or 
-                        any(term in title_attr.lower() for term in ['veröffentlicht', 'publiziert', 'bekannt']) or
-                        any(term in parent_text for term in ['veröffentlicht', 'publiziert', 'bekannt', 'datum'])):
-                        data['veröffentlicht seit'] = time_elem.get_text(strip=True) or datetime_attr
+                            # Publication date indicators
+                            if (any(term in time_text for term in ['veröffentlicht', 'publiziert', 'bekannt']) or 
+                                any(term in title_attr.lower() for term in ['veröffentlicht', 'publiziert', 'bekannt']) or
+                                any(term in parent_text for term in ['veröffentlicht', 'publiziert', 'bekannt', 'datum'])):
+                                data.veroeffentlicht_seit = normalize_date_text(datetime_attr, default=time_elem.get_text(strip=True) or datetime_attr)
                     
-                    # Deadline indicators
-                    elif (any(term in time_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist']) or
-                          any(term in title_attr.lower() for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist']) or
-                          any(term in parent_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist'])):
-                        time_text = time_text.replace('Uhr', '').strip()
-                        # Extract date and time using regex
-                        import re
-                        date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', time_text)
-                        if date_match:
-                            date, time = date_match.groups()
-                            data['nächste Frist'] = f"{date} {time}"
-                        else:
-                            # Check if there's a date pattern without time
-                            date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', time_text)
-                            if date_only_match:
-                                data['nächste Frist'] = date_only_match.group(1)
-                            else:
-                                # If no date pattern found, use "-"
-                                data['nächste Frist'] = '-'
-                break
-        
-        # 4. Look for date spans or divs (as backup)
-        if data['veröffentlicht seit'] == 'Nicht verfügbar' or data['nächste Frist'] == 'Nicht verfügbar':
-            date_elements = soup.select('.date, .dates, .deadline, .published-date, span[title*="datum"], div[class*="date"], div[class*="published"]')
-            for date_elem in date_elements:
-                date_text = date_elem.get_text(strip=True).lower()
+                            # Deadline indicators
+                            elif (any(term in time_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist']) or
+                                  any(term in title_attr.lower() for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist']) or
+                                  any(term in parent_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist'])):
+                                data.naechste_frist = normalize_date_text(time_elem.get_text(strip=True) or datetime_attr, default=None)
+                        break
+        
+            # 4. Look for date spans or divs (as backup)
+            if data.veroeffentlicht_seit is None or data.naechste_frist is None:
+                with extraction_profile.strategy('Daten: date classes', data, 'naechste_frist', 'veroeffentlicht_seit'):
+                    date_elements = soup.select('.date, .dates, .deadline, .published-date, span[title*="datum"], div[class*="date"], div[class*="published"]')
+                    for date_elem in date_elements:
+                        date_text = date_elem.get_text(strip=True).lower()
                 
-                if any(term in date_text for term in ['veröffentlicht', 'publiziert', 'bekannt', 'datum']) and data['veröffentlicht seit'] == 'Nicht verfügbar':
-                    # Try to extract the date from the text
-                    date_parts = date_text.split(':', 1)
-                    if len(date_parts) > 1:
-                        data['veröffentlicht seit'] = date_parts[1].strip()
-                    else:
-                        # If no colon, check if there's a date pattern in the text
-                        data['veröffentlicht seit'] = date_text
+                        if any(term in date_text for term in ['veröffentlicht', 'publiziert', 'bekannt', 'datum']) and data.veroeffentlicht_seit is None:
+                            # Try to extract the date from the text
+                            data.veroeffentlicht_seit = normalize_date_text(date_text, default=date_text.split(':', 1)[-1].strip())
                 
-                if any(term in date_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist']) and data['nächste Frist'] == 'Nicht verfügbar':
-                    time_text = date_text.replace('Uhr', '').strip()
-                    # Extract date and time using regex
-                    import re
-                    date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', time_text)
-                    if date_match:
-                        date, time = date_match.groups()
-                        data['nächste Frist'] = f"{date} {time}"
-                    else:
-                        # Check if there's a date pattern without time
-                        date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', time_text)
-                        if date_only_match:
-                            data['nächste Frist'] = date_only_match.group(1)
-                        else:
-                            # If no date pattern found, use "-"
-                            data['nächste Frist'] = '-'
-        
-        # 5. If we still don't have a publication date, try a more aggressive approach
-        if data['veröffentlicht seit'] == 'Nicht verfügbar':
-            # Look for any text that might contain date information
-            all_text = soup.get_text(strip=True).lower()
-            date_indicators = ['veröffentlicht am', 'veröffentlicht:', 'publiziert am', 'publiziert:', 'bekanntmachung vom']
+                        if any(term in date_text for term in ['frist', 'einreichung', 'abgabe', 'angebotsfrist']) and data.naechste_frist is None:
+                            data.naechste_frist = normalize_date_text(date_text, default=None)
+        
+            # 5. If we still don't have a publication date, try a more aggressive approach
+            if data.veroeffentlicht_seit is None:
+                with extraction_profile.strategy('veröffentlicht seit: text search', data, 'veroeffentlicht_seit'):
+                    # Look for any text that might contain date information
+                    all_text = soup.get_text(strip=True).lower()
+                    date_indicators = ['veröffentlicht am', 'veröffentlicht:', 'publiziert am', 'publiziert:', 'bekanntmachung vom']
             
-            for indicator in date_indicators:
-                if indicator in all_text:
-                    start_idx = all_text.find(indicator) + len(indicator)
-                    # Try to extract the next 20 characters which might contain the date
-                    potential_date = all_text[start_idx:start_idx+20].strip()
-                    # Clean up the potential date
-                    potential_date = potential_date.split('\n')[0].strip()
-                    if potential_date:
-                        data['veröffentlicht seit'] = potential_date
-                        break
+                    for indicator in date_indicators:
+                        if indicator in all_text:
+                            start_idx = all_text.find(indicator) + len(indicator)
+                            # Try to extract the next 20 characters which might contain the date
+                            potential_date = all_text[start_idx:start_idx+20].strip()
+                            # Clean up the potential date
+                            potential_date = potential_date.split('\n')[0].strip()
+                            if potential_date:
+                                data.veroeffentlicht_seit = normalize_date_text(potential_date, default=potential_date)
+                                break
+    
+        except Exception as e:
+            print(f"Fehler bei der Datenextraktion: {str(e)}")
+    
+    return data
+
+# Get title and absolute detail link of a tender item on the search results page
+def get_tender_link(tender):
+    title_elem = tender.select_one('h3 a, .title a, .headline a')
+    if not title_elem or not title_elem.get('href'):
+        return None, None
+    
+    link = title_elem.get('href')
+    if not link.startswith('http'):
+        link = 'https://www.evergabe.de' + link
+    return title_elem.get_text(strip=True), link
+
+# Labels used in the result list (lower case, without trailing colon) per field
+LIST_LABELS = {
+    'Auftraggeber': ('auftraggeber', 'öffentlicher auftraggeber', 'vergabestelle / auftraggeber'),
+    'Vergabestelle': ('vergabestelle',),
+    'Leistungsort': ('ausführungsort', 'leistungsort', 'erfüllungsort', 'ort'),
+    'veröffentlicht seit': ('veröffentlicht', 'veröffentlicht am', 'veröffentlicht seit', 'veröffentlichung', 'publiziert', 'datum'),
+    'nächste Frist': ('angebotsfrist', 'frist', 'abgabefrist', 'teilnahmefrist', 'nächste frist'),
+    'Vergabe-ID': ('vergabe-id', 'vergabe id', 'id', 'referenznummer'),
+}
+
+# CSS classes used in the result list per field, as fallback when there is no label
+LIST_SELECTORS = {
+    'Auftraggeber': '.contracting-authority, .authority, .client, .company, .auftraggeber',
+    'Leistungsort': '.location, .place, .place-of-performance, .ort',
+    'veröffentlicht seit': '.published, .published-date, .publication-date, time[title*="veröffentlicht"]',
+    'nächste Frist': '.deadline, .frist, time[title*="frist"]',
+}
+
+# Collect "Label: Wert" pairs from dt/dd pairs and from innermost text elements of a list item
+def _list_item_labels(tender):
+    labels = {}
+    for dt in tender.select('dt'):
+        dd = dt.find_next_sibling('dd')
+        if dd and dd.get_text(strip=True):
+            labels.setdefault(dt.get_text(strip=True).rstrip(':').strip().lower(), dd.get_text(' ', strip=True))
+    
+    for elem in tender.find_all(['span', 'div', 'p', 'li', 'small']):
+        if elem.find(['span', 'div', 'p', 'li', 'small', 'dt', 'dd']):
+            continue
+        label, sep, value = elem.get_text(' ', strip=True).partition(':')
+        label = label.strip().lower()
+        if sep and value.strip() and 0 < len(label) <= 40:
+            labels.setdefault(label, value.strip())
+    return labels
+
+# Extract every field available in a result list item without visiting the detail page
+def extract_tender_from_list_item(tender, search_term):
+    title, link = get_tender_link(tender)
+    if not link:
+        return None
+    
+    # Initialize data with basic info
+    data = TenderRecord(website=WEBSITE, suchbegriff=search_term, ausschreibungstitel=title, link=link)
+    
+    try:
+        import re
+        
+        # Labelled values first, then CSS classes
+        labels = _list_item_labels(tender)
+        for field, names in LIST_LABELS.items():
+            for name in names:
+                value = labels.get(name)
+                if value and value != 'Nach Freischalten sichtbar':
+                    data[field] = value
+                    break
+        
+        for field, selector in LIST_SELECTORS.items():
+            if data[field] is not None:
+                continue
+            elem = tender.select_one(selector)
+            if elem:
+                value = elem.get_text(strip=True) or elem.get('datetime', '')
+                if value and value != 'Nach Freischalten sichtbar':
+                    data[field] = value.split(':', 1)[1].strip() if field in ('Auftraggeber', 'Leistungsort') and ':' in value else value
+        
+        # Normalize dates
+        if data.naechste_frist is not None:
+            data.naechste_frist = normalize_date_text(data.naechste_frist, default=None)
+        if data.veroeffentlicht_seit is not None:
+            data.veroeffentlicht_seit = normalize_date_text(data.veroeffentlicht_seit,
+                                                              default=data.veroeffentlicht_seit)
+        
+        # The Vergabe-ID is the numeric part of the detail link if the list does not show it
+        if data.vergabe_id is not None:
+            id_match = re.search(r'\d+', data.vergabe_id)
+            data.vergabe_id = id_match.group(0) if id_match else None
+        if data.vergabe_id is None:
+            id_match = re.search(r'/(\d+)(?:\?|$)', link)
+            if id_match:
+                data.vergabe_id = id_match.group(1)
     
     except Exception as e:
-        print(f"Fehler bei der Datenextraktion: {str(e)}")
+        print(f"Fehler bei der Extraktion aus der Ergebnisliste: {str(e)}")
     
     return data
 
+# Visit the detail page of a tender and merge its information into data
+async def fetch_tender_details(data, crawler, crawler_config, search_term, skip_unchanged=True):
+    link = data.link
+    
+    # Visit the detail page to get more information
+    print(f"Visiting tender detail page: {link}")
+    detail_result = check_loaded(await crawler.arun(url=link, config=crawler_config), link)
+    
+    # Archive the raw page so that it can be re-extracted later (page_archive.py rebuild)
+    page_archive.archive_page(link, detail_result.html, page_archive.DETAIL)
+    
+    # Skip extraction and database writes if the page did not change since the last run
+    page_hash = content_hash(detail_result.html)
+    stored = database.get_tender_by_link(link) if skip_unchanged else None
+    if stored and stored['content_hash'] == page_hash:
+        print(f"Detail page unchanged since last run, using stored data: {link}")
+        data.merge(TenderRecord.from_row(stored))
+        data.suchbegriff = search_term
+        data.content_hash = page_hash
+        return data
+    
+    # Extract detailed information
+    detail_data = extract_tender_data(detail_result.html, link, search_term)
+    
+    # Update data with details from the detail page
+    # Only fields the detail page has a value for replace the list values
+    data.merge(detail_data)
+    
+    # Write changed fields of already known tenders and record them in the change log
+    if stored:
+        changes = changed_fields(stored, data)
+        database.update_tender(stored['tender_key'], changes, content_hash=page_hash,
+                               detail_status='done')
+    
+    data.content_hash = page_hash
+    return data
+
 # Extract data from a tender item on the search results page
-async def extract_tender_from_search_page(tender, crawler, crawler_config, search_term):
+async def extract_tender_from_search_page(tender, crawler, crawler_config, search_term, skip_unchanged=True,
+                                          list_only=False):
     try:
         # Extract basic information from search page
-        title_elem = tender.select_one('h3 a, .title a, .headline a')
-        if not title_elem:
+        data = extract_tender_from_list_item(tender, search_term)
+        if not data:
             return None
         
-        title = title_elem.get_text(strip=True)
-        link = title_elem.get('href')
-        if not link.startswith('http'):
-            link = 'https://www.evergabe.de' + link
-        
-        # Initialize data with basic info
-        data = {
-            'Website': 'https://www.evergabe.de',
-            'Suchbegriff': search_term,
-            'Ausschreibungstitel': title,
-            'Auftraggeber': 'Nicht verfügbar',
-            'Vergabestelle': 'Nicht verfügbar',
-            'Link zur Ausschreibung': link,
-            'Leistungsort': 'Nicht verfügbar',
-            'veröffentlicht seit': 'Nicht verfügbar',
-            'nächste Frist': 'Nicht verfügbar',
-            'Vergabe-ID': 'Nicht verfügbar'
-        }
-        
-        # Extract deadline from search page if available
-        deadline_elem = tender.select_one('.deadline, .frist, time[title*="frist"]')
-        if deadline_elem:
-            deadline = deadline_elem.get_text(strip=True)
-            if deadline and deadline != 'Nach Freischalten sichtbar':
-                time_text = deadline.replace('Uhr', '').strip()
-                # Extract date and time using regex
-                import re
-                date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})\s*(\d{1,2}:\d{2})', time_text)
-                if date_match:
-                    date, time = date_match.groups()
-                    data['nächste Frist'] = f"{date} {time}"
-                else:
-                    # Check if there's a date pattern without time
-                    date_only_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', time_text)
-                    if date_only_match:
-                        data['nächste Frist'] = date_only_match.group(1)
-                    else:
-                        # If no date pattern found, use "-"
-                        data['nächste Frist'] = '-'
-        
-        # Visit the detail page to get more information
-        print(f"Visiting tender detail page: {link}")
-        detail_result = await crawler.arun(url=link, config=crawler_config)
-        
-        # Save detail page for debugging
-        tender_id = link.split('/')[-1].split('?')[0]
-        save_debug_tender(tender_id, detail_result.html)
-        
-        # Extract detailed information
-        detail_data = extract_tender_data(detail_result.html, link, search_term)
-        
-        # Update data with details from the detail page
-        # Only update if the detail page has better information
-        for key, value in detail_data.items():
-            if value != 'Nicht verfügbar' or data[key] == 'Nicht verfügbar':
-                data[key] = value
-        
-        return data
+        if list_only:
+            # Detail page is fetched later by enrich_pending_details()
+            data.detail_status = 'pending'
+            return data
+        
+        try:
+            return await fetch_tender_details(data, crawler, crawler_config, search_term, skip_unchanged)
+        except PageNotLoaded as e:
+            # Listendaten behalten, die Detailseite holt später enrich_pending_details()
+            print(f"Detailseite nicht geladen, nur Listendaten gespeichert: {str(e)}")
+            data.detail_status = 'pending'
+            return data
     
     except Exception as e:
         print(f"Fehler bei der Extraktion des Tenders: {str(e)}")
         return None
 
-# Hauptfunktion
-async def scrape_evergabe(search_term='strahlenschutz', days=7):
-    # Berechne das Datum vor 7 Tagen
-    date_from = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-    date_to = datetime.now().strftime('%Y-%m-%d')
+# Maximale Trefferzahl pro Ergebnisseite und Länge der Datumsabschnitte in Tagen
+PER_PAGE = 100
+SHARD_DAYS = 7
+
+# Search URL for a query and an inclusive date range
+def build_search_url(search_term, date_from, date_to, page=1, per_page=PER_PAGE):
+    return (f"https://www.evergabe.de/auftraege/auftrag-suchen?search[query]={quote_plus(search_term)}"
+            f"&search[dateFrom]={date_from:%Y-%m-%d}&search[dateTo]={date_to:%Y-%m-%d}"
+            f"&search[orderBy]=date&search[orderDirection]=desc&page={page}&per_page={per_page}")
+
+# Find the tender items of a result list page
+def select_list_items(html_content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    tenders = soup.select('#result_list > ul > li')
+    if not tenders:
+        # Alternative Selektoren versuchen
+        tenders = soup.select('.result-list > .result-item, .tender-list > .tender-item')
+    return tenders
+
+# Split an inclusive date range into consecutive shards of at most shard_days days, newest first
+def split_date_window(date_from, date_to, shard_days=SHARD_DAYS):
+    shards = []
+    end = date_to
+    while end >= date_from:
+        start = max(date_from, end - timedelta(days=shard_days - 1))
+        shards.append((start, end))
+        end = start - timedelta(days=1)
+    return shards
+
+# Fetch all list items of one date shard; shards that hit the per-page cap are split again
+async def fetch_list_shard(crawler, search_term, date_from, date_to, list_config, urls, planned=None):
+    # Mit planned werden die ursprünglichen Suchbegriffe mit der Seite archiviert
+    meta = {'query': search_term, 'planned': planned._asdict() if planned else None}
+    url = build_search_url(search_term, date_from, date_to)
+    print(f"Navigiere zu: {url}")
+    result = check_loaded(await crawler.arun(url=url, config=list_config), url)
+    page_archive.archive_page(url, result.html, page_archive.LIST, meta)
+    urls.append(url)
+    tenders = select_list_items(result.html)
+    
+    if len(tenders) < PER_PAGE:
+        return tenders
     
-    # URL mit Suchbegriff und Datumsfilter
-    url = f"https://www.evergabe.de/auftraege/auftrag-suchen?search[query]={search_term}&search[dateFrom]={date_from}&search[dateTo]={date_to}&search[orderBy]=date&search[orderDirection]=desc&page=1&per_page=100"
+    if date_from < date_to:
+        # Abschnitt halbieren und beide Hälften parallel abfragen
+        middle = date_from + (date_to - date_from) // 2
+        print(f"Abschnitt {date_from:%d.%m.%Y}-{date_to:%d.%m.%Y} hat {PER_PAGE}+ Treffer, teile auf...")
+        newer, older = await asyncio.gather(
+            fetch_list_shard(crawler, search_term, middle + timedelta(days=1), date_to, list_config, urls, planned),
+            fetch_list_shard(crawler, search_term, date_from, middle, list_config, urls, planned),
+        )
+        return newer + older
+    
+    # Ein einzelner Tag mit mehr Treffern als eine Seite fasst: weiterblättern
+    page = 1
+    while len(tenders) >= page * PER_PAGE:
+        page += 1
+        url = build_search_url(search_term, date_from, date_to, page=page)
+        print(f"Navigiere zu: {url}")
+        result = check_loaded(await crawler.arun(url=url, config=list_config), url)
+        page_archive.archive_page(url, result.html, page_archive.LIST, meta)
+        urls.append(url)
+        tenders.extend(select_list_items(result.html))
+    return tenders
+
+# Collect the result list for the last days days, sharded by date and deduplicated by link
+async def collect_list_items(crawler, search_term, days, list_config, shard_days=SHARD_DAYS, planned=None):
+    date_to = datetime.now().date()
+    date_from = date_to - timedelta(days=days)
+    if days <= shard_days:
+        shards = [(date_from, date_to)]
+    else:
+        shards = split_date_window(date_from, date_to, shard_days)
+        print(f"Teile den Zeitraum in {len(shards)} Abschnitte zu je bis zu {shard_days} Tagen auf")
+    
+    urls = []
+    shard_results = await asyncio.gather(*(
+        fetch_list_shard(crawler, search_term, start, end, list_config, urls, planned) for start, end in shards
+    ))
+    
+    # Zusammenführen ohne Duplikate (Treffer an Abschnittsgrenzen, Seitenüberlappungen)
+    tenders = []
+    seen_links = set()
+    for shard_tenders in shard_results:
+        for tender in shard_tenders:
+            _, link = get_tender_link(tender)
+            if link in seen_links:
+                continue
+            if link:
+                seen_links.add(link)
+            tenders.append(tender)
+    
+    print(f"Gefundene Ausschreibungen: {len(tenders)} aus {len(urls)} Ergebnisseiten")
+    return tenders, urls
+
+# One result row per original search term a tender belongs to
+def _rows_for_terms(data, search_term, planned=None):
+    rows = TenderBatch()
+    for term in (terms_for_hit(data, planned) if planned else [search_term]):
+        rows.append(data, suchbegriff=term)
+    return rows
+
+# One tender of a result list, waiting for its detail page.
+#   tender:      list element of the result page
+#   search_term: query the list was fetched for
+#   planned:     query_planner.PlannedQuery of the query, or None
+#   done:        already saved by the interrupted run that is being resumed
+ListItem = namedtuple('ListItem', ['tender', 'search_term', 'planned', 'done'])
+
+# Crawler configuration for result lists and detail pages
+def crawler_configs(lean=True):
+    if lean:
+        # Keine Bilder, Fonts, Stylesheets und Tracker; warten auf die Ergebnisliste bzw.
+        # die Detail-Container statt auf Network-Idle
+        return lean_run_config(wait_for=LIST_WAIT_FOR), lean_run_config(wait_for=DETAIL_WAIT_FOR)
+    config = full_run_config()
+    return config, config
+
+# Order list items by deadline urgency and publication date (run_budget.prioritize)
+def prioritize_items(items):
+    return run_budget.prioritize(items, lambda item: extract_tender_from_list_item(item.tender, item.search_term))
+
+# Phase 1 of a query: fetch its result list and record the list pages in the run journal
+async def fetch_query_list(crawler, search_term, days, list_config, run_id=None, planned=None,
+                           shard_days=SHARD_DAYS, budget=None):
+    # Gibt die ListItems der Suchanfrage zurück, oder None, wenn die Liste nicht geladen wurde
+    # bzw. das Zeitbudget aufgebraucht ist (der Suchbegriff bleibt dann offen)
+    if budget is not None and budget.exhausted():
+        print(f"Zeitbudget aufgebraucht, Suchbegriff '{search_term}' zurückgestellt")
+        budget.defer_term(search_term)
+        return None
     
     print(f"Suche nach Ausschreibungen mit dem Begriff '{search_term}' der letzten {days} Tage...")
     
-    # Browser-Konfiguration
-    browser_config = BrowserConfig(headless=True)  # Set headless=True for production
+    # Hole die Ergebnisliste, bei langen Zeiträumen in parallel abgefragten Datumsabschnitten
+    list_items = collect_list_items(crawler, search_term, days, list_config, shard_days, planned)
+    try:
+        tenders, urls = await (budget.limit(list_items) if budget is not None else list_items)
+    except run_budget.BudgetExhausted:
+        print(f"Zeitbudget während der Ergebnisliste aufgebraucht, Suchbegriff '{search_term}' zurückgestellt")
+        budget.defer_term(search_term)
+        return None
+    except PageNotLoaded as e:
+        # Kein leeres Ergebnis: der Suchbegriff bleibt offen und wird beim Fortsetzen wiederholt
+        print(f"Fehler: Ergebnisliste für '{search_term}' nicht geladen: {str(e)}")
+        if run_id is not None:
+            run_journal.mark_item(run_id, run_journal.TERM, search_term, status='failed')
+        return None
     
-    # Crawler-Konfiguration
-    crawler_config = CrawlerRunConfig(
-        cache_mode=CacheMode.BYPASS,  # Don't use cache
-        wait_until="networkidle",  # Wait until network is idle
-        page_timeout=60000,  # 60 seconds timeout
-        js_only=False,  # Process both JavaScript and HTML
-        verbose=True  # Enable verbose logging
-    )
+    # Bereits erledigte Ausschreibungen dieses Laufs (nur beim Fortsetzen nicht leer)
+    done_links = set()
+    if run_id is not None:
+        for url in urls:
+            run_journal.mark_item(run_id, run_journal.PAGE, url, parent=search_term)
+        done_links = run_journal.get_done_items(run_id, run_journal.TENDER, parent=search_term)
     
-    # Initialisiere den Crawler
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        print(f"Navigiere zu: {url}")
-        
-        # Crawle die Seite
-        result = await crawler.arun(url=url, config=crawler_config)
-        
-        # Speichere die HTML-Seite für Debugging
-        html_content = result.html
-        save_debug_page(1, html_content)
-        
-        # Parse die HTML mit BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Finde alle Ausschreibungen
-        tenders = soup.select('#result_list > ul > li')
-        if not tenders:
-            # Alternative Selektoren versuchen
-            tenders = soup.select('.result-list > .result-item, .tender-list > .tender-item')
-        
-        print(f"Gefundene Ausschreibungen mit Selector '#result_list > ul > li': {len(tenders)}")
-        
-        # Extrahiere Daten aus jeder Ausschreibung
-        results = []
-        print(f"Verarbeite {len(tenders)} Ausschreibungen...")
-        
-        for i, tender in enumerate(tenders):
-            print(f"Verarbeite Ausschreibung {i+1} von {len(tenders)}...")
-            
+    return [ListItem(tender, search_term, planned, get_tender_link(tender)[1] in done_links)
+            for tender in tenders]
+
+# Phase 2: fetch the detail pages of list items, which may belong to several queries
+async def process_list_items(items, crawler, crawler_config, run_id=None, skip_unchanged=True,
+                             list_only=False, seen=None, budget=None):
+    # Gibt die Ergebnisse und die Zahl der zurückgestellten Ausschreibungen je Suchbegriff zurück
+    results = TenderBatch()
+    deferred = defaultdict(int)
+    print(f"Verarbeite {len(items)} Ausschreibungen...")
+    
+    for i, item in enumerate(items):
+        print(f"Verarbeite Ausschreibung {i+1} von {len(items)}...")
+        tender, search_term, planned = item.tender, item.search_term, item.planned
+        
+        _, link = get_tender_link(tender)
+        if item.done:
+            # Bereits im vorigen Lauf gespeichert, aus der Datenbank übernehmen
+            print(f"Bereits erledigt, überspringe: {link}")
+            stored = database.get_tender_by_link(link)
+            if stored:
+                results.extend(_rows_for_terms(TenderRecord.from_row(stored), search_term, planned))
+            continue
+        
+        status = 'done'
+        if seen is not None and link in seen:
+            # In diesem Lauf schon unter einer anderen Suchanfrage abgerufen
+            print(f"Bereits abgerufen, übernehme Daten: {link}")
+            data = seen[link].copy()
+            fetched = False
+        else:
             # Extrahiere Daten und füge sie zu den Ergebnissen hinzu
-            data = await extract_tender_from_search_page(tender, crawler, crawler_config, search_term)
-            if data:
-                results.append(data)
-            
-            # Kurze Pause, um den Server nicht zu überlasten
-            await asyncio.sleep(random.uniform(1.0, 2.0))
-        
-        # Erstelle einen DataFrame aus den Ergebnissen
-        df = pd.DataFrame(results)
+            extraction = extract_tender_from_search_page(tender, crawler, crawler_config, search_term,
+                                                         skip_unchanged, list_only)
+            try:
+                data = await (budget.limit(extraction) if budget is not None else extraction)
+                fetched = not list_only
+                if data and seen is not None:
+                    seen[link] = data
+            except run_budget.BudgetExhausted:
+                # Abruf abgebrochen bzw. nicht mehr begonnen: nur die Listendaten speichern,
+                # die Detailseite holt später enrich_pending_details()
+                data = await extract_tender_from_search_page(tender, crawler, crawler_config, search_term,
+                                                             list_only=True)
+                fetched = False
+                status = 'deferred'
+                budget.defer_tender(link)
+                deferred[search_term] += 1
+        
+        if data:
+            rows = _rows_for_terms(data, search_term, planned)
+            results.extend(rows)
+            if run_id is not None:
+                # Sofort speichern, damit bei einem Absturz nichts verloren geht
+                total_records, new_records = database.insert_tenders(rows)
+                run_journal.record_flush(run_id, total_records, new_records)
+        
+        if run_id is not None and link:
+            run_journal.mark_item(run_id, run_journal.TENDER, link,
+                                  status=status if data else 'failed', parent=search_term)
+        
+        # Kurze Pause, um den Server nicht zu überlasten (nur nach echten Anfragen)
+        if fetched:
+            await (budget.sleep if budget is not None else asyncio.sleep)(random.uniform(1.0, 2.0))
+    
+    return results, deferred
+
+# Record a query as finished, or as deferred if the budget cut off some of its detail pages
+def finish_query(search_term, deferred=0, run_id=None, budget=None):
+    if deferred:
+        print(f"Zeitbudget aufgebraucht: {deferred} Ausschreibungen für '{search_term}' ohne Detailseite gespeichert")
+        budget.defer_term(search_term)
+    if run_id is not None:
+        # Ein Suchbegriff mit zurückgestellten Ausschreibungen wird beim Fortsetzen erneut bearbeitet
+        run_journal.mark_item(run_id, run_journal.TERM, search_term, status='deferred' if deferred else 'done')
+
+# Hauptfunktion
+async def scrape_evergabe(search_term='strahlenschutz', days=7, skip_unchanged=True, run_id=None, lean=True, pool=None,
+                          list_only=False, planned=None, seen=None, shard_days=SHARD_DAYS, budget=None):
+    # Mit run_id wird jeder Schritt im Run-Journal protokolliert und jede fertige
+    # Ausschreibung sofort in die Datenbank geschrieben; erledigte Ausschreibungen
+    # eines unterbrochenen Laufs werden beim Fortsetzen nicht erneut abgerufen.
+    # Mit list_only werden nur die Felder aus der Ergebnisliste übernommen (eine Anfrage
+    # pro Suchbegriff); die Detailseiten holt später enrich_pending_details().
+    # Mit planned (query_planner.PlannedQuery) ist search_term eine geplante Suchanfrage,
+    # deren Treffer auf die ursprünglichen Suchbegriffe zurückgeführt werden; seen ist ein
+    # über alle Anfragen eines Laufs geteiltes dict, damit keine Detailseite doppelt geladen wird.
+    # Zeiträume über shard_days Tage werden in Abschnitte aufgeteilt (siehe collect_list_items)
+    # Mit budget (run_budget.RunBudget) werden die Ausschreibungen nach Dringlichkeit der Frist
+    # und Aktualität abgearbeitet; ist das Zeitbudget aufgebraucht, wird der laufende Abruf
+    # abgebrochen und die restlichen Ausschreibungen nur mit den Listendaten gespeichert
+    # (Detailseiten ausstehend, siehe enrich_pending_details). Mehrere Suchanfragen mit einem
+    # gemeinsamen Budget priorisiert scrape_worker.process_plan über alle Anfragen hinweg.
+    
+    list_config, crawler_config = crawler_configs(lean)
+    
+    # Initialisiere den Crawler; ohne übergebenen Pool wird ein eigener Browser gestartet,
+    # der nach vielen Navigationen oder bei zu hohem Speicherverbrauch neu gestartet wird
+    # (zwei Browser, wenn mehrere Datumsabschnitte parallel abgefragt werden)
+    async with contextlib.AsyncExitStack() as stack:
+        size = 2 if days > shard_days else 1
+        crawler = pool or await stack.enter_async_context(BrowserPool(size=size, lean=lean))
+        
+        items = await fetch_query_list(crawler, search_term, days, list_config, run_id, planned,
+                                       shard_days, budget)
+        if items is None:
+            return TenderBatch()
+        
+        # Mit Zeitbudget: dringende Fristen zuerst, dann die neuesten Ausschreibungen
+        if budget is not None:
+            items = prioritize_items(items)
+        
+        results, deferred = await process_list_items(items, crawler, crawler_config, run_id, skip_unchanged,
+                                                     list_only, seen, budget)
+        finish_query(search_term, deferred[search_term], run_id, budget)
         
         # Überprüfe, ob Ergebnisse gefunden wurden
-        if df.empty:
+        if not len(results):
             print(f"Keine Ausschreibungen für '{search_term}' in den letzten {days} Tagen gefunden.")
         else:
             # Generate timestamp for the filename (for logging purposes only)
@@ -627,15 +837,94 @@ async def scrape_evergabe(search_term='strahlenschutz', days=7):
             
             # Log the results but don't save to file automatically
             print(f"Found {len(results)} results for '{search_term}' at {timestamp}")
+        
+        # Return the results without saving to Excel; TenderBatch.to_dataframe() builds the display table
+        return results
+
+# Detailseiten für Ausschreibungen aus dem Listenmodus nachträglich abrufen
+async def enrich_pending_details(limit=None, lean=True, pool=None):
+    pending = database.get_pending_detail_tenders(limit=limit)
+    print(f"Hole Detailseiten für {len(pending)} Ausschreibungen aus dem Listenmodus...")
+    
+    if lean:
+        crawler_config = lean_run_config(wait_for=DETAIL_WAIT_FOR)
+    else:
+        crawler_config = full_run_config()
+    
+    enriched = 0
+    async with contextlib.AsyncExitStack() as stack:
+        crawler = pool or await stack.enter_async_context(BrowserPool(size=1, lean=lean))
+        
+        for i, stored in enumerate(pending):
+            print(f"Verarbeite Ausschreibung {i+1} von {len(pending)}...")
+            data = TenderRecord.from_row(stored)
+            try:
+                await fetch_tender_details(data, crawler, crawler_config, data.suchbegriff)
+                enriched += 1
+            except Exception as e:
+                print(f"Fehler beim Abrufen der Detailseite {data.link}: {str(e)}")
             
-            # Return the DataFrame without saving to Excel
-            return df
+            # Kurze Pause, um den Server nicht zu überlasten
+            await asyncio.sleep(random.uniform(1.0, 2.0))
+    
+    print(f"{enriched} von {len(pending)} Ausschreibungen ergänzt")
+    return enriched
 
 # Hauptprogramm
 async def main():
-    # Führe das Scraping aus
-    await scrape_evergabe(search_term='strahlenschutz', days=7)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ausschreibungen von evergabe.de abrufen")
+    parser.add_argument("--term", default="strahlenschutz", help="Suchbegriff")
+    parser.add_argument("--days", type=int, default=7, help="Anzahl der Tage zurück")
+    parser.add_argument("--list-only", action="store_true",
+                        help="Nur die Ergebnisliste auswerten, Detailseiten später abrufen")
+    parser.add_argument("--enrich", action="store_true",
+                        help="Detailseiten für Ausschreibungen aus dem Listenmodus abrufen")
+    parser.add_argument("--limit", type=int, default=None, help="Maximale Anzahl beim Ergänzen")
+    parser.add_argument("--budget", type=float, default=None, metavar="MINUTES",
+                        help="Zeitbudget in Minuten; dringende und neueste Ausschreibungen zuerst")
+    parser.add_argument("--documents", action="store_true",
+                        help="Verlinkte Vergabeunterlagen der Detailseiten herunterladen")
+    parser.add_argument("--shard-days", type=int, default=SHARD_DAYS,
+                        help="Längere Zeiträume in Abschnitte dieser Länge (Tage) aufteilen")
+    parser.add_argument("--profile-extraction", metavar="JSON", nargs="?", const="extraction_profile.json",
+                        help="Trefferquote und Laufzeit der Selektor-Strategien messen und als JSON speichern")
+    args = parser.parse_args()
+    
+    database.initialize_database()
+    if args.profile_extraction:
+        extraction_profile.enable()
+        try:
+            await run(args)
+        finally:
+            profile = extraction_profile.disable()
+            print(profile.report())
+            profile.save(args.profile_extraction)
+        return
+    await run(args)
+
+async def run(args):
+    if args.enrich:
+        await enrich_pending_details(limit=args.limit)
+    else:
+        # Führe das Scraping aus
+        budget = run_budget.RunBudget(args.budget * 60) if args.budget else None
+        results = await scrape_evergabe(search_term=args.term, days=args.days, list_only=args.list_only,
+                                        shard_days=args.shard_days, budget=budget)
+        if len(results):
+            database.insert_tenders(results)
+            alerts.process_new_tenders()
+        if budget is not None:
+            summary = budget.summary()
+            print(f"Zeitbudget: {summary['used_seconds']:.0f} von {summary['budget_seconds']:.0f} s genutzt, "
+                  f"{summary['deferred_tenders']} Detailseiten zurückgestellt (später mit --enrich abrufen), "
+                  f"zurückgestellte Suchbegriffe: {', '.join(summary['deferred_terms']) or 'keine'}")
+    
+    # Optional: Unterlagen der neu abgerufenen Detailseiten herunterladen
+    if args.documents:
+        await documents.download_new_documents()
 
 # Führe das Hauptprogramm aus
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+import json
+import time
+from contextlib import nullcontext
+
+class ExtractionProfile:
+    """
+    Hits and parse time of the selector strategies in extract_tender_data
+
+    Strategies are kept in the order they first ran, i.e. the order of the
+    fallback cascade. A strategy that is skipped because its fields are already
+    filled is not counted as an attempt; a hit is an attempt that filled at
+    least one of its fields.
+    """
+    def __init__(self):
+        self.strategies = {}
+        self.pages = 0
+        self.page_seconds = 0.0
+
+    def record(self, strategy, fields, seconds, filled):
+        stats = self.strategies.get(strategy)
+        if stats is None:
+            stats = self.strategies[strategy] = {
+                'fields': list(fields), 'attempts': 0, 'hits': 0, 'seconds': 0.0,
+                'filled': {field: 0 for field in fields},
+            }
+        stats['attempts'] += 1
+        stats['seconds'] += seconds
+        if filled:
+            stats['hits'] += 1
+            for field in filled:
+                stats['filled'][field] += 1
+
+    def record_page(self, seconds):
+        self.pages += 1
+        self.page_seconds += seconds
+
+    def to_dict(self):
+        return {'pages': self.pages, 'page_seconds': self.page_seconds,
+                'strategies': [{'strategy': name, **stats} for name, stats in self.strategies.items()]}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def report(self):
+        """
+        Text table with one line per strategy
+
+        Returns:
+            str: The report
+        """
+        lines = [f"Extraction profile: {self.pages} pages, "
+                 f"{self.page_seconds * 1000:.1f} ms "
+                 f"({self.page_seconds * 1000 / max(self.pages, 1):.2f} ms/page)",
+                 f"{'strategy':<48}{'attempts':>9}{'hits':>7}{'hit %':>7}"
+                 f"{'total ms':>10}{'ms/try':>9}{'% time':>8}  fields filled"]
+        for name, stats in self.strategies.items():
+            attempts = stats['attempts']
+            filled = ', '.join(f"{field} {count}" for field, count in stats['filled'].items()) or '-'
+            lines.append(f"{name[:47]:<48}{attempts:>9}{stats['hits']:>7}"
+                         f"{100 * stats['hits'] / max(attempts, 1):>6.0f}%"
+                         f"{stats['seconds'] * 1000:>10.1f}{stats['seconds'] * 1000 / max(attempts, 1):>9.3f}"
+                         f"{100 * stats['seconds'] / (self.page_seconds or 1):>7.1f}%  {filled}")
+        dead = [name for name, stats in self.strategies.items() if stats['fields'] and not stats['hits']]
+        if dead:
+            lines.append(f"Never filled a field: {', '.join(dead)}")
+        return '\n'.join(lines)
+
+# Strategy name of the timer around a whole page
+PAGE = 'total per page'
+
+# Profile that strategy() (start()/stop()) records into; None while profiling is off
+_active = None
+
+def enable():
+    """
+    Start recording a new profile and return it
+    """
+    global _active
+    _active = ExtractionProfile()
+    return _active
+
+def disable():
+    """
+    Stop recording and return the recorded profile
+    """
+    global _active
+    profile, _active = _active, None
+    return profile
+
+def active():
+    return _active
+
+def start(strategy, record, *fields):
+    """
+    Begin timing a strategy that may fill the given fields of a TenderRecord
+
+    Returns None right away while profiling is off. The extraction code uses
+    strategy(), which pairs start() and stop().
+    """
+    if _active is None:
+        return None
+    return (strategy, fields, [getattr(record, field) for field in fields], record, time.perf_counter())
+
+def stop(step):
+    """
+    Finish timing a strategy started with start()
+    """
+    if step is None or _active is None:
+        return
+    strategy, fields, before, record, started = step
+    seconds = time.perf_counter() - started
+    if not fields and strategy == PAGE:
+        _active.record_page(seconds)
+        return
+    filled = [field for field, value in zip(fields, before)
+              if value is None and getattr(record, field) is not None]
+    _active.record(strategy, fields, seconds, filled)
+
+class _Timer:
+    # Context manager around one strategy; stops its timer however the block is left
+    __slots__ = ('step',)
+
+    def __init__(self, step):
+        self.step = step
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stop(self.step)
+        return False
+
+# Shared do-nothing context while profiling is off
+_NOT_PROFILING = nullcontext()
+
+def strategy(name, record, *fields):
+    """
+    Time the block of a strategy that may fill the given fields of a TenderRecord
+
+        with extraction_profile.strategy('Vergabe-ID: URL', data, 'vergabe_id'):
+            ...
+
+    The timer is stopped when the block ends, also by an exception. While
+    profiling is off a shared no-op context is returned.
+    """
+    if _active is None:
+        return _NOT_PROFILING
+    return _Timer(start(name, record, *fields))
+
+def profile_pages(pages, repeat=1):
+    """
+    Replay detail pages through extract_tender_data and profile the cascade
+
+    Args:
+        pages (list): HTML of detail pages
+        repeat (int): Number of passes over the pages for steadier timings
+
+    Returns:
+        ExtractionProfile
+    """
+    from evergabe_scrape import extract_tender_data
+
+    profile = enable()
+    try:
+        for _ in range(repeat):
+            for html in pages:
+                extract_tender_data(html)
+    finally:
+        disable()
+    return profile
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profile the selector strategies of extract_tender_data on saved pages")
+    parser.add_argument("paths", nargs='*', help="HTML files (default: latest archived detail pages)")
+    parser.add_argument("--limit", type=int, default=None, help="Number of archived pages to replay")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of passes over the pages")
+    parser.add_argument("--json", help="Also write the profile to this JSON file")
+    args = parser.parse_args()
+
+    if args.paths:
+        pages = []
+        for path in args.paths:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    else:
+        import page_archive
+        archive = page_archive.get_archive()
+        fetches = archive.fetches(page_archive.DETAIL, latest_only=True)[-args.limit if args.limit else None:]
+        pages = [archive.read(fetch['digest']) for fetch in fetches]
+    if not pages:
+        parser.error("no HTML files given and no detail pages archived")
+
+    # Profile through the imported module, which is the one extract_tender_data reports to
+    import extraction_profile
+    profile = extraction_profile.profile_pages(pages, repeat=args.repeat)
+    print(profile.report())
+    if args.json:
+        profile.save(args.json)
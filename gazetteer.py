@@ -0,0 +1,172 @@
+import os
+import re
+import math
+import logging
+from collections import namedtuple, defaultdict
+from query_planner import normalize_term
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Bundled gazetteer: lead city of every two-digit PLZ region plus further places;
+# it has no postcode rows, so without GEONAMES_FILE a PLZ only resolves to its region
+BUNDLED_FILE = os.path.join(DATA_DIR, 'gazetteer_de.tsv')
+
+# Optional full postcode list in the GeoNames postal code format (DE.txt from
+# download.geonames.org/export/zip/); used for postcode-level precision when present
+GEONAMES_FILE = os.environ.get('GAZETTEER_FILE') or os.path.join(DATA_DIR, 'DE.txt')
+
+EARTH_RADIUS_KM = 6371.0
+
+# A resolved location.
+#   lat, lon:  WGS84 coordinates
+#   postcode:  the postcode found in the text, or None for matches by place name
+#   place:     gazetteer place name
+#   precision: 'postcode' (exact postcode), 'region' (approximate: the lead city of the PLZ
+#              region, or the mean of its postcodes with GEONAMES_FILE) or 'place'
+Location = namedtuple('Location', ['lat', 'lon', 'postcode', 'place', 'precision'])
+
+_POSTCODE_RE = re.compile(r'(?<!\d)(\d{5})(?!\d)')
+
+# Qualifiers that distinguish places of the same name
+_NAME_SUFFIX_RE = re.compile(r'\s*\(|\s+(?:am|an|im|in|bei|vor|ob)\s+')
+
+# Words in front of or after a place name that are not part of it
+_FILLER_WORDS = {'stadt', 'gemeinde', 'landkreis', 'kreis', 'in', 'der', 'die', 'das', 'deutschland', 'de'}
+
+# Place names are matched on up to this many consecutive words
+_MAX_NAME_WORDS = 5
+
+class Gazetteer:
+    """
+    In-memory index of postcodes, PLZ regions and place names
+
+    locate() tries, in this order: a five-digit postcode in the text (exact if
+    the full GeoNames list is installed, else approximated by its three- or
+    two-digit region, which can be tens of kilometers off), then the longest run of words that is a known place
+    name. All lookups are dict accesses, cheap enough to run for every
+    inserted tender.
+    """
+    def __init__(self, paths=None):
+        self.postcodes = {}
+        self.regions = {}
+        self.places = {}
+        self.aliases = {}
+        region_points = defaultdict(list)
+
+        for path in paths or [BUNDLED_FILE, GEONAMES_FILE]:
+            if not os.path.exists(path):
+                continue
+            geonames = path != BUNDLED_FILE
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith('#') or line.startswith('plz\t'):
+                        continue
+                    parts = line.rstrip('\n').split('\t')
+                    try:
+                        if geonames:
+                            code, place, lat, lon = parts[1], parts[2], float(parts[9]), float(parts[10])
+                        else:
+                            code, place, lat, lon = parts[0], parts[1], float(parts[2]), float(parts[3])
+                    except (IndexError, ValueError):
+                        continue
+                    self._add(code, place, lat, lon, region_points)
+
+        # Region points from full postcode lists; bundled region rows take precedence
+        for prefix, points in region_points.items():
+            if prefix not in self.regions:
+                lat = sum(point[0] for point in points) / len(points)
+                lon = sum(point[1] for point in points) / len(points)
+                self.regions[prefix] = (lat, lon, points[0][2])
+        logger.info(f"Gazetteer: {len(self.postcodes)} postcodes, {len(self.regions)} regions, "
+                    f"{len(self.places)} places")
+
+    def _add(self, code, place, lat, lon, region_points):
+        if len(code) == 5:
+            self.postcodes.setdefault(code, (lat, lon, place))
+            region_points[code[:3]].append((lat, lon, place))
+            region_points[code[:2]].append((lat, lon, place))
+        elif len(code) in (2, 3):
+            # The first row of a region is its lead city
+            self.regions.setdefault(code, (lat, lon, place))
+
+        key = normalize_term(place)
+        if key:
+            self.places.setdefault(key, (lat, lon, place))
+
+        # 'Halle (Saale)' is also found as 'Halle'; ambiguous short names ('Frankfurt') are dropped
+        alias = normalize_term(_NAME_SUFFIX_RE.split(place)[0])
+        if alias and alias != key:
+            if alias not in self.aliases:
+                self.aliases[alias] = (lat, lon, place)
+            elif self.aliases[alias] is not None and self.aliases[alias][2] != place:
+                # None marks the alias as ambiguous for all further places of that name
+                self.aliases[alias] = None
+
+    def locate(self, text):
+        """
+        Resolve a free-text Leistungsort to coordinates
+
+        Returns:
+            Location: The resolved location, or None
+        """
+        if not text:
+            return None
+
+        for postcode in _POSTCODE_RE.findall(text):
+            if postcode in self.postcodes:
+                lat, lon, place = self.postcodes[postcode]
+                return Location(lat, lon, postcode, place, 'postcode')
+            for prefix in (postcode[:3], postcode[:2]):
+                if prefix in self.regions:
+                    lat, lon, place = self.regions[prefix]
+                    return Location(lat, lon, postcode, place, 'region')
+
+        words = [word for word in normalize_term(text).split() if not word.isdigit()]
+        for size in range(min(_MAX_NAME_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                if size == 1 and words[start] in _FILLER_WORDS:
+                    continue
+                name = ' '.join(words[start:start + size])
+                match = self.places.get(name) or self.aliases.get(name)
+                if match:
+                    lat, lon, place = match
+                    return Location(lat, lon, None, place, 'place')
+        return None
+
+_gazetteer = None
+
+def get_gazetteer():
+    """
+    The process-wide gazetteer, loaded on first use
+    """
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
+
+def locate(text):
+    return get_gazetteer().locate(text)
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points in kilometers
+    """
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Latitude and longitude range that contains every point within radius_km
+
+    Returns:
+        tuple: (min_lat, max_lat, min_lon, max_lon)
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 0.01)))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
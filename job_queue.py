@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import logging
+import subprocess
+from datetime import datetime, timedelta
+from database import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Kinds of jobs the worker executes
+SCRAPE = 'scrape'
+ENRICH = 'enrich'
+
+# Job states; a job is active while it is queued or running
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# A worker that has not sent a heartbeat for this long is considered dead
+WORKER_TIMEOUT = timedelta(seconds=60)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrape_worker.py')
+WORKER_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrape_worker.log')
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _params_key(kind, params):
+    canonical = json.dumps([kind, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+def _job(row):
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    return job
+
+def submit_job(kind, params):
+    """
+    Queue a job, or join the queued or running job with the same parameters
+
+    Args:
+        kind (str): SCRAPE or ENRICH
+        params (dict): JSON-serializable job parameters
+
+    Returns:
+        tuple: (job_id, coalesced) where coalesced is True if an existing job was joined
+    """
+    key = _params_key(kind, params)
+    conn = get_connection()
+
+    try:
+        try:
+            cursor = conn.execute(
+                "INSERT INTO scrape_jobs (kind, params, params_key, status, submitted_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(params, ensure_ascii=False), key, QUEUED, _now()))
+            conn.commit()
+            logger.info(f"Queued {kind} job {cursor.lastrowid}")
+            return cursor.lastrowid, False
+        except sqlite3.IntegrityError:
+            # The partial unique index allows one active job per parameter set
+            conn.rollback()
+            conn.execute("UPDATE scrape_jobs SET requests = requests + 1 "
+                         "WHERE params_key = ? AND status IN (?, ?)", (key, QUEUED, RUNNING))
+            conn.commit()
+            row = conn.execute("SELECT job_id FROM scrape_jobs WHERE params_key = ? AND status IN (?, ?)",
+                               (key, QUEUED, RUNNING)).fetchone()
+            if row is None:
+                # The other job finished in between
+                return submit_job(kind, params)
+            return row[0], True
+    finally:
+        conn.close()
+
+def get_job(job_id):
+    """
+    Current state of a job
+
+    Returns:
+        dict: Job row with decoded params, or None
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        row = conn.execute("SELECT * FROM scrape_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+    finally:
+        conn.close()
+
+def get_active_jobs():
+    """
+    Queued and running jobs, oldest first
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        rows = conn.execute("SELECT * FROM scrape_jobs WHERE status IN (?, ?) ORDER BY job_id",
+                            (QUEUED, RUNNING)).fetchall()
+        return [_job(row) for row in rows]
+    finally:
+        conn.close()
+
+def claim_next_job(worker_pid):
+    """
+    Move the oldest queued job to running for this worker
+
+    Returns:
+        dict: Claimed job, or None if the queue is empty
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        # BEGIN IMMEDIATE takes the write lock, so two workers never claim the same job
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute("SELECT * FROM scrape_jobs WHERE status = ? ORDER BY job_id LIMIT 1",
+                           (QUEUED,)).fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        conn.execute("UPDATE scrape_jobs SET status = ?, worker_pid = ?, started_at = ?, message = NULL "
+                     "WHERE job_id = ?", (RUNNING, worker_pid, _now(), row['job_id']))
+        conn.commit()
+        job = _job(row)
+        job['status'] = RUNNING
+        return job
+    finally:
+        conn.close()
+
+def update_job(job_id, progress_done=None, progress_total=None, message=None, run_id=None):
+    """
+    Record progress of a running job
+    """
+    fields = {'progress_done': progress_done, 'progress_total': progress_total,
+              'message': message, 'run_id': run_id}
+    fields = {column: value for column, value in fields.items() if value is not None}
+    if not fields:
+        return
+
+    conn = get_connection()
+
+    try:
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        conn.execute(f"UPDATE scrape_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def finish_job(job_id, total_records=None, new_records=None, message=None):
+    """
+    Mark a job as done
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute("UPDATE scrape_jobs SET status = ?, finished_at = ?, total_records = ?, new_records = ?, "
+                     "message = COALESCE(?, message) WHERE job_id = ?",
+                     (DONE, _now(), total_records, new_records, message, job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def fail_job(job_id, error):
+    """
+    Mark a job as failed with an error message
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute("UPDATE scrape_jobs SET status = ?, finished_at = ?, error = ? WHERE job_id = ?",
+                     (FAILED, _now(), str(error), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def _heartbeat_cutoff():
+    return (datetime.now() - WORKER_TIMEOUT).strftime('%Y-%m-%d %H:%M:%S')
+
+def register_worker(pid, single=True):
+    """
+    Register a worker unless another live worker exists
+
+    Args:
+        pid (int): Process ID of the worker
+        single (bool): Refuse to register if another worker is alive
+
+    Returns:
+        bool: True if the worker was registered
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        other = conn.execute("SELECT pid FROM job_workers WHERE pid != ? AND heartbeat_at >= ?",
+                             (pid, _heartbeat_cutoff())).fetchone()
+        if single and other:
+            conn.rollback()
+            return False
+        conn.execute("INSERT OR REPLACE INTO job_workers (pid, started_at, heartbeat_at) VALUES (?, ?, ?)",
+                     (pid, _now(), _now()))
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+def worker_heartbeat(pid):
+    """
+    Refresh the heartbeat of a registered worker
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute("UPDATE job_workers SET heartbeat_at = ? WHERE pid = ?", (_now(), pid))
+        conn.commit()
+    finally:
+        conn.close()
+
+def remove_worker(pid):
+    conn = get_connection()
+
+    try:
+        conn.execute("DELETE FROM job_workers WHERE pid = ?", (pid,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def live_workers():
+    """
+    PIDs of workers whose last heartbeat is recent
+    """
+    conn = get_connection()
+
+    try:
+        return [row[0] for row in conn.execute("SELECT pid FROM job_workers WHERE heartbeat_at >= ?",
+                                               (_heartbeat_cutoff(),))]
+    finally:
+        conn.close()
+
+def requeue_orphaned_jobs():
+    """
+    Put running jobs of dead workers back into the queue
+
+    A scrape job keeps its run_id, so the next worker resumes the run from the
+    run journal instead of starting over.
+
+    Returns:
+        int: Number of requeued jobs
+    """
+    alive = set(live_workers())
+    conn = get_connection()
+
+    try:
+        rows = conn.execute("SELECT job_id, worker_pid FROM scrape_jobs WHERE status = ?", (RUNNING,)).fetchall()
+        orphaned = [job_id for job_id, pid in rows if pid not in alive]
+        conn.executemany("UPDATE scrape_jobs SET status = ?, worker_pid = NULL, message = 'requeued' "
+                         "WHERE job_id = ?", [(QUEUED, job_id) for job_id in orphaned])
+        conn.commit()
+        if orphaned:
+            logger.info(f"Requeued {len(orphaned)} jobs of stopped workers")
+        return len(orphaned)
+    finally:
+        conn.close()
+
+def ensure_worker(idle_exit=300):
+    """
+    Start a worker process in the background unless one is already running
+
+    Args:
+        idle_exit (int): Seconds the started worker waits for new jobs before it exits
+
+    Returns:
+        bool: True if a new worker was started
+    """
+    if live_workers():
+        return False
+
+    with open(WORKER_LOG, 'a') as log:
+        subprocess.Popen([sys.executable, WORKER_SCRIPT, '--idle-exit', str(idle_exit)],
+                         stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                         cwd=os.path.dirname(WORKER_SCRIPT), start_new_session=True)
+    logger.info("Started background scrape worker")
+    return True
@@ -0,0 +1,433 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# PAGE_ARCHIVE points several scraper workers at one shared archive
+ARCHIVE_DIR = os.environ.get('PAGE_ARCHIVE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'page_archive')
+
+# A new segment file is started once the current one reaches this size
+SEGMENT_BYTES = 256 * 1024 * 1024
+
+# Kinds of archived pages
+LIST = 'list'
+DETAIL = 'detail'
+
+# Tables of the tender database that rebuild_database() recreates from the
+# archived pages; replace_database() copies every other table (labels, alerts,
+# change log, documents, run journal, jobs) from the previous database
+REBUILT_TABLES = ('tenders', 'tender_hits', 'tender_stats', 'tender_locations')
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+class PageArchive:
+    """
+    Append-only archive of fetched HTML pages
+
+    Every distinct page body is stored once, zlib-compressed, at the end of a
+    segment file (segment_00001.bin, ...). index.db records where each body
+    lives and every fetch of a URL with its time, kind and metadata, so a URL
+    fetched daily without changes costs one index row per fetch. Segments are
+    never rewritten; appends are serialized by the write lock of the index.
+    """
+    def __init__(self, path=None):
+        self.path = path or ARCHIVE_DIR
+        os.makedirs(self.path, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS bodies (
+                digest TEXT PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+            ''')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS fetches (
+                fetch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                digest TEXT NOT NULL REFERENCES bodies(digest),
+                meta TEXT
+            )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches(url, fetched_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fetches_kind ON fetches(kind, fetched_at)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.path, 'index.db'), timeout=60)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, f'segment_{segment:05d}.bin')
+
+    def add(self, url, html, kind, meta=None, fetched_at=None):
+        """
+        Record a fetch of url; the body is only written if it is not archived yet
+
+        Args:
+            url (str): Fetched URL
+            html (str): Page body
+            kind (str): LIST or DETAIL
+            meta (dict, optional): JSON-serializable context, e.g. the search query of a list page
+            fetched_at (str, optional): Fetch time, default now
+
+        Returns:
+            tuple: (digest, stored) where stored is False if the body was already archived
+        """
+        data = (html or '').encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        conn = self._connect()
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            stored = conn.execute("SELECT 1 FROM bodies WHERE digest = ?", (digest,)).fetchone() is None
+            if stored:
+                compressed = zlib.compress(data, 6)
+                segment = conn.execute("SELECT MAX(segment) FROM bodies").fetchone()[0] or 1
+                path = self._segment_path(segment)
+                if os.path.exists(path) and os.path.getsize(path) + len(compressed) > SEGMENT_BYTES:
+                    segment += 1
+                    path = self._segment_path(segment)
+                with open(path, 'ab') as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(compressed)
+                    f.flush()
+                    os.fsync(f.fileno())
+                conn.execute("INSERT INTO bodies (digest, segment, offset, length, size) VALUES (?, ?, ?, ?, ?)",
+                             (digest, segment, offset, len(compressed), len(data)))
+            conn.execute("INSERT INTO fetches (url, kind, fetched_at, digest, meta) VALUES (?, ?, ?, ?, ?)",
+                         (url, kind, fetched_at or _now(), digest,
+                          json.dumps(meta, ensure_ascii=False) if meta is not None else None))
+            conn.commit()
+            return digest, stored
+        finally:
+            conn.close()
+
+    def read(self, digest):
+        """
+        Body of an archived page
+
+        Returns:
+            str: The HTML, or None if the digest is unknown
+        """
+        conn = self._connect()
+
+        try:
+            row = conn.execute("SELECT segment, offset, length FROM bodies WHERE digest = ?", (digest,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        segment, offset, length = row
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode('utf-8')
+
+    def history(self, url):
+        """
+        All fetches of a URL, oldest first
+
+        Returns:
+            list: (fetched_at, digest) tuples
+        """
+        conn = self._connect()
+
+        try:
+            return conn.execute("SELECT fetched_at, digest FROM fetches WHERE url = ? ORDER BY fetched_at, fetch_id",
+                                (url,)).fetchall()
+        finally:
+            conn.close()
+
+    def latest(self, url):
+        """
+        Body of the most recent fetch of a URL, or None
+        """
+        history = self.history(url)
+        return self.read(history[-1][1]) if history else None
+
+    def fetches(self, kind=None, latest_only=False, after_id=None):
+        """
+        Archived fetches, oldest first
+
+        Args:
+            kind (str, optional): Only fetches of this kind
+            latest_only (bool): Only the most recent fetch of each URL
+            after_id (int, optional): Only fetches with a higher fetch_id
+
+        Returns:
+            list: dicts with fetch_id, url, kind, fetched_at, digest and decoded meta
+        """
+        query = "SELECT fetch_id, url, kind, fetched_at, digest, meta FROM fetches WHERE 1=1"
+        params = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if after_id:
+            query += " AND fetch_id > ?"
+            params.append(after_id)
+        query += " ORDER BY fetched_at, fetch_id"
+
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+
+        try:
+            rows = [dict(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+        for row in rows:
+            row['meta'] = json.loads(row['meta']) if row['meta'] else {}
+        if latest_only:
+            rows = list({row['url']: row for row in rows}.values())
+        return rows
+
+    def stats(self):
+        """
+        Number of fetches and distinct bodies, and their raw and stored size in bytes
+        """
+        conn = self._connect()
+
+        try:
+            fetches = conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0]
+            bodies, raw, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM bodies").fetchone()
+            fetched = conn.execute("SELECT COALESCE(SUM(b.size), 0) FROM fetches f "
+                                   "JOIN bodies b ON b.digest = f.digest").fetchone()[0]
+        finally:
+            conn.close()
+        return {'fetches': fetches, 'bodies': bodies, 'fetched_bytes': fetched,
+                'raw_bytes': raw, 'stored_bytes': stored}
+
+# One archive per path and process; the index is opened per call, so this is cheap to share
+_archives = {}
+
+def get_archive(path=None):
+    path = path or ARCHIVE_DIR
+    if path not in _archives:
+        _archives[path] = PageArchive(path)
+    return _archives[path]
+
+def archive_page(url, html, kind, meta=None):
+    """
+    Record a fetched page in the default archive
+    """
+    digest, stored = get_archive().add(url, html, kind, meta)
+    logger.debug(f"Archived {kind} page {url} ({'new' if stored else 'unchanged'} body {digest[:12]})")
+    return digest
+
+def _extract_list_page(job):
+    # Runs in a worker process: parse a result list page into (row, terms) pairs
+    from evergabe_scrape import select_list_items, extract_tender_from_list_item
+    from query_planner import PlannedQuery, terms_for_hit
+
+    path, digest, meta = job
+    query = meta.get('query')
+    planned = PlannedQuery(**meta['planned']) if meta.get('planned') else None
+    results = []
+    for item in select_list_items(get_archive(path).read(digest)):
+        record = extract_tender_from_list_item(item, query)
+        if record is not None:
+            results.append((record.as_row(), terms_for_hit(record, planned) if planned else [query]))
+    return results
+
+def _extract_detail_page(job):
+    # Runs in a worker process: parse a detail page into a row
+    from evergabe_scrape import extract_tender_data
+    from change_detection import content_hash
+
+    path, digest, url = job
+    html = get_archive(path).read(digest)
+    record = extract_tender_data(html, url)
+    record.content_hash = content_hash(html)
+    return record.as_row()
+
+def rebuild_database(db_path, archive_path=None, processes=None):
+    """
+    Rebuild the tender database from archived pages without network access
+
+    The result lists are replayed through extract_tender_from_list_item and the
+    latest detail page of each tender through extract_tender_data, in parallel
+    worker processes. Each tender keeps the time its first list page was
+    fetched as its scrape date; tenders without an archived detail page are
+    marked as pending for enrich_pending_details().
+
+    Args:
+        db_path (str): Database file to create; it must not exist
+        archive_path (str, optional): Archive directory, default ARCHIVE_DIR
+        processes (int, optional): Number of worker processes, default one per CPU
+
+    Returns:
+        int: Number of rebuilt tenders
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import database
+    from tender_record import TenderRecord, TenderBatch
+
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists")
+
+    archive = get_archive(archive_path)
+    list_fetches = archive.fetches(LIST)
+    detail_fetches = archive.fetches(DETAIL, latest_only=True)
+    logger.info(f"Replaying {len(list_fetches)} list pages and {len(detail_fetches)} detail pages")
+
+    with ProcessPoolExecutor(processes) as pool:
+        list_results = pool.map(_extract_list_page,
+                                [(archive.path, fetch['digest'], fetch['meta']) for fetch in list_fetches],
+                                chunksize=4)
+        detail_results = pool.map(_extract_detail_page,
+                                  [(archive.path, fetch['digest'], fetch['url']) for fetch in detail_fetches],
+                                  chunksize=4)
+
+        # Latest list values per link, all terms it was found under and the first time it was seen
+        tenders = {}
+        for fetch, results in zip(list_fetches, list_results):
+            for row, terms in results:
+                entry = tenders.setdefault(row['link'], {'row': row, 'terms': [], 'first_seen': fetch['fetched_at']})
+                entry['row'] = row
+                entry['terms'].extend(term for term in terms if term not in entry['terms'])
+
+        details = {fetch['url']: row for fetch, row in zip(detail_fetches, detail_results)}
+
+    batches = defaultdict(TenderBatch)
+    for link, entry in tenders.items():
+        record = TenderRecord(**entry['row'])
+        if link in details:
+            record.merge(TenderRecord(**details[link]))
+            record.content_hash = details[link]['content_hash']
+            record.detail_status = None
+        else:
+            record.detail_status = 'pending'
+        for term in entry['terms'] or [None]:
+            batches[entry['first_seen']].append(record, suchbegriff=term)
+
+    # The database functions write to DATABASE_PATH; it points at the new file only meanwhile
+    live_path = database.DATABASE_PATH
+    database.DATABASE_PATH = db_path
+    try:
+        database.initialize_database()
+        for scrape_date, batch in sorted(batches.items()):
+            database.insert_tenders(batch, scrape_date=scrape_date)
+    finally:
+        database.DATABASE_PATH = live_path
+
+    logger.info(f"Rebuilt {len(tenders)} tenders ({len(details)} with detail pages) in {db_path}")
+    return len(tenders)
+
+def copy_other_tables(source_path, rebuilt_path):
+    """
+    Copy all tables that are not rebuilt from pages into a rebuilt database
+
+    Columns are matched by name, so a previous database whose tables were
+    migrated column by column is copied correctly. The alert scan position
+    refers to the old tenders.id values; it is moved past all rebuilt tenders,
+    and the tenders the scan had not reached yet are queued in alert_rescan.
+
+    Returns:
+        int: Number of copied tables
+    """
+    conn = sqlite3.connect(rebuilt_path)
+
+    try:
+        conn.execute("ATTACH DATABASE ? AS source", (source_path,))
+        tables = [row[0] for row in conn.execute("SELECT name FROM source.sqlite_master "
+                                                 "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        copied = 0
+        for table in tables:
+            # tender_locations_node, _rowid and _parent are the R*Tree's own tables
+            if table in REBUILT_TABLES or table.startswith('tender_locations_'):
+                continue
+            target_columns = {row[1] for row in conn.execute(f'PRAGMA main.table_info("{table}")')}
+            if not target_columns:
+                logger.warning(f"Table {table} is not part of the current schema and is not copied")
+                continue
+            columns = ', '.join(f'"{row[1]}"' for row in conn.execute(f'PRAGMA source.table_info("{table}")')
+                                if row[1] in target_columns)
+            conn.execute(f'DELETE FROM main."{table}"')
+            conn.execute(f'INSERT INTO main."{table}" ({columns}) SELECT {columns} FROM source."{table}"')
+            copied += 1
+        # Tenders the alert scan had not reached are queued for it, all others count as scanned
+        conn.execute("INSERT OR IGNORE INTO main.alert_rescan (tender_key) SELECT tender_key FROM source.tenders "
+                     "WHERE id > COALESCE((SELECT value FROM source.alert_state WHERE name = 'last_tender_id'), 0)")
+        conn.execute("INSERT OR REPLACE INTO main.alert_state (name, value) "
+                     "SELECT 'last_tender_id', COALESCE(MAX(id), 0) FROM main.tenders")
+
+        missing = conn.execute("SELECT COUNT(*) FROM source.tenders WHERE tender_key NOT IN "
+                               "(SELECT tender_key FROM main.tenders)").fetchone()[0]
+        if missing:
+            logger.warning(f"{missing} tenders of {source_path} have no archived pages "
+                           "and are not in the rebuilt database")
+        conn.commit()
+        logger.info(f"Copied {copied} tables from {source_path}")
+        return copied
+    finally:
+        conn.close()
+
+def replace_database(rebuilt_path, db_path):
+    """
+    Move a rebuilt database into place, keeping the previous one as <db_path>.bak
+
+    The tables that are not derived from pages are copied from the previous
+    database first. Stop the app and the scrape workers before, they keep the
+    old file open and would write to it during the copy.
+    """
+    backup = db_path + '.bak'
+    if os.path.exists(db_path):
+        copy_other_tables(db_path, rebuilt_path)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.replace(db_path + suffix, backup + suffix)
+        logger.info(f"Previous database kept as {backup}")
+    os.replace(rebuilt_path, db_path)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the page archive and rebuild the tender database from it")
+    parser.add_argument("--archive", default=None, help="Archive directory (default: page_archive)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Show the number of archived pages and the space they use")
+
+    show = commands.add_parser("show", help="Print the latest archived body of a URL")
+    show.add_argument("url")
+
+    rebuild = commands.add_parser("rebuild", help="Re-extract all archived pages into a new database")
+    rebuild.add_argument("--db", default=None, help="Database file to write (default: replace tenders.db)")
+    rebuild.add_argument("--processes", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        stats = get_archive(args.archive).stats()
+        ratio = stats['fetched_bytes'] / max(stats['stored_bytes'], 1)
+        print(f"{stats['fetches']} fetches, {stats['bodies']} distinct pages")
+        print(f"{stats['fetched_bytes'] / 1e6:.1f} MB fetched, {stats['raw_bytes'] / 1e6:.1f} MB distinct, "
+              f"{stats['stored_bytes'] / 1e6:.1f} MB stored ({ratio:.1f}x smaller)")
+    elif args.command == "show":
+        html = get_archive(args.archive).latest(args.url)
+        if html is None:
+            parser.exit(1, f"{args.url} is not archived\n")
+        print(html)
+    else:
+        import database
+
+        target = args.db or database.DATABASE_PATH
+        rebuilt = target + '.rebuild' if args.db is None else target
+        if os.path.exists(rebuilt):
+            parser.error(f"{rebuilt} already exists")
+        rebuild_database(rebuilt, args.archive, args.processes)
+        if args.db is None:
+            replace_database(rebuilt, target)
@@ -0,0 +1,51 @@
+import streamlit as st
+import database
+
+# Statistics read only the pre-aggregated tender_stats table, so this page
+# loads in constant time however long the tender history gets
+database.initialize_database()
+
+st.set_page_config(page_title="Evergabe Statistics", page_icon="📊", layout="wide")
+st.title("Tender Statistics")
+
+overview = database.get_stats_overview()
+if not overview.get('tenders'):
+    st.warning("No entries found in the database.")
+    st.stop()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Tenders", f"{overview['tenders']:,}".replace(',', '.'))
+col2.metric("Clients", overview['client'])
+col3.metric("Locations", overview['location'])
+col4.metric("Search terms", overview['term'])
+
+with st.sidebar:
+    st.header("Statistics Options")
+    weeks = st.slider("Weeks to show", min_value=4, max_value=104, value=26)
+    top_n = st.slider("Entries per ranking", min_value=5, max_value=100, value=20)
+
+# Tenders per publication week, oldest first for the chart
+st.subheader("Tenders per Publication Week")
+per_week = database.get_stats('week', limit=weeks, by_value=True)
+per_week = per_week[per_week['value'] != ''].sort_values('value')
+if per_week.empty:
+    st.info("No publication dates stored yet.")
+else:
+    st.bar_chart(per_week.rename(columns={'value': 'Week', 'tenders': 'Tenders'}).set_index('Week'))
+
+def ranking(dimension, label):
+    df = database.get_stats(dimension, limit=top_n)
+    df['value'] = df['value'].replace('', 'Nicht verfügbar')
+    st.dataframe(df.rename(columns={'value': label, 'tenders': 'Tenders'}),
+                 use_container_width=True, hide_index=True)
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.subheader("Top Clients")
+    ranking('client', 'Auftraggeber')
+with col2:
+    st.subheader("Top Locations")
+    ranking('location', 'Leistungsort')
+with col3:
+    st.subheader("Search Terms")
+    ranking('term', 'Suchbegriff')
@@ -0,0 +1,72 @@
+import streamlit as st
+import database
+import relevance
+
+# Labels entered here train the local relevance model; scores are written to
+# tenders.relevance and used by the filter and sort options of the main page
+database.initialize_database()
+
+st.set_page_config(page_title="Evergabe Relevance", page_icon="🎯", layout="wide")
+st.title("Tender Relevance")
+
+model = relevance.get_model()
+if model is None:
+    st.info("No relevance model trained yet. Mark some tenders as relevant and some as not relevant, then train.")
+else:
+    meta = model.meta
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Labels", meta.get('labels', 0))
+    col2.metric("Relevant", meta.get('relevant', 0))
+    col3.metric("Trained", meta.get('trained_at', '-'))
+    holdout = meta.get('holdout')
+    if holdout:
+        kept = f"{holdout['recall']:.0%}" if holdout['recall'] is not None else "-"
+        st.caption(f"On {holdout['tenders']} held-out labels: accuracy {holdout['accuracy']:.0%}, "
+                   f"relevant tenders kept {kept}, tenders filtered out {holdout['skipped']:.0%}")
+
+with st.sidebar:
+    st.header("Relevance Options")
+    show_labelled = st.checkbox("Show labelled tenders", value=False,
+                                help="Review and change earlier decisions instead of labelling new tenders")
+    limit = st.slider("Tenders to show", min_value=10, max_value=500, value=50, step=10)
+
+# Unlabelled tenders the model is least sure about come first; they teach it the most
+st.subheader("Labelled Tenders" if show_labelled else "Tenders to Review")
+queue = relevance.get_review_queue(limit=limit, labelled=show_labelled)
+if queue.empty:
+    st.warning("No tenders to show.")
+else:
+    labels = {1: 'relevant', 0: 'not relevant'}
+    queue['Label'] = queue['label'].map(labels)
+    edited = st.data_editor(
+        queue[['Label', 'relevance', 'ausschreibungstitel', 'auftraggeber', 'leistungsort',
+               'naechste_frist', 'link']].rename(columns={
+                   'relevance': 'Relevanz', 'ausschreibungstitel': 'Ausschreibungstitel',
+                   'auftraggeber': 'Auftraggeber', 'leistungsort': 'Leistungsort',
+                   'naechste_frist': 'nächste Frist', 'link': 'Link zur Ausschreibung'}),
+        column_config={
+            'Label': st.column_config.SelectboxColumn(options=list(labels.values())),
+            'Relevanz': st.column_config.NumberColumn(format="%.2f"),
+            'Link zur Ausschreibung': st.column_config.LinkColumn(),
+        },
+        disabled=['Relevanz', 'Ausschreibungstitel', 'Auftraggeber', 'Leistungsort', 'nächste Frist',
+                  'Link zur Ausschreibung'],
+        use_container_width=True, hide_index=True)
+
+    # Only changed rows are saved; clearing a label removes it
+    values = {text: label for label, text in labels.items()}
+    changed = [(key, values.get(value)) for key, value, old in zip(queue['tender_key'], edited['Label'], queue['Label'])
+               if values.get(value) != values.get(old)]
+    if st.button(f"Save labels ({len(changed)})", disabled=not changed):
+        for key, label in changed:
+            relevance.set_label(key, label)
+        st.rerun()
+
+if st.button("Train and rescore", type="primary",
+             help="Train the model on all labels and score every stored tender"):
+    with st.spinner("Training..."):
+        meta = relevance.train()
+    if meta is None:
+        st.warning("At least two relevant and two not relevant tenders need to be labelled first.")
+    else:
+        st.rerun()
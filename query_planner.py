@@ -0,0 +1,172 @@
+import re
+import json
+from collections import namedtuple
+
+# A search request sent to the portal.
+#   query:         query string sent to the site
+#   terms:         original terms the query searches for literally
+#   derived_terms: terms whose hits are a subset of this query's hits and are
+#                  assigned by filtering instead of being searched separately
+PlannedQuery = namedtuple('PlannedQuery', ['query', 'terms', 'derived_terms'])
+
+# Query syntax supported by each portal. or_operator combines several terms into one
+# request; phrase wraps multi-word terms in quotes. evergabe.de does not document an
+# OR syntax, so terms are only deduplicated and merged there.
+SITE_SYNTAX = {
+    'evergabe.de': {'or_operator': None, 'phrase': False},
+}
+
+_UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_NON_WORD_RE = re.compile(r'[^\w]+')
+_LIST_MARKER_RE = re.compile(r'^(?:[-*+]|\d+[.)])\s+')
+
+def normalize_term(term):
+    """
+    Normalize a search term for comparisons: case, umlauts, ß/ss, punctuation and whitespace
+
+    'Straßen-Bau ' and 'strassen bau' both become 'strassen bau'.
+    """
+    term = term.casefold().translate(_UMLAUTS)
+    return ' '.join(_NON_WORD_RE.sub(' ', term).split())
+
+def parse_search_terms(content):
+    """
+    Read search terms from an uploaded markdown or text file
+
+    Empty lines, markdown headings and comments ('# ...') are skipped and list
+    markers are removed. Terms that normalize to the same string are kept once,
+    in the spelling of their first occurrence.
+
+    Returns:
+        list: Unique search terms in file order
+    """
+    terms = []
+    seen = set()
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        line = _LIST_MARKER_RE.sub('', line).strip()
+        key = normalize_term(line)
+        if key and key not in seen:
+            seen.add(key)
+            terms.append(line)
+    return terms
+
+def _format_term(term, syntax):
+    if syntax.get('phrase') and ' ' in term.strip():
+        return f'"{term.strip()}"'
+    return term.strip()
+
+def plan_queries(terms, site='evergabe.de', merge_subsumed=False, max_terms_per_query=5,
+                 max_query_length=200):
+    """
+    Turn a list of search terms into as few search requests as possible
+
+    1. Terms that normalize to the same string are searched once.
+    2. With merge_subsumed, a term whose words include all words of a shorter term
+       ('brandschutz gutachten' vs. 'brandschutz') is not searched separately; its
+       hits are picked from the shorter term's results by terms_for_hit(). This is
+       lossy: a hit is only kept if all words of the longer term appear in the
+       title, client, Vergabestelle or location, so tenders the portal matched on
+       their description are dropped. It is therefore off by default.
+    3. If the site supports an OR operator, the remaining terms are combined into
+       queries of up to max_terms_per_query terms.
+
+    Args:
+        terms (list): Search terms as entered by the user
+        site (str): Portal whose query syntax applies (key of SITE_SYNTAX)
+        merge_subsumed (bool): Serve longer terms from the results of shorter ones (may lose hits)
+        max_terms_per_query (int): Maximum number of OR-combined terms per query
+        max_query_length (int): Maximum length of a combined query string
+
+    Returns:
+        list: PlannedQuery tuples
+    """
+    syntax = SITE_SYNTAX.get(site, {})
+
+    # 1. Deduplicate
+    unique = {}
+    for term in terms:
+        key = normalize_term(term)
+        if key and key not in unique:
+            unique[key] = term.strip()
+
+    # 2. Assign terms to the shortest term whose words they contain
+    base_terms = []
+    derived = {}
+    for key in sorted(unique, key=lambda k: (len(k.split()), len(k))):
+        words = set(key.split())
+        parent = None
+        if merge_subsumed:
+            parent = next((base for base in base_terms if set(base.split()) < words), None)
+        if parent:
+            derived.setdefault(parent, []).append(unique[key])
+        else:
+            base_terms.append(key)
+
+    # Keep the order of the input for the remaining requests
+    order = {key: i for i, key in enumerate(unique)}
+    base_terms.sort(key=order.get)
+
+    # 3. Combine with OR where supported
+    or_operator = syntax.get('or_operator')
+    plan = []
+    group = []
+    for key in base_terms:
+        candidate = group + [key]
+        query = f' {or_operator} '.join(_format_term(unique[k], syntax) for k in candidate) if or_operator else ''
+        if group and (not or_operator or len(candidate) > max_terms_per_query or len(query) > max_query_length):
+            plan.append(_planned(group, unique, derived, syntax, or_operator))
+            group = [key]
+        else:
+            group = candidate
+    if group:
+        plan.append(_planned(group, unique, derived, syntax, or_operator))
+
+    return plan
+
+def _planned(group, unique, derived, syntax, or_operator):
+    separator = f' {or_operator} ' if or_operator else ' '
+    query = separator.join(_format_term(unique[key], syntax) for key in group)
+    derived_terms = [term for key in group for term in derived.get(key, [])]
+    return PlannedQuery(query, [unique[key] for key in group], derived_terms)
+
+def _hit_text(data):
+    fields = ('Ausschreibungstitel', 'Auftraggeber', 'Vergabestelle', 'Leistungsort')
+    return ' ' + normalize_term(' '.join(str(data.get(field) or '') for field in fields)) + ' '
+
+# Whole words only: the padded text lets ' bau ' match 'Bau' but not 'Baustelle' or 'Abbau'
+def _matches(term, text):
+    return all(f' {word} ' in text for word in normalize_term(term).split())
+
+def terms_for_hit(data, planned):
+    """
+    Map a hit of a planned query back to the original search terms
+
+    A single literal term always gets the hit. For combined queries the hit goes
+    to every term whose words appear as whole words in the tender's title, client
+    or location; if none does (the portal matched text we don't extract), to all
+    literal terms of the query. Derived terms only get hits that contain all
+    their words.
+
+    Args:
+        data (dict): Tender data from the scraper
+        planned (PlannedQuery): Query that returned the hit
+
+    Returns:
+        list: Original search terms
+    """
+    text = _hit_text(data)
+    if len(planned.terms) == 1:
+        terms = list(planned.terms)
+    else:
+        terms = [term for term in planned.terms if _matches(term, text)] or list(planned.terms)
+    terms.extend(term for term in planned.derived_terms if _matches(term, text))
+    return terms
+
+def plan_to_json(plan):
+    return json.dumps([planned._asdict() for planned in plan], ensure_ascii=False)
+
+def plan_from_json(value):
+    return [PlannedQuery(**item) for item in json.loads(value)] if value else []
@@ -0,0 +1,341 @@
+import os
+import json
+import zlib
+import sqlite3
+import logging
+from datetime import datetime
+from database import get_connection, is_missing
+from query_planner import normalize_term
+
+logger = logging.getLogger(__name__)
+
+# RELEVANCE_MODEL points several workers at one shared model
+MODEL_FILE = os.environ.get('RELEVANCE_MODEL') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'relevance_model.npz')
+
+# Fields the model reads and the prefix that keeps their words apart
+FIELD_PREFIXES = {
+    'ausschreibungstitel': 't',
+    'auftraggeber': 'c',
+    'vergabestelle': 'c',
+    'leistungsort': 'o',
+}
+
+# Number of hashed feature slots; words are hashed with crc32, so the model
+# needs no vocabulary and stays valid for words it has never seen
+DIMENSIONS = 2 ** 18
+
+# Title words of at least this length also contribute their character 4-grams,
+# so that compounds like 'Strahlenschutzmessung' share features with 'Messung'
+NGRAM_MIN_WORD = 8
+
+# Tenders scored per batch when rescoring the database
+BATCH_SIZE = 5000
+
+# Gradient descent settings of train()
+EPOCHS = 300
+LEARNING_RATE = 2.0
+L2 = 1e-4
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def features(row):
+    """
+    Hashed feature indices of a tender row keyed by database column
+
+    Returns:
+        list: Distinct feature indices: field words, title word pairs and
+              character 4-grams of long title words
+    """
+    names = set()
+    for field, prefix in FIELD_PREFIXES.items():
+        value = row.get(field)
+        words = [] if is_missing(value) else normalize_term(str(value)).split()
+        names.update(f'{prefix}:{word}' for word in words)
+        if field != 'ausschreibungstitel':
+            continue
+        names.update(f't2:{first} {second}' for first, second in zip(words, words[1:]))
+        for word in words:
+            if len(word) >= NGRAM_MIN_WORD:
+                names.update(f't4:{word[i:i + 4]}' for i in range(len(word) - 3))
+    return sorted({zlib.crc32(name.encode('utf-8')) % DIMENSIONS for name in names})
+
+def feature_matrix(rows):
+    """
+    Sparse representation of a batch of rows: one flat array of feature
+    indices with one L2-normalized value each, and the row of every entry
+
+    Returns:
+        tuple: (indices, values, row_ids) numpy arrays
+    """
+    import numpy as np
+
+    per_row = [features(row) for row in rows]
+    lengths = np.array([len(indices) for indices in per_row], dtype=np.int64)
+    indices = np.fromiter((index for row_indices in per_row for index in row_indices),
+                          dtype=np.int64, count=int(lengths.sum()))
+    row_ids = np.repeat(np.arange(len(rows)), lengths)
+    values = (1.0 / np.sqrt(np.maximum(lengths, 1)))[row_ids]
+    return indices, values, row_ids
+
+def _sigmoid(z):
+    import numpy as np
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+class RelevanceModel:
+    """
+    Logistic regression over hashed words of title, client and location
+
+    Scoring a batch is one gather of the feature weights and one bincount
+    over the rows; hashing the words of each tender is the only per-row work.
+    """
+    def __init__(self, weights, bias, meta=None):
+        self.weights = weights
+        self.bias = bias
+        self.meta = meta or {}
+
+    def score(self, rows):
+        """
+        Relevance of each row as a probability between 0 and 1
+
+        Returns:
+            numpy.ndarray: One score per row
+        """
+        import numpy as np
+
+        if not len(rows):
+            return np.zeros(0)
+        indices, values, row_ids = feature_matrix(rows)
+        logits = np.bincount(row_ids, weights=self.weights[indices] * values, minlength=len(rows))
+        return _sigmoid(logits + self.bias)
+
+    @classmethod
+    def fit(cls, rows, labels, epochs=EPOCHS, learning_rate=LEARNING_RATE, l2=L2):
+        """
+        Train on rows labelled 1 (relevant) or 0 (not relevant)
+
+        Full-batch gradient descent on the class-balanced log loss; both
+        classes weigh the same however many labels each has.
+        """
+        import numpy as np
+
+        labels = np.asarray(labels, dtype=np.float64)
+        indices, values, row_ids = feature_matrix(rows)
+        positives = labels.sum()
+        negatives = len(labels) - positives
+        sample_weights = np.where(labels == 1, 0.5 / max(positives, 1), 0.5 / max(negatives, 1))
+
+        weights = np.zeros(DIMENSIONS)
+        bias = 0.0
+        for _ in range(epochs):
+            logits = np.bincount(row_ids, weights=weights[indices] * values, minlength=len(labels)) + bias
+            error = (_sigmoid(logits) - labels) * sample_weights
+            gradient = np.bincount(indices, weights=values * error[row_ids], minlength=DIMENSIONS)
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * error.sum()
+        return cls(weights.astype(np.float32), float(bias))
+
+    def save(self, path=None):
+        import numpy as np
+        path = path or MODEL_FILE
+        # Written next to the target and renamed, so that readers never see half a model
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, weights=self.weights, bias=np.array(self.bias),
+                            meta=np.array(json.dumps(self.meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=None):
+        import numpy as np
+        with np.load(path or MODEL_FILE) as data:
+            return cls(data['weights'], float(data['bias']), json.loads(str(data['meta'])))
+
+# Model cache of this process, reloaded when the file changes
+_model = None
+_model_mtime = None
+
+def get_model():
+    """
+    The trained model, or None if none has been trained yet
+    """
+    global _model, _model_mtime
+    if not os.path.exists(MODEL_FILE):
+        _model = _model_mtime = None
+        return None
+    mtime = os.path.getmtime(MODEL_FILE)
+    if mtime != _model_mtime:
+        _model = RelevanceModel.load(MODEL_FILE)
+        _model_mtime = mtime
+    return _model
+
+def score_rows(rows):
+    """
+    Scores for a batch of rows keyed by database column, for insert_tenders
+
+    Returns:
+        list: One float per row, or None for every row if no model is trained
+    """
+    model = get_model()
+    if model is None:
+        return [None] * len(rows)
+    return [round(float(score), 4) for score in model.score(rows)]
+
+def set_label(tender_key, label):
+    """
+    Record a review decision: 1 relevant, 0 not relevant, None removes the label
+    """
+    conn = get_connection()
+
+    try:
+        if label is None:
+            conn.execute("DELETE FROM tender_labels WHERE tender_key = ?", (tender_key,))
+        else:
+            conn.execute("INSERT OR REPLACE INTO tender_labels (tender_key, label, labeled_at) VALUES (?, ?, ?)",
+                         (tender_key, int(label), _now()))
+        conn.commit()
+    finally:
+        conn.close()
+
+def _labelled_rows(conn):
+    conn.row_factory = sqlite3.Row
+    columns = ', '.join(f't.{field}' for field in FIELD_PREFIXES)
+    rows = conn.execute(f"SELECT t.tender_key, {columns}, l.label FROM tender_labels l "
+                        "JOIN tenders t ON t.tender_key = l.tender_key ORDER BY t.tender_key").fetchall()
+    return [dict(row) for row in rows]
+
+def train(holdout=0.2, path=None):
+    """
+    Train the model on all labelled tenders, save it and rescore the database
+
+    A share of the labels is held out first to report how well the model
+    separates relevant from other tenders; the saved model is then trained
+    on all labels.
+
+    Returns:
+        dict: Model metadata with label counts and the holdout metrics, or None
+              if there are not enough labels of both classes
+    """
+    import numpy as np
+
+    conn = get_connection()
+    try:
+        rows = _labelled_rows(conn)
+    finally:
+        conn.close()
+    labels = np.array([row['label'] for row in rows])
+    positives = int(labels.sum())
+    if positives < 2 or len(labels) - positives < 2:
+        logger.warning(f"Need at least two relevant and two not relevant labels, have {positives} "
+                       f"and {len(labels) - positives}")
+        return None
+
+    meta = {'trained_at': _now(), 'labels': len(labels), 'relevant': positives}
+    test = np.random.default_rng(0).random(len(labels)) < holdout
+    if holdout and test.sum() >= 5 and len(set(labels[~test])) == 2:
+        model = RelevanceModel.fit([row for row, t in zip(rows, test) if not t], labels[~test])
+        predicted = model.score([row for row, t in zip(rows, test) if t]) >= 0.5
+        actual = labels[test] == 1
+        meta['holdout'] = {
+            'tenders': int(test.sum()),
+            'accuracy': round(float((predicted == actual).mean()), 3),
+            # Share of relevant tenders above the threshold, and of all tenders below it
+            'recall': round(float(predicted[actual].mean()), 3) if actual.any() else None,
+            'skipped': round(float((~predicted).mean()), 3),
+        }
+
+    model = RelevanceModel.fit(rows, labels)
+    model.meta = meta
+    model.save(path)
+    logger.info(f"Trained relevance model on {len(labels)} labels ({positives} relevant): {meta.get('holdout')}")
+    rescore(model=model)
+    return meta
+
+def rescore(batch_size=BATCH_SIZE, model=None):
+    """
+    Score every stored tender with the given model or the current one, in batches
+
+    Returns:
+        int: Number of tenders scored
+    """
+    model = model or get_model()
+    if model is None:
+        return 0
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    columns = ', '.join(FIELD_PREFIXES)
+
+    try:
+        last_id = scored = 0
+        while True:
+            rows = conn.execute(f"SELECT id, {columns} FROM tenders WHERE id > ? ORDER BY id LIMIT ?",
+                                (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            rows = [dict(row) for row in rows]
+            scores = model.score(rows)
+            conn.executemany("UPDATE tenders SET relevance = ? WHERE id = ?",
+                             [(round(float(score), 4), row['id']) for score, row in zip(scores, rows)])
+            conn.commit()
+            last_id = rows[-1]['id']
+            scored += len(rows)
+        logger.info(f"Rescored {scored} tenders")
+        return scored
+    finally:
+        conn.close()
+
+def get_review_queue(limit=100, labelled=False):
+    """
+    Tenders to review, the ones the model is least sure about first
+
+    Args:
+        limit (int): Maximum number of tenders
+        labelled (bool): Return labelled tenders instead, newest label first
+
+    Returns:
+        pandas.DataFrame: tender_key, label, relevance, title, client, location, deadline and link
+    """
+    import pandas as pd
+
+    query = '''
+    SELECT t.tender_key, l.label, t.relevance, t.ausschreibungstitel, t.auftraggeber,
+           t.leistungsort, t.naechste_frist, t.link
+    FROM tenders t LEFT JOIN tender_labels l ON l.tender_key = t.tender_key
+    '''
+    if labelled:
+        query += " WHERE l.label IS NOT NULL ORDER BY l.labeled_at DESC LIMIT ?"
+    else:
+        query += " WHERE l.label IS NULL ORDER BY ABS(COALESCE(t.relevance, 0.5) - 0.5), t.id DESC LIMIT ?"
+    conn = get_connection()
+
+    try:
+        return pd.read_sql_query(query, conn, params=(limit,))
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    import argparse
+    import database
+    import relevance
+
+    parser = argparse.ArgumentParser(description="Train and apply the local relevance model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    label_parser = commands.add_parser("label", help="Label a tender as relevant (1) or not relevant (0)")
+    label_parser.add_argument("tender_key")
+    label_parser.add_argument("label", choices=("0", "1", "none"))
+
+    commands.add_parser("train", help="Train on all labels, then rescore all tenders")
+    commands.add_parser("rescore", help="Score all tenders with the current model")
+    commands.add_parser("info", help="Show the current model")
+    args = parser.parse_args()
+
+    database.initialize_database()
+    if args.command == "label":
+        relevance.set_label(args.tender_key, None if args.label == "none" else int(args.label))
+    elif args.command == "train":
+        print(relevance.train())
+    elif args.command == "rescore":
+        print(f"{relevance.rescore()} tenders scored")
+    else:
+        model = relevance.get_model()
+        print(model.meta if model else "No model trained yet")
@@ -0,0 +1,117 @@
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from date_parsing import to_sortable, deadline_to_sortable, SORTABLE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Tenders whose deadline ends within this many days are fetched first
+URGENT_DAYS = 7
+
+class BudgetExhausted(Exception):
+    """
+    Raised by RunBudget.limit() when the budget ran out before the work finished
+    """
+
+class RunBudget:
+    """
+    Wall-clock time budget shared by all queries of a run
+
+    limit() runs one unit of work (a list fetch, a detail page) with the
+    remaining time as its timeout; when the time is up the work is cancelled
+    and BudgetExhausted is raised. Work that is skipped or cancelled is
+    recorded as deferred, for the run summary.
+    """
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deferred_terms = []
+        self.deferred_tenders = []
+
+    def remaining(self):
+        return max(0.0, self.started + self.seconds - time.monotonic())
+
+    def exhausted(self):
+        return self.remaining() <= 0
+
+    async def limit(self, awaitable):
+        """
+        Await a coroutine within the remaining budget
+
+        Raises:
+            BudgetExhausted: If the budget is used up before or while it runs;
+                             the coroutine is then cancelled
+        """
+        if self.exhausted():
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise BudgetExhausted()
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        except asyncio.TimeoutError:
+            raise BudgetExhausted() from None
+
+    async def sleep(self, seconds):
+        # Pauses between requests never outlast the budget
+        await asyncio.sleep(min(seconds, self.remaining()))
+
+    def defer_term(self, term):
+        if term not in self.deferred_terms:
+            self.deferred_terms.append(term)
+
+    def defer_tender(self, link):
+        if link not in self.deferred_tenders:
+            self.deferred_tenders.append(link)
+
+    def summary(self):
+        """
+        Budget, time used and what was deferred
+        """
+        return {
+            'budget_seconds': self.seconds,
+            'used_seconds': round(time.monotonic() - self.started, 1),
+            'exhausted': self.exhausted(),
+            'deferred_terms': list(self.deferred_terms),
+            'deferred_tenders': len(self.deferred_tenders),
+        }
+
+def prioritize(items, record_of=lambda item: item, now=None):
+    """
+    Order work so that a budget is spent on the most relevant tenders first
+
+    Tenders whose deadline ends within URGENT_DAYS come first, soonest
+    deadline first; then all others, newest publication first. Tenders whose
+    deadline has passed and items without a record come last.
+
+    Args:
+        items (list): Work items, e.g. result list elements
+        record_of (callable): Returns the TenderRecord of an item, or None
+        now (datetime, optional): Reference time, default now
+
+    Returns:
+        list: The items in processing order (the sort is stable)
+    """
+    now = now or datetime.now(timezone.utc)
+    current = now.astimezone(timezone.utc).strftime(SORTABLE_FORMAT)
+    urgent = (now + timedelta(days=URGENT_DAYS)).astimezone(timezone.utc).strftime(SORTABLE_FORMAT)
+
+    def keys(item):
+        try:
+            record = record_of(item)
+        except Exception:
+            record = None
+        if record is None:
+            return (3, ''), ''
+        published = to_sortable(record.veroeffentlicht_seit) or ''
+        deadline = deadline_to_sortable(record.naechste_frist)
+        if deadline and deadline < current:
+            return (2, ''), published
+        if deadline and deadline <= urgent:
+            return (0, deadline), published
+        return (1, ''), published
+
+    ranked = [(keys(item), item) for item in items]
+    ranked.sort(key=lambda entry: entry[0][1], reverse=True)
+    ranked.sort(key=lambda entry: entry[0][0])
+    return [item for _, item in ranked]
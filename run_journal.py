@@ -0,0 +1,242 @@
+import sqlite3
+import logging
+from datetime import datetime
+from database import get_connection, TENDER_SELECT, COLUMN_MAPPING
+
+logger = logging.getLogger(__name__)
+
+# Kinds of work items recorded in the journal
+TERM = 'term'
+PAGE = 'page'
+TENDER = 'tender'
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def start_run(search_terms, days, plan=None):
+    """
+    Create a new run and register its search terms as pending
+
+    Args:
+        search_terms (list): Search terms (or planned queries) in the order they will be processed
+        days (int): Number of days to look back
+        plan (str, optional): JSON query plan (query_planner.plan_to_json) to restore on resume
+
+    Returns:
+        int: ID of the new run
+    """
+    conn = get_connection()
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO scrape_runs (days, status, started_at, plan) VALUES (?, 'running', ?, ?)",
+                       (days, _now(), plan))
+        run_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT OR IGNORE INTO run_items (run_id, kind, item_key, position, status, updated_at) "
+            "VALUES (?, ?, ?, ?, 'pending', ?)",
+            [(run_id, TERM, term, i, _now()) for i, term in enumerate(search_terms)])
+        conn.commit()
+        logger.info(f"Started run {run_id} with {len(search_terms)} search terms")
+        return run_id
+    finally:
+        conn.close()
+
+def find_interrupted_run():
+    """
+    Find the most recent run that did not finish and is not handled by an active job
+
+    Runs that ran out of their time budget count as unfinished, so that their
+    deferred search terms and tenders can be resumed.
+
+    Returns:
+        dict: run_id, days, started_at, plan, total_terms and done_terms, or None
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        row = conn.execute('''
+        SELECT r.run_id, r.days, r.started_at, r.plan,
+               (SELECT COUNT(*) FROM run_items i
+                WHERE i.run_id = r.run_id AND i.kind = 'term') AS total_terms,
+               (SELECT COUNT(*) FROM run_items i
+                WHERE i.run_id = r.run_id AND i.kind = 'term' AND i.status = 'done') AS done_terms
+        FROM scrape_runs r
+        WHERE r.status IN ('running', 'deferred')
+          AND r.run_id NOT IN (SELECT run_id FROM scrape_jobs
+                               WHERE status IN ('queued', 'running') AND run_id IS NOT NULL)
+        ORDER BY r.run_id DESC LIMIT 1
+        ''').fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Error looking up interrupted runs: {e}")
+        return None
+    finally:
+        conn.close()
+
+def get_run(run_id):
+    """
+    Look up a run by ID
+
+    Returns:
+        dict: run_id, days, status, started_at and plan, or None
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+
+    try:
+        row = conn.execute("SELECT run_id, days, status, started_at, plan FROM scrape_runs WHERE run_id = ?",
+                           (run_id,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def get_pending_terms(run_id):
+    """
+    Search terms of a run that are not finished yet, in their original order
+    """
+    conn = get_connection()
+
+    try:
+        rows = conn.execute(
+            "SELECT item_key FROM run_items WHERE run_id = ? AND kind = ? AND status != 'done' "
+            "ORDER BY position", (run_id, TERM)).fetchall()
+        return [row[0] for row in rows]
+    finally:
+        conn.close()
+
+def get_done_items(run_id, kind, parent=None):
+    """
+    Keys of finished items of one kind, optionally restricted to one parent (e.g. a search term)
+
+    Returns:
+        set: Finished item keys
+    """
+    conn = get_connection()
+
+    try:
+        query = "SELECT item_key FROM run_items WHERE run_id = ? AND kind = ? AND status = 'done'"
+        params = [run_id, kind]
+        if parent is not None:
+            query += " AND parent = ?"
+            params.append(parent)
+        return {row[0] for row in conn.execute(query, params)}
+    finally:
+        conn.close()
+
+def mark_item(run_id, kind, item_key, status='done', parent=None):
+    """
+    Record the status of a term, list page or tender URL
+
+    Args:
+        run_id (int): Run the item belongs to
+        kind (str): TERM, PAGE or TENDER
+        item_key (str): Search term or URL
+        status (str): 'pending', 'done', 'failed' or 'deferred' (skipped when the time budget ran out)
+        parent (str, optional): Search term the page or tender belongs to
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute('''
+        INSERT INTO run_items (run_id, kind, item_key, parent, status, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(run_id, kind, item_key) DO UPDATE SET status = excluded.status,
+            updated_at = excluded.updated_at
+        ''', (run_id, kind, item_key, parent, status, _now()))
+        conn.commit()
+    finally:
+        conn.close()
+
+def record_flush(run_id, total_records, new_records):
+    """
+    Add the counts of a flush to insert_tenders() to the run totals
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute(
+            "UPDATE scrape_runs SET total_records = total_records + ?, new_records = new_records + ? "
+            "WHERE run_id = ?", (total_records, new_records, run_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def finish_run(run_id):
+    """
+    Mark a run as completed, or as deferred if its time budget or a result list
+    that did not load left work for later
+
+    Returns:
+        tuple: (total_records, new_records) of the whole run
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute('''
+        UPDATE scrape_runs SET finished_at = ?,
+            status = CASE WHEN EXISTS (SELECT 1 FROM run_items WHERE run_id = ?
+                                       AND (status = 'deferred' OR (kind = ? AND status IN ('pending', 'failed'))))
+                     THEN 'deferred' ELSE 'completed' END
+        WHERE run_id = ?
+        ''', (_now(), run_id, TERM, run_id))
+        conn.commit()
+        row = conn.execute("SELECT total_records, new_records FROM scrape_runs WHERE run_id = ?",
+                           (run_id,)).fetchone()
+        logger.info(f"Finished run {run_id}")
+        return tuple(row) if row else (0, 0)
+    finally:
+        conn.close()
+
+def get_deferred(run_id):
+    """
+    What a run left for later because its time budget ran out
+
+    Returns:
+        dict: terms (search terms not or not fully processed, in order) and
+              tenders (number of tenders saved without their detail page)
+    """
+    conn = get_connection()
+
+    try:
+        terms = [row[0] for row in conn.execute(
+            "SELECT item_key FROM run_items WHERE run_id = ? AND kind = ? AND status IN ('pending', 'deferred') "
+            "ORDER BY position", (run_id, TERM))]
+        tenders = conn.execute("SELECT COUNT(*) FROM run_items WHERE run_id = ? AND kind = ? AND status = 'deferred'",
+                               (run_id, TENDER)).fetchone()[0]
+        return {'terms': terms, 'tenders': tenders}
+    finally:
+        conn.close()
+
+def abandon_run(run_id):
+    """
+    Mark an interrupted run as abandoned so it is no longer offered for resuming
+    """
+    conn = get_connection()
+
+    try:
+        conn.execute("UPDATE scrape_runs SET status = 'abandoned', finished_at = ? WHERE run_id = ?",
+                     (_now(), run_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_run_tenders(run_id):
+    """
+    Tenders saved by a run, with the same columns as database.get_all_tenders()
+
+    Returns:
+        pandas.DataFrame: One row per tender
+    """
+    import pandas as pd
+    conn = get_connection()
+
+    try:
+        df = pd.read_sql_query(
+            TENDER_SELECT + " WHERE t.link IN (SELECT item_key FROM run_items "
+            "WHERE run_id = ? AND kind = ? AND status IN ('done', 'deferred')) ORDER BY t.id",
+            conn, params=(run_id, TENDER))
+        return df.rename(columns={v: k for k, v in COLUMN_MAPPING.items()})
+    finally:
+        conn.close()
@@ -0,0 +1,199 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import database
+import run_journal
+import alerts
+import documents
+import job_queue
+import query_planner
+import run_budget
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeats and between polls of an empty queue
+HEARTBEAT_INTERVAL = 15
+POLL_INTERVAL = 2
+
+async def process_plan(plan, days, run_id, list_only=False, on_progress=None, budget=None):
+    """
+    Run all planned queries of a run with one shared, self-recycling browser pool
+
+    Args:
+        plan (list): query_planner.PlannedQuery tuples still to process
+        days (int): Number of days to look back
+        run_id (int): Run journal ID; every finished tender is saved right away
+        list_only (bool): Only read the result lists
+        on_progress (callable, optional): Called with (finished queries, next query or None)
+        budget (run_budget.RunBudget, optional): Time budget for the whole run; the result
+            lists of all queries are fetched first, then the detail pages of all of them in
+            order of deadline urgency and publication date until the budget runs out
+    """
+    # The scraper and the browser stack are only loaded when a job actually runs
+    import evergabe_scrape
+    from evergabe_scrape import scrape_evergabe, SHARD_DAYS
+    from browser_pool import BrowserPool
+
+    # Detail data shared across queries so that no tender is fetched twice in one run
+    seen = {}
+
+    # Two browsers when long look-back windows are split into date shards fetched in parallel
+    async with BrowserPool(size=2 if days > SHARD_DAYS else 1) as pool:
+        if budget is None:
+            for i, planned in enumerate(plan):
+                if on_progress:
+                    on_progress(i, planned.query)
+                await scrape_evergabe(search_term=planned.query, days=days, run_id=run_id, pool=pool,
+                                      list_only=list_only, planned=planned, seen=seen)
+        else:
+            # A budget is spent on the most urgent tenders of the whole run, not of the first queries
+            list_config, detail_config = evergabe_scrape.crawler_configs()
+            items, listed = [], []
+            for i, planned in enumerate(plan):
+                if on_progress:
+                    on_progress(i, planned.query)
+                query_items = await evergabe_scrape.fetch_query_list(pool, planned.query, days, list_config,
+                                                                     run_id, planned, budget=budget)
+                if query_items is not None:
+                    items.extend(query_items)
+                    listed.append(planned.query)
+            _, deferred = await evergabe_scrape.process_list_items(
+                evergabe_scrape.prioritize_items(items), pool, detail_config, run_id,
+                list_only=list_only, seen=seen, budget=budget)
+            for query in listed:
+                evergabe_scrape.finish_query(query, deferred[query], run_id, budget)
+    if on_progress:
+        on_progress(len(plan), None)
+
+def run_scrape_job(job):
+    """
+    Execute a scrape job: plan the queries (or resume its run) and scrape them
+
+    Job parameters: terms, days, merge_subsumed and list_only for a new run, or
+    resume_run_id to continue an interrupted run; documents downloads the
+    linked tender documents afterwards. With budget_minutes, the run stops
+    fetching when the time is up and reports what it deferred. A job that was requeued after
+    its worker stopped continues the run it had already started.
+    """
+    params = job['params']
+    run_id = job['run_id'] or params.get('resume_run_id')
+
+    if run_id:
+        # Continue the run with its remaining search terms
+        run = run_journal.get_run(run_id)
+        days = run['days']
+        pending_terms = run_journal.get_pending_terms(run_id)
+        plan = [planned for planned in query_planner.plan_from_json(run['plan'])
+                if planned.query in pending_terms]
+        if not plan:
+            plan = query_planner.plan_queries(pending_terms, merge_subsumed=False)
+        logger.info(f"Job {job['job_id']}: resuming run {run_id} with {len(plan)} remaining search requests")
+    else:
+        days = params['days']
+        plan = query_planner.plan_queries(params['terms'], merge_subsumed=params.get('merge_subsumed', False))
+        run_id = run_journal.start_run([planned.query for planned in plan], days,
+                                       plan=query_planner.plan_to_json(plan))
+    job_queue.update_job(job['job_id'], run_id=run_id, progress_total=len(plan))
+
+    def on_progress(done, query):
+        job_queue.update_job(job['job_id'], progress_done=done,
+                             message=f"Scraping '{query}' (last {days} days)" if query else 'Finishing')
+
+    budget = run_budget.RunBudget(params['budget_minutes'] * 60) if params.get('budget_minutes') else None
+    asyncio.run(process_plan(plan, days, run_id, params.get('list_only', False), on_progress, budget))
+    total_records, new_records = run_journal.finish_run(run_id)
+    message = None
+    deferred = run_journal.get_deferred(run_id)
+    if deferred['terms'] or deferred['tenders']:
+        message = (f"Time budget used up: {len(deferred['terms'])} search requests and {deferred['tenders']} "
+                   f"detail pages deferred; resume the run or fetch pending details to continue")
+        logger.info(f"Job {job['job_id']}: {message}")
+    alerts.process_new_tenders()
+    if params.get('documents'):
+        job_queue.update_job(job['job_id'], message='Downloading tender documents')
+        asyncio.run(documents.download_new_documents())
+    job_queue.finish_job(job['job_id'], total_records, new_records, message)
+
+def run_enrich_job(job):
+    """
+    Fetch the detail pages of tenders stored in list-only mode
+    """
+    from evergabe_scrape import enrich_pending_details
+
+    job_queue.update_job(job['job_id'], message='Fetching pending detail pages')
+    enriched = asyncio.run(enrich_pending_details(limit=job['params'].get('limit')))
+    job_queue.finish_job(job['job_id'], total_records=enriched)
+
+JOB_HANDLERS = {
+    job_queue.SCRAPE: run_scrape_job,
+    job_queue.ENRICH: run_enrich_job,
+}
+
+def _send_heartbeats(pid, stop):
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            job_queue.worker_heartbeat(pid)
+        except Exception as e:
+            logger.warning(f"Heartbeat failed: {e}")
+
+def run_worker(idle_exit=None, single=True):
+    """
+    Execute queued jobs one after another
+
+    Args:
+        idle_exit (int, optional): Exit after this many seconds without a job; run forever if None
+        single (bool): Exit right away if another worker is already running
+
+    Returns:
+        int: Number of executed jobs
+    """
+    database.initialize_database()
+    pid = os.getpid()
+    if not job_queue.register_worker(pid, single=single):
+        logger.info("Another worker is already running")
+        return 0
+
+    # Heartbeats continue while a long job is running
+    stop = threading.Event()
+    threading.Thread(target=_send_heartbeats, args=(pid, stop), daemon=True).start()
+
+    executed = 0
+    idle_since = time.monotonic()
+    try:
+        job_queue.requeue_orphaned_jobs()
+        while True:
+            job = job_queue.claim_next_job(pid)
+            if job is None:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            logger.info(f"Running {job['kind']} job {job['job_id']} ({job['requests']} requests)")
+            try:
+                JOB_HANDLERS[job['kind']](job)
+            except Exception as e:
+                logger.exception(f"Job {job['job_id']} failed")
+                job_queue.fail_job(job['job_id'], e)
+            executed += 1
+            idle_since = time.monotonic()
+    finally:
+        stop.set()
+        job_queue.remove_worker(pid)
+
+    logger.info(f"Worker exiting after {executed} jobs")
+    return executed
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Execute queued scrape jobs in the background")
+    parser.add_argument("--idle-exit", type=int, default=None,
+                        help="Exit after this many seconds without a queued job")
+    parser.add_argument("--allow-multiple", action="store_true",
+                        help="Run even if another worker is already running")
+    args = parser.parse_args()
+
+    run_worker(idle_exit=args.idle_exit, single=not args.allow_multiple)
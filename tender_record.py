@@ -0,0 +1,144 @@
+from operator import attrgetter
+from database import COLUMN_MAPPING, INTERNAL_COLUMNS, is_missing
+
+# Shown in the UI and in exports for fields the scraper could not extract
+MISSING_TEXT = 'Nicht verfügbar'
+
+WEBSITE = 'https://www.evergabe.de'
+
+# Attribute name per display column
+ATTRIBUTES = dict(COLUMN_MAPPING)
+
+class TenderRecord:
+    """
+    One scraped tender with real None values for missing fields
+
+    Attributes are named like the database columns. get() and [] also accept the
+    display column names ('Ausschreibungstitel', 'nächste Frist', ...), so code
+    that reads tenders like the former dicts keeps working.
+    """
+    __slots__ = tuple(COLUMN_MAPPING.values()) + tuple(INTERNAL_COLUMNS)
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a record from a stored row keyed by database column name
+
+        Placeholders such as 'Nicht verfügbar' in rows written by older versions become None.
+        """
+        record = cls()
+        for name in cls.__slots__:
+            value = row.get(name)
+            if not is_missing(value):
+                setattr(record, name, value)
+        return record
+
+    def __getitem__(self, key):
+        return getattr(self, ATTRIBUTES.get(key, key))
+
+    def __setitem__(self, key, value):
+        setattr(self, ATTRIBUTES.get(key, key), value)
+
+    def get(self, key, default=None):
+        value = getattr(self, ATTRIBUTES.get(key, key), None)
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"TenderRecord(link={self.link!r}, vergabe_id={self.vergabe_id!r})"
+
+    def copy(self, **changes):
+        record = TenderRecord.__new__(TenderRecord)
+        for name in self.__slots__:
+            setattr(record, name, changes.get(name, getattr(self, name)))
+        return record
+
+    def merge(self, other):
+        """
+        Take every field that other has a value for
+        """
+        for name in self.__slots__:
+            value = getattr(other, name)
+            if value is not None:
+                setattr(self, name, value)
+        return self
+
+    def as_row(self):
+        """
+        Values keyed by database column name; TenderRecord(**record.as_row()) restores the record
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_display(self):
+        """
+        Display strings keyed by display column name, with MISSING_TEXT for missing fields
+        """
+        return {display: MISSING_TEXT if getattr(self, column) is None else getattr(self, column)
+                for display, column in COLUMN_MAPPING.items()}
+
+class TenderBatch:
+    """
+    Tender records of a run, one per (tender, search term) hit
+
+    Builds the result DataFrame and the rows for database.insert_tenders().
+    """
+    COLUMNS = TenderRecord.__slots__
+
+    def __init__(self, records=()):
+        self.items = []
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def append(self, record, suchbegriff=None):
+        """
+        Add a record, optionally as a hit for another search term
+        """
+        self.items.append(record.copy() if suchbegriff is None else record.copy(suchbegriff=suchbegriff))
+
+    def extend(self, other):
+        self.items.extend(other.items)
+        return self
+
+    def records(self):
+        return iter(self.items)
+
+    def rows(self):
+        """
+        Rows keyed by database column name, as consumed by database.insert_tenders()
+        """
+        return [record.as_row() for record in self.items]
+
+    def to_dataframe(self, display=True):
+        """
+        Build a DataFrame from the records
+
+        Args:
+            display (bool): Use the display column names, fill missing values with
+                MISSING_TEXT and leave out the bookkeeping columns
+
+        Returns:
+            pandas.DataFrame
+        """
+        import pandas as pd
+        if not display:
+            return pd.DataFrame(self.rows(), columns=self.COLUMNS)
+        display_values = attrgetter(*COLUMN_MAPPING.values())
+        df = pd.DataFrame(list(map(display_values, self.items)), columns=list(COLUMN_MAPPING), dtype=object)
+        return df.fillna(MISSING_TEXT)
+
+def display_frame(df):
+    """
+    Replace missing values of a DataFrame read from the database by MISSING_TEXT
+    """
+    if df.empty:
+        return df
+    return df.astype(object).where(df.notna(), MISSING_TEXT)
@@ -0,0 +1,14 @@
+import pytest
+
+import database
+
+
+@pytest.fixture
+def tender_db(tmp_path, monkeypatch):
+    """
+    Point the database module at a fresh tenders.db in the test's directory
+    """
+    path = str(tmp_path / "tenders.db")
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+    database.initialize_database()
+    return path
@@ -0,0 +1,103 @@
+import random
+import sqlite3
+
+import alerts
+import database
+from query_planner import normalize_term
+from tender_record import TenderRecord, TenderBatch
+
+WATCH_LISTS = {"keywords": ["Strahlenschutz", "re:\\bDosimetr\\w*"], "clients": ["Stadt Köln"]}
+
+
+def insert(*records):
+    batch = TenderBatch()
+    for record in records:
+        batch.append(record, suchbegriff="test")
+    database.insert_tenders(batch)
+
+
+def tender(number, title, client=None, **fields):
+    return TenderRecord(vergabe_id=str(number), ausschreibungstitel=title, auftraggeber=client,
+                        link=f"https://www.evergabe.de/auftraege/auftrag/{number}", **fields)
+
+
+def alerted(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute("SELECT t.vergabe_id, a.watch_list FROM alerts a "
+                                   "JOIN tenders t ON t.tender_key = a.tender_key"))
+    finally:
+        conn.close()
+
+
+def test_watch_lists_are_parsed_from_markdown():
+    content = "# comment\n## Keywords\n- Dosimetrie\n1. Radon\n- Dosimetrie\n## empty\n"
+    assert alerts.parse_watch_lists(content) == {"keywords": ["Dosimetrie", "Radon"]}
+
+
+def test_matcher_finds_literal_prefixes_and_regexes():
+    matcher = alerts.WatchMatcher(WATCH_LISTS)
+    matches = matcher.match({"ausschreibungstitel": "Strahlenschutz-Messung und Dosimetrie",
+                             "auftraggeber": "Stadt Köln"})
+    assert {(name, pattern) for name, pattern, _, _ in matches} == {
+        ("keywords", "Strahlenschutz"), ("keywords", "re:\\bDosimetr\\w*"), ("clients", "Stadt Köln")}
+    assert matcher.match({"ausschreibungstitel": "Straßenbau", "auftraggeber": "Stadt Bonn"}) == []
+
+
+def test_matcher_agrees_with_searching_every_pattern():
+    rng = random.Random(1)
+    words = ["wartung", "reinigung", "bau", "planung", "sanierung"]
+    watch_lists = {"keywords": [f"{rng.choice(words)} los{i}" for i in range(200)],
+                   "clients": [f"Gemeinde Ort{i}" for i in range(200)]}
+    rows = [{"ausschreibungstitel": f"{rng.choice(words)} Los{rng.randrange(400)} Anlage",
+             "auftraggeber": f"Gemeinde Ort{rng.randrange(400)}"} for _ in range(500)]
+
+    def naive_match(row):
+        found = set()
+        for name, patterns in watch_lists.items():
+            for field in alerts.WATCH_FIELDS[name]:
+                text = " " + normalize_term(row.get(field) or "")
+                found.update((name, pattern) for pattern in patterns if " " + normalize_term(pattern) in text)
+        return found
+
+    matcher = alerts.WatchMatcher(watch_lists)
+    compiled = [{(name, pattern) for name, pattern, _, _ in matcher.match(row)} for row in rows]
+    assert compiled == [naive_match(row) for row in rows]
+    assert any(compiled)
+
+
+def test_new_tenders_alert_once(tender_db):
+    insert(tender(1, "Strahlenschutz Beratung"), tender(2, "Straßenbau"))
+
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 1
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 0
+    assert alerts.scan_new_tenders(WATCH_LISTS, rescan=True) == 0
+    assert alerted(tender_db) == [("1", "keywords")]
+
+
+def test_first_scan_of_an_existing_database_alerts_nothing(tender_db):
+    insert(tender(1, "Strahlenschutz Beratung"))
+    conn = sqlite3.connect(tender_db)
+    conn.execute("DELETE FROM alert_state")
+    conn.commit()
+    conn.close()
+
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 0
+    insert(tender(2, "Dosimetrie"))
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 1
+    assert alerted(tender_db) == [("2", "keywords")]
+
+    # The backlog is alerted on explicitly
+    assert alerts.scan_new_tenders(WATCH_LISTS, rescan=True) == 1
+    assert alerted(tender_db) == [("1", "keywords"), ("2", "keywords")]
+
+
+def test_tender_changed_after_the_scan_is_matched_again(tender_db):
+    insert(tender(1, "Beratung", detail_status="pending"))
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 0
+
+    key = database.get_tender_by_link("https://www.evergabe.de/auftraege/auftrag/1")["tender_key"]
+    database.update_tender(key, {"auftraggeber": "Stadt Köln"})
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 1
+    assert alerts.scan_new_tenders(WATCH_LISTS) == 0
+    assert alerted(tender_db) == [("1", "clients")]
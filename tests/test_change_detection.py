@@ -0,0 +1,46 @@
+import database
+from change_detection import changed_fields, content_hash
+from tender_record import TenderRecord, TenderBatch, MISSING_TEXT, WEBSITE
+
+PAGE = """<html><head><meta name="csrf-token" content="{token}"><script nonce="{token}">var t = {token};</script></head>
+<body><!-- rendered {token} --><form><input type="hidden" name="_csrf" value="{token}"></form>
+<h1>Neubau Kita</h1><p>Angebotsfrist 15.05.2025, {countdown}</p></body></html>"""
+
+
+def test_hash_ignores_per_request_boilerplate():
+    first = content_hash(PAGE.format(token="a1b2", countdown="noch 12 Tage"))
+    second = content_hash(PAGE.format(token="ffee", countdown="noch 11 Tage"))
+    assert first == second
+
+
+def test_hash_changes_with_the_content():
+    page = PAGE.format(token="a1b2", countdown="noch 12 Tage")
+    assert content_hash(page) != content_hash(page.replace("15.05.2025", "22.05.2025"))
+
+
+def test_changed_fields_skips_placeholders_and_untracked_fields():
+    stored = {"ausschreibungstitel": "Neubau Kita", "naechste_frist": "15.05.2025", "auftraggeber": "Stadt Köln",
+              "link": "https://www.evergabe.de/auftraege/auftrag/1"}
+    detail = TenderRecord(website=WEBSITE, ausschreibungstitel="Neubau Kita", naechste_frist="22.05.2025",
+                          link="https://www.evergabe.de/auftraege/auftrag/1?ref=list")
+    assert changed_fields(stored, detail) == {"naechste_frist": "22.05.2025"}
+    assert changed_fields(stored, {"Auftraggeber": MISSING_TEXT, "Vergabestelle": "Amt 61"}) == {
+        "vergabestelle": "Amt 61"}
+
+
+def test_update_logs_each_changed_field(tender_db):
+    batch = TenderBatch()
+    batch.append(TenderRecord(website=WEBSITE, vergabe_id="1", ausschreibungstitel="Neubau Kita",
+                              naechste_frist="15.05.2025", link="https://www.evergabe.de/auftraege/auftrag/1"),
+                 suchbegriff="kita")
+    database.insert_tenders(batch)
+    key = database.make_tender_key(vergabe_id="1", website=WEBSITE)
+
+    database.update_tender(key, {"naechste_frist": "22.05.2025", "ausschreibungstitel": "Neubau Kita"},
+                           content_hash="abc")
+
+    changes = database.get_tender_changes(key)
+    assert changes[["field", "old_value", "new_value"]].values.tolist() == [
+        ["naechste_frist", "15.05.2025", "22.05.2025"]]
+    stored = database.search_tenders()
+    assert stored["nächste Frist"].tolist() == ["22.05.2025"]
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import pytest
+
+import crawl_profiles
+import evergabe_scrape
+
+
+def test_list_wait_accepts_a_search_without_hits():
+    assert crawl_profiles.LIST_WAIT_FOR.startswith("css:")
+    assert ".no-results" in crawl_profiles.LIST_WAIT_FOR
+    html = '<div class="no-results">Keine Ausschreibungen gefunden</div>'
+    assert evergabe_scrape.select_list_items(html) == []
+
+
+def test_page_that_did_not_load_is_not_an_empty_result():
+    with pytest.raises(evergabe_scrape.PageNotLoaded):
+        evergabe_scrape.check_loaded(SimpleNamespace(success=False, html="", error_message="timeout"), "url")
+    loaded = SimpleNamespace(success=True, html="<html></html>")
+    assert evergabe_scrape.check_loaded(loaded, "url") is loaded
+
+
+@pytest.mark.parametrize("resource_type, url, blocked", [
+    ("image", "https://www.evergabe.de/logo.png", True),
+    ("document", "https://www.evergabe.de/auftraege/auftrag-suchen", False),
+    ("script", "https://www.evergabe.de/app.js", False),
+    ("script", "https://www.googletagmanager.com/gtm.js", True),
+    ("xhr", "https://widget.example.com/chat", True),
+])
+def test_request_blocking(resource_type, url, blocked):
+    assert crawl_profiles.is_blocked(resource_type, url) is blocked
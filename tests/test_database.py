@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+import database
+from tender_record import TenderRecord, TenderBatch, WEBSITE
+
+LEGACY_SCHEMA = """
+CREATE TABLE tenders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vergabe_id TEXT UNIQUE,
+    ausschreibungstitel TEXT,
+    auftraggeber TEXT,
+    vergabestelle TEXT,
+    link TEXT,
+    leistungsort TEXT,
+    veroeffentlicht_seit TEXT,
+    naechste_frist TEXT,
+    suchbegriff TEXT,
+    website TEXT,
+    scrape_date TEXT,
+    UNIQUE(vergabe_id, suchbegriff)
+)
+"""
+
+
+@pytest.mark.parametrize("arguments, key", [
+    ({"vergabe_id": " 12345 ", "website": "https://www.evergabe.de"}, "id:evergabe.de:12345"),
+    ({"vergabe_id": "Nicht verfügbar", "link": "https://www.evergabe.de/auftraege/auftrag/777/",
+      "website": "evergabe.de"}, "id:evergabe.de:777"),
+    ({"link": "https://WWW.evergabe.de/auftraege/auftrag/neubau-kita/"}, "url:evergabe.de/auftraege/auftrag/neubau-kita"),
+])
+def test_tender_key_prefers_id_then_url(arguments, key):
+    assert database.make_tender_key(**arguments) == key
+
+
+def test_tender_key_without_id_or_link_hashes_title_and_website():
+    key = database.make_tender_key(title="Neubau Kita", website=WEBSITE)
+    assert key.startswith("hash:")
+    assert key == database.make_tender_key(title="Neubau Kita", website=WEBSITE)
+    assert key != database.make_tender_key(title="Neubau Schule", website=WEBSITE)
+
+
+def test_tender_found_under_two_terms_is_stored_once_with_two_hits(tender_db):
+    batch = TenderBatch()
+    for term in ("kita", "neubau", "kita"):
+        batch.append(TenderRecord(website=WEBSITE, vergabe_id="1", ausschreibungstitel="Neubau Kita",
+                                  link="https://www.evergabe.de/auftraege/auftrag/1"), suchbegriff=term)
+    database.insert_tenders(batch)
+
+    conn = sqlite3.connect(tender_db)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM tenders").fetchone() == (1,)
+        assert sorted(conn.execute("SELECT suchbegriff FROM tender_hits")) == [("kita",), ("neubau",)]
+    finally:
+        conn.close()
+
+
+def test_legacy_table_is_migrated_to_tenders_and_hits(tmp_path, monkeypatch):
+    path = str(tmp_path / "tenders.db")
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO tenders (vergabe_id, ausschreibungstitel, link, veroeffentlicht_seit, "
+                     "naechste_frist, suchbegriff, website, scrape_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+        ("1", "Neubau Kita", "https://www.evergabe.de/auftraege/auftrag/1", "01.04.2025", "15.05.2025",
+         "kita", WEBSITE, "2025-04-02 08:00:00"),
+        ("Nicht verfügbar", "Winterdienst", "https://www.evergabe.de/auftraege/auftrag/2", "Nicht verfügbar",
+         None, "", WEBSITE, "2025-04-02 08:00:00"),
+    ])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(database, "DATABASE_PATH", path)
+
+    database.initialize_database()
+
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT tender_key, veroeffentlicht_seit_ts, naechste_frist_ts FROM tenders "
+                            "ORDER BY id").fetchall()
+        hits = conn.execute("SELECT tender_key, suchbegriff FROM tender_hits").fetchall()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    assert [row[0] for row in rows] == ["id:evergabe.de:1", "id:evergabe.de:2"]
+    assert rows[0][1:] == ("2025-03-31T22:00:00Z", "2025-05-15T21:59:00Z")
+    assert rows[1][1:] == (None, None)
+    assert hits == [("id:evergabe.de:1", "kita")]
+    assert "tenders_legacy" not in tables
@@ -0,0 +1,30 @@
+import pytest
+
+from date_parsing import normalize_date_text, to_sortable, deadline_to_sortable
+
+
+@pytest.mark.parametrize("text, normalized", [
+    ("12.03.2025", "12.03.2025"),
+    ("12.03.2025 10:00", "12.03.2025 10:00"),
+    ("Angebotsfrist: 5.4.2025, 9.30 Uhr", "05.04.2025 09:30"),
+    ("2025-03-12T09:00:00Z", "12.03.2025 10:00"),
+    ("2025-07-01T08:00:00+02:00", "01.07.2025 08:00"),
+    ("2025-07-01", "01.07.2025"),
+    ("31.02.2025", "-"),
+    ("Nicht verfügbar", "-"),
+    (None, "-"),
+])
+def test_dates_are_normalized_to_the_display_format(text, normalized):
+    assert normalize_date_text(text) == normalized
+
+
+def test_sortable_form_is_utc_and_orders_like_time():
+    assert to_sortable("12.03.2025 10:00") == "2025-03-12T09:00:00Z"
+    assert to_sortable("01.07.2025 10:00") == "2025-07-01T08:00:00Z"
+    assert to_sortable("12.03.2025") < to_sortable("12.03.2025 00:01") < to_sortable("13.03.2025")
+    assert to_sortable("keine Angabe") is None
+
+
+def test_date_only_deadline_lasts_until_the_end_of_the_day():
+    assert deadline_to_sortable("15.05.2025") == "2025-05-15T21:59:00Z"
+    assert deadline_to_sortable("15.05.2025 12:00") == "2025-05-15T10:00:00Z"
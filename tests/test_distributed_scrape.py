@@ -0,0 +1,23 @@
+import sqlite3
+
+import pytest
+
+import distributed_scrape
+
+# The workers start a browser before they look at the queue
+pytest.importorskip("crawl4ai")
+
+
+def test_local_workers_use_the_given_queue(tmp_path, monkeypatch):
+    queue_path = tmp_path / "work_queue.db"
+    monkeypatch.setenv("TENDERS_DB", str(tmp_path / "tenders.db"))
+    monkeypatch.setenv("WATCH_LISTS", str(tmp_path / "watch_lists.md"))
+
+    exit_codes = distributed_scrape.start_local_workers(2, f"sqlite:///{queue_path}", idle_exit=0)
+
+    assert exit_codes == [0, 0]
+    conn = sqlite3.connect(str(queue_path))
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM work_items").fetchone()[0] == 0
+    finally:
+        conn.close()
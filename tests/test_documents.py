@@ -0,0 +1,110 @@
+import os
+import time
+import hashlib
+import threading
+
+import pytest
+
+import documents
+
+pytest.importorskip("requests")
+
+SIZE = 300 * 1024
+DROP_AFTER = 200 * 1024
+
+
+@pytest.fixture
+def files(tmp_path):
+    path = tmp_path / "files"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def serve(files):
+    servers = []
+
+    def serve(drop_after=None, delay=0.0):
+        server = documents.file_server(str(files), 0, delay=delay, drop_after=drop_after, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return documents.DocumentStore(str(tmp_path / "store"))
+
+
+def write(files, name, content):
+    (files / name).write_bytes(content)
+    return hashlib.sha256(content).hexdigest()
+
+
+def stored_objects(store):
+    return sorted(name for _, _, names in os.walk(os.path.join(store.path, "objects")) for name in names)
+
+
+def test_broken_off_download_is_resumed_with_a_range_request(files, serve, store):
+    digest = write(files, "a.pdf", os.urandom(SIZE))
+    url = serve(drop_after=DROP_AFTER) + "/a.pdf"
+
+    with pytest.raises(Exception):
+        store.fetch(url)
+    result = store.fetch(url)
+
+    assert 0 < result["resumed"] <= DROP_AFTER
+    assert (result["digest"], result["size"], result["stored"]) == (digest, SIZE, True)
+    assert stored_objects(store) == [digest]
+    assert os.listdir(os.path.join(store.path, "partial")) == [os.path.basename(store._partial_path(url)) + ".lock"]
+
+
+def test_changed_file_starts_over_instead_of_resuming(files, serve, store):
+    write(files, "a.pdf", os.urandom(SIZE))
+    url = serve(drop_after=DROP_AFTER) + "/a.pdf"
+    with pytest.raises(Exception):
+        store.fetch(url)
+
+    # New content with a new ETag: If-Range makes the server send the whole file
+    changed = write(files, "a.pdf", os.urandom(SIZE + 1))
+    result = store.fetch(url)
+
+    assert result["resumed"] == 0
+    assert (result["digest"], result["size"]) == (changed, SIZE + 1)
+
+
+def test_same_content_under_two_urls_is_stored_once(files, serve, store):
+    content = os.urandom(SIZE)
+    digest = write(files, "a.pdf", content)
+    write(files, "copy.pdf", content)
+    base = serve()
+
+    first = store.fetch(base + "/a.pdf")
+    second = store.fetch(base + "/copy.pdf")
+
+    assert (first["stored"], second["stored"]) == (True, False)
+    assert first["digest"] == second["digest"] == digest
+    assert stored_objects(store) == [digest]
+
+
+@pytest.mark.skipif(documents.fcntl is None, reason="needs fcntl")
+def test_fetch_waits_for_a_running_download_of_the_same_url(files, serve, store):
+    write(files, "a.pdf", os.urandom(SIZE))
+    url = serve() + "/a.pdf"
+    results = []
+
+    with open(store._partial_path(url) + ".lock", "a") as lock:
+        documents.fcntl.flock(lock, documents.fcntl.LOCK_EX)
+        fetch = threading.Thread(target=lambda: results.append(store.fetch(url)))
+        fetch.start()
+        time.sleep(0.3)
+        assert results == []
+        assert not os.path.exists(store._partial_path(url) + ".part")
+
+    fetch.join(10)
+    assert results and results[0]["size"] == SIZE
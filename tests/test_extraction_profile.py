@@ -0,0 +1,64 @@
+import pytest
+
+import extraction_profile
+from evergabe_scrape import extract_tender_data
+from tender_record import TenderRecord
+
+pytest.importorskip("bs4")
+
+DETAIL_PAGE = """
+<html><body>
+<h1>Neubau Kita Sonnenschein</h1>
+<div id="award_procedure_places">
+  <h2 class="headline">Ausführungsort</h2>
+  <ul class="list-iconized"><li>Leipzig</li></ul>
+</div>
+</body></html>
+"""
+
+
+@pytest.fixture
+def profile():
+    profile = extraction_profile.enable()
+    yield profile
+    extraction_profile.disable()
+
+
+def test_extraction_without_profiling_fills_fields():
+    assert extraction_profile.active() is None
+    data = extract_tender_data(DETAIL_PAGE)
+    assert data.ausschreibungstitel == "Neubau Kita Sonnenschein"
+    assert data.leistungsort == "Leipzig"
+
+
+def test_profile_records_page_and_strategy_hits(profile):
+    data = extract_tender_data(DETAIL_PAGE)
+    assert data.leistungsort == "Leipzig"
+    assert profile.pages == 1
+    title = profile.strategies["Titel: h1/.title"]
+    assert (title["attempts"], title["hits"]) == (1, 1)
+    assert title["filled"] == {"ausschreibungstitel": 1}
+    places = profile.strategies["Leistungsort: #award_procedure_places"]
+    assert places["filled"] == {"leistungsort": 1}
+    # The fallback for an already found place does not run
+    assert "Leistungsort: 'Ausführungsort:' label" not in profile.strategies
+
+
+def test_strategy_is_recorded_when_the_block_raises(profile):
+    data = TenderRecord(website="test")
+    with pytest.raises(ValueError):
+        with extraction_profile.strategy("failing", data, "leistungsort"):
+            data.leistungsort = "Halle"
+            raise ValueError("selector broke")
+    with extraction_profile.strategy(extraction_profile.PAGE, data):
+        pass
+    stats = profile.strategies["failing"]
+    assert (stats["attempts"], stats["hits"]) == (1, 1)
+    assert profile.pages == 1
+
+
+def test_strategy_is_a_no_op_while_profiling_is_off():
+    data = TenderRecord(website="test")
+    with extraction_profile.strategy("off", data, "leistungsort"):
+        data.leistungsort = "Halle"
+    assert extraction_profile.active() is None
@@ -0,0 +1,87 @@
+import random
+import sqlite3
+
+import database
+import gazetteer
+from tender_record import TenderRecord, TenderBatch, WEBSITE
+
+
+def geonames_file(tmp_path, rows):
+    # GeoNames postal code format: country, postcode, place, 6 admin columns, lat, lon, accuracy
+    path = tmp_path / "DE.txt"
+    path.write_text("".join(f"DE\t{code}\t{place}\t\t\t\t\t\t\t{lat}\t{lon}\t4\n" for code, place, lat, lon in rows),
+                    encoding="utf-8")
+    return str(path)
+
+
+def test_three_places_sharing_an_alias_make_it_ambiguous(tmp_path):
+    path = geonames_file(tmp_path, [
+        ("67433", "Neustadt an der Weinstraße", 49.35, 8.14),
+        ("23730", "Neustadt in Holstein", 54.11, 10.81),
+        ("96465", "Neustadt bei Coburg", 50.33, 11.12),
+    ])
+    index = gazetteer.Gazetteer([gazetteer.BUNDLED_FILE, path])
+
+    assert index.aliases["neustadt"] is None
+    assert index.locate("Neustadt") is None
+    assert index.locate("Neustadt in Holstein").place == "Neustadt in Holstein"
+
+
+def test_alias_of_a_single_place_resolves(tmp_path):
+    path = geonames_file(tmp_path, [
+        ("06108", "Halle (Saale)", 51.48, 11.97),
+        ("06110", "Halle (Saale)", 51.47, 11.96),
+    ])
+    index = gazetteer.Gazetteer([gazetteer.BUNDLED_FILE, path])
+
+    assert index.locate("Stadt Halle").place == "Halle (Saale)"
+
+
+def test_postcode_without_postcode_list_is_a_region_match():
+    index = gazetteer.Gazetteer([gazetteer.BUNDLED_FILE])
+    location = index.locate("83471 Berchtesgaden")
+
+    assert location.precision == "region"
+    assert location.postcode == "83471"
+    assert location.place == "Rosenheim"
+
+
+def test_postcode_list_gives_postcode_precision(tmp_path):
+    path = geonames_file(tmp_path, [("83471", "Berchtesgaden", 47.63, 13.00)])
+    index = gazetteer.Gazetteer([gazetteer.BUNDLED_FILE, path])
+    location = index.locate("83471 Berchtesgaden")
+
+    assert location.precision == "postcode"
+    assert (location.lat, location.lon) == (47.63, 13.00)
+    assert index.locate("Berchtesgaden").precision == "place"
+
+
+def test_distance_and_bounding_box():
+    assert round(gazetteer.distance_km(52.52, 13.405, 48.137, 11.575)) == 504
+    min_lat, max_lat, min_lon, max_lon = gazetteer.bounding_box(52.52, 13.405, 100)
+    assert gazetteer.distance_km(52.52, 13.405, max_lat, 13.405) <= 100.1
+    assert min_lat < 52.52 < max_lat and min_lon < 13.405 < max_lon
+
+
+def test_radius_search_finds_the_same_tenders_as_a_full_scan(tender_db):
+    rng = random.Random(1)
+    places = sorted({place for _, _, place in gazetteer.get_gazetteer().places.values()})
+    batch = TenderBatch()
+    for i in range(300):
+        batch.append(TenderRecord(website=WEBSITE, vergabe_id=str(i), ausschreibungstitel=f"Ausschreibung {i}",
+                                  link=f"https://www.evergabe.de/auftraege/auftrag/{i}",
+                                  leistungsort=rng.choice(places)), suchbegriff="test")
+    database.insert_tenders(batch)
+    conn = sqlite3.connect(tender_db)
+    try:
+        stored = conn.execute("SELECT vergabe_id, location_lat, location_lon FROM tenders").fetchall()
+    finally:
+        conn.close()
+
+    for center in ("München", "Hamburg", "60311 Frankfurt", "Leipzig"):
+        location = gazetteer.locate(center)
+        scan = {vergabe_id for vergabe_id, lat, lon in stored
+                if lat is not None and gazetteer.distance_km(lat, lon, location.lat, location.lon) <= 150}
+        found = set(database.search_tenders(near=center, radius_km=150)["Vergabe-ID"])
+        assert found == scan
+        assert scan
@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules imported at the top of app.py and evergabe_scrape.py
+MODULES = ["evergabe_scrape", "browser_pool", "database", "run_journal", "query_planner", "tender_record", "job_queue"]
+
+# Top-level packages that must only be loaded when a scrape starts
+HEAVY_MODULES = ["crawl4ai", "playwright", "bs4", "pandas", "PIL"]
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_does_not_load_heavy_dependencies(module):
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.split() == []
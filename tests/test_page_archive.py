@@ -0,0 +1,63 @@
+import sqlite3
+
+import database
+import page_archive
+from query_planner import plan_queries
+
+LIST_PAGE = ('<div id="result_list"><ul>'
+             '<li><h3><a href="/auftraege/auftrag/1">Strahlenschutz Beratung</a></h3></li>'
+             '<li><h3><a href="/auftraege/auftrag/2">Dosimetrie</a></h3></li>'
+             '</ul></div>')
+DETAIL_URL = "https://www.evergabe.de/auftraege/auftrag/1"
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    archive = page_archive.PageArchive(str(tmp_path / "archive"))
+    first, stored = archive.add("https://a", "<html>same</html>", page_archive.DETAIL)
+    second, stored_again = archive.add("https://b", "<html>same</html>", page_archive.DETAIL)
+
+    assert first == second and stored and not stored_again
+    assert archive.latest("https://b") == "<html>same</html>"
+    assert archive.stats()["fetches"] == 2 and archive.stats()["bodies"] == 1
+
+
+def test_every_fetch_reads_back_its_page(tmp_path):
+    archive = page_archive.PageArchive(str(tmp_path / "archive"))
+    pages = [f"<html><h1>Ausschreibung {i % 3}</h1>{'Leistung ' * 200}</html>" for i in range(7)]
+    for i, html in enumerate(pages):
+        archive.add(f"https://www.evergabe.de/auftraege/auftrag/{i % 3}", html, page_archive.DETAIL)
+
+    fetches = archive.fetches(page_archive.DETAIL)
+    assert [archive.read(fetch["digest"]) for fetch in fetches] == pages
+    latest = archive.fetches(page_archive.DETAIL, latest_only=True)
+    assert sorted(fetch["url"] for fetch in latest) == [f"https://www.evergabe.de/auftraege/auftrag/{i}"
+                                                         for i in range(3)]
+
+
+def test_rebuild_keeps_other_tables_and_the_database_path(tmp_path, tender_db):
+    archive_path = str(tmp_path / "archive")
+    archive = page_archive.PageArchive(archive_path)
+    planned = plan_queries(["strahlenschutz"])[0]
+    archive.add("https://www.evergabe.de/auftraege/auftrag-suchen?q=strahlenschutz", LIST_PAGE,
+                page_archive.LIST, {"query": "strahlenschutz", "planned": planned._asdict()})
+    archive.add(DETAIL_URL, "<html><h1>Strahlenschutz Beratung</h1></html>", page_archive.DETAIL)
+
+    # The live database has a review label that is not derived from pages
+    conn = sqlite3.connect(tender_db)
+    conn.execute("INSERT INTO tender_labels (tender_key, label, labeled_at) VALUES ('id:evergabe:1', 1, 'now')")
+    conn.commit()
+    conn.close()
+
+    rebuilt = str(tmp_path / "rebuilt.db")
+    assert page_archive.rebuild_database(rebuilt, archive_path, processes=1) == 2
+    assert database.DATABASE_PATH == tender_db
+
+    page_archive.replace_database(rebuilt, tender_db)
+    conn = sqlite3.connect(tender_db)
+    try:
+        statuses = dict(conn.execute("SELECT link, detail_status FROM tenders"))
+        labels = conn.execute("SELECT tender_key, label FROM tender_labels").fetchall()
+    finally:
+        conn.close()
+    assert statuses == {DETAIL_URL: "done", "https://www.evergabe.de/auftraege/auftrag/2": "pending"}
+    assert labels == [("id:evergabe:1", 1)]
@@ -0,0 +1,32 @@
+from query_planner import PlannedQuery, normalize_term, plan_queries, terms_for_hit
+
+
+def hit(title, **fields):
+    return {"Ausschreibungstitel": title, **fields}
+
+
+def test_normalize_term_folds_case_umlauts_and_punctuation():
+    assert normalize_term("Straßen-Bau ") == "strassen bau"
+    assert normalize_term("STRASSEN bau") == "strassen bau"
+
+
+def test_combined_hit_matches_whole_words_only():
+    planned = PlannedQuery("bau OR schule", ["Bau", "Schule"], [])
+    assert terms_for_hit(hit("Abbau der Baustelle an der Schule"), planned) == ["Schule"]
+    assert terms_for_hit(hit("Bau einer Sporthalle"), planned) == ["Bau"]
+
+
+def test_combined_hit_without_matching_word_goes_to_all_terms():
+    planned = PlannedQuery("bau OR schule", ["Bau", "Schule"], [])
+    assert terms_for_hit(hit("Baustelleneinrichtung"), planned) == ["Bau", "Schule"]
+
+
+def test_derived_term_needs_all_its_words():
+    planned = PlannedQuery("bau", ["Bau"], ["Bau Schule"])
+    assert terms_for_hit(hit("Bau", Leistungsort="Schule Nord"), planned) == ["Bau", "Bau Schule"]
+    assert terms_for_hit(hit("Bau der Schulen"), planned) == ["Bau"]
+
+
+def test_plan_merges_duplicates_and_subsumed_terms():
+    plan = plan_queries(["Straßenbau", "strassenbau", "Straßenbau Leipzig"], merge_subsumed=True)
+    assert plan == [PlannedQuery("Straßenbau", ["Straßenbau"], ["Straßenbau Leipzig"])]
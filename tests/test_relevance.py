@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+import database
+import relevance
+from tender_record import TenderRecord, TenderBatch
+
+pytest.importorskip("numpy")
+
+RELEVANT = ["Strahlenschutzmessung", "Dosimetrie", "Radonmessung", "Kontaminationsmessung"]
+OFF_TARGET = ["Straßenbau", "Unterhaltsreinigung", "Winterdienst", "Büromöbel"]
+
+
+@pytest.fixture
+def model_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "relevance_model.npz")
+    monkeypatch.setattr(relevance, "MODEL_FILE", path)
+    monkeypatch.setattr(relevance, "_model", None)
+    monkeypatch.setattr(relevance, "_model_mtime", None)
+    return path
+
+
+def insert_labelled(count):
+    batch = TenderBatch()
+    labels = {}
+    for number in range(count):
+        relevant = number % 2 == 0
+        words = RELEVANT if relevant else OFF_TARGET
+        record = TenderRecord(vergabe_id=str(number), auftraggeber="Stadt Köln",
+                              ausschreibungstitel=f"{words[number % len(words)]} Rahmenvertrag Los {number % 3}",
+                              link=f"https://www.evergabe.de/auftraege/auftrag/{number}")
+        batch.append(record, suchbegriff="test")
+        labels[database.make_tender_key(vergabe_id=str(number))] = int(relevant)
+    database.insert_tenders(batch)
+    return labels
+
+
+def test_model_scores_relevant_vocabulary_higher():
+    rows = [{"ausschreibungstitel": f"{title} Los 1", "auftraggeber": None, "vergabestelle": None,
+             "leistungsort": None} for title in RELEVANT + OFF_TARGET]
+    labels = [1] * len(RELEVANT) + [0] * len(OFF_TARGET)
+    scores = relevance.RelevanceModel.fit(rows, labels).score(rows)
+    assert min(scores[:len(RELEVANT)]) > 0.5 > max(scores[len(RELEVANT):])
+
+
+def synthetic_tenders(count, seed):
+    # Relevant and off-target titles share noise words, clients and places
+    rng = random.Random(seed)
+    rows, labels = [], []
+    for _ in range(count):
+        label = rng.random() < 0.3
+        words = [rng.choice(RELEVANT if label else OFF_TARGET)] + rng.sample(["Rahmenvertrag", "Los 1", "Neubau",
+                                                                              "Sanierung", "Lieferung"], 2)
+        rng.shuffle(words)
+        rows.append({"ausschreibungstitel": " ".join(words), "auftraggeber": rng.choice(["Stadt Köln", "Land Berlin"]),
+                     "vergabestelle": None, "leistungsort": rng.choice(["50667 Köln", "10115 Berlin"])})
+        labels.append(int(label))
+    return rows, labels
+
+
+def test_model_generalizes_to_fresh_tenders():
+    model = relevance.RelevanceModel.fit(*synthetic_tenders(300, seed=1))
+    rows, labels = synthetic_tenders(500, seed=2)
+    predicted = model.score(rows) >= 0.5
+    assert sum(p == bool(label) for p, label in zip(predicted, labels)) / len(labels) > 0.95
+    # Batch scoring gives the same scores as scoring one tender at a time
+    assert list(model.score(rows[:20])) == pytest.approx([model.score([row])[0] for row in rows[:20]])
+
+
+def test_train_rescores_with_the_model_it_saved_elsewhere(tender_db, model_file, tmp_path):
+    for key, label in insert_labelled(20).items():
+        relevance.set_label(key, label)
+    other_path = str(tmp_path / "other_model.npz")
+
+    meta = relevance.train(path=other_path)
+
+    assert meta["labels"] == 20
+    assert relevance.get_model() is None
+    scored = database.search_tenders(min_relevance=0.5)
+    assert len(scored) == 10
+    assert all(any(word in title for word in RELEVANT) for title in scored["Ausschreibungstitel"])
+
+
+def test_zero_min_relevance_still_filters_unscored_tenders(tender_db, model_file):
+    insert_labelled(4)
+    assert len(database.search_tenders()) == 4
+    assert len(database.search_tenders(min_relevance=0.0)) == 0
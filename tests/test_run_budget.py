@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import evergabe_scrape
+import query_planner
+import run_budget
+import run_journal
+import scrape_worker
+from tender_record import TenderRecord
+
+
+def record(deadline_days=None, published=None):
+    deadline = None
+    if deadline_days is not None:
+        deadline = (datetime.now() + timedelta(days=deadline_days)).strftime("%d.%m.%Y")
+    return TenderRecord(naechste_frist=deadline, veroeffentlicht_seit=published)
+
+
+def test_prioritize_puts_urgent_deadlines_first_then_newest():
+    items = {
+        "later": record(60, "01.03.2025"),
+        "newest": record(60, "01.05.2025"),
+        "expired": record(-3, "01.06.2025"),
+        "urgent_late": record(5, "01.01.2025"),
+        "urgent_soon": record(1, "01.01.2025"),
+        "unknown": None,
+    }
+    order = run_budget.prioritize(list(items), lambda name: items[name])
+    assert order == ["urgent_soon", "urgent_late", "newest", "later", "expired", "unknown"]
+
+
+def list_item(number, deadline_days):
+    deadline = (datetime.now() + timedelta(days=deadline_days)).strftime("%d.%m.%Y")
+    return (f'<li><h3><a href="/auftraege/auftrag/{number}">Titel {number}</a></h3>'
+            f"<dl><dt>Nächste Frist</dt><dd>{deadline}</dd></dl></li>")
+
+
+class FakePool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+def test_budget_is_spent_on_the_most_urgent_tenders_of_all_queries(tender_db, monkeypatch):
+    lists = {"alpha": [list_item(1, 60), list_item(2, 50)], "beta": [list_item(3, 2)]}
+    fetched = []
+
+    async def collect_list_items(crawler, term, days, config, shard_days=7, planned=None):
+        html = '<div id="result_list"><ul>' + "".join(lists[term]) + "</ul></div>"
+        return evergabe_scrape.select_list_items(html), [f"list-{term}"]
+
+    async def fetch_tender_details(data, crawler, config, term, skip_unchanged=True):
+        fetched.append(data.link)
+        await asyncio.sleep(10)
+        return data
+
+    async def no_pause(self, seconds):
+        pass
+
+    monkeypatch.setattr(evergabe_scrape, "crawler_configs", lambda lean=True: (None, None))
+    monkeypatch.setattr(evergabe_scrape, "collect_list_items", collect_list_items)
+    monkeypatch.setattr(evergabe_scrape, "fetch_tender_details", fetch_tender_details)
+    monkeypatch.setattr("browser_pool.BrowserPool", FakePool)
+    monkeypatch.setattr(run_budget.RunBudget, "sleep", no_pause)
+
+    plan = query_planner.plan_queries(["alpha", "beta"])
+    run_id = run_journal.start_run([planned.query for planned in plan], 7,
+                                   plan=query_planner.plan_to_json(plan))
+    budget = run_budget.RunBudget(0.2)
+    asyncio.run(scrape_worker.process_plan(plan, 7, run_id, budget=budget))
+
+    # The only detail page started is the urgent tender of the second query
+    assert fetched == ["https://www.evergabe.de/auftraege/auftrag/3"]
+    assert budget.summary()["deferred_tenders"] == 3
+    assert sorted(run_journal.get_pending_terms(run_id)) == ["alpha", "beta"]
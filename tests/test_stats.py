@@ -0,0 +1,53 @@
+import sqlite3
+
+import database
+from tender_record import TenderRecord, TenderBatch
+
+
+def insert(*records):
+    batch = TenderBatch()
+    for record in records:
+        batch.append(record, suchbegriff="test")
+    database.insert_tenders(batch, scrape_date="2025-06-04 10:00:00")
+
+
+def tender(number, published=None):
+    return TenderRecord(vergabe_id=str(number), ausschreibungstitel=f"Tender {number}",
+                        link=f"https://www.evergabe.de/auftraege/auftrag/{number}",
+                        veroeffentlicht_seit=published)
+
+
+def weeks():
+    stats = database.get_stats("week")
+    return dict(zip(stats["value"], stats["tenders"]))
+
+
+def test_weeks_are_keyed_by_local_monday_of_the_publication(tender_db):
+    insert(tender(1, "10.03.2025"),          # Monday, CET midnight is Sunday 23:00 UTC
+           tender(2, "16.03.2025 23:30"),    # Sunday late evening, still the same week
+           tender(3, "31.03.2025"),          # Monday after the switch to CEST
+           tender(4, "2025-10-27"),          # Monday after the switch back to CET
+           tender(5))                        # No publication date: week of the scrape date
+    assert weeks() == {"2025-03-10": 2, "2025-03-31": 1, "2025-10-27": 1, "2025-06-02": 1}
+
+
+def test_week_follows_an_updated_publication_date(tender_db):
+    insert(tender(1, "10.03.2025"))
+    key = database.make_tender_key(vergabe_id="1")
+    database.update_tender(key, {"veroeffentlicht_seit": "18.03.2025"})
+    assert weeks() == {"2025-03-17": 1}
+
+
+def test_outdated_stats_triggers_are_replaced_and_recounted(tender_db):
+    conn = sqlite3.connect(tender_db)
+    conn.execute("DROP TRIGGER tenders_stats_insert")
+    conn.execute("CREATE TRIGGER tenders_stats_insert AFTER INSERT ON tenders BEGIN SELECT 1; END")
+    conn.commit()
+    conn.close()
+    insert(tender(1, "10.03.2025"))
+    assert weeks() == {}
+
+    database.initialize_database()
+    assert weeks() == {"2025-03-10": 1}
+    insert(tender(2, "11.03.2025"))
+    assert weeks() == {"2025-03-10": 2}
@@ -0,0 +1,136 @@
+import time
+import threading
+import multiprocessing
+
+import pytest
+
+import work_queue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return work_queue.SQLiteWorkQueue(str(tmp_path / "work_queue.db"))
+
+
+def test_put_does_not_duplicate_an_item(queue):
+    assert queue.put("detail", "a", {"terms": ["x"]})
+    assert not queue.put("detail", "a", {"terms": ["x"]})
+    assert queue.counts() == {("detail", work_queue.PENDING): 1}
+
+
+def test_merged_payload_reopens_a_done_item(queue):
+    queue.put("detail", "a", {"terms": ["x"]}, merge_field="terms")
+    item = queue.lease("w1")
+    assert queue.complete(item)
+
+    assert not queue.put("detail", "a", {"terms": ["x"]}, merge_field="terms")
+    assert queue.put("detail", "a", {"terms": ["y"]}, merge_field="terms")
+    item = queue.lease("w1")
+    assert item.payload == {"terms": ["x", "y"]}
+
+
+def test_concurrent_workers_never_lease_the_same_item(queue):
+    for i in range(60):
+        queue.put("detail", str(i), {})
+    leased = []
+    lock = threading.Lock()
+
+    def drain(worker_id):
+        while True:
+            item = queue.lease(worker_id, lease_seconds=60)
+            if item is None:
+                return
+            with lock:
+                leased.append(item.key)
+            queue.complete(item)
+
+    workers = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(leased, key=int) == [str(i) for i in range(60)]
+    assert queue.counts() == {("detail", work_queue.DONE): 60}
+
+
+def drain_abandoning(path, worker_id, results):
+    # Drops the first lease of every fifth item, as a crashed worker would
+    queue = work_queue.SQLiteWorkQueue(path)
+    completed = 0
+    idle_since = time.monotonic()
+    while time.monotonic() - idle_since < 1:
+        item = queue.lease(worker_id, lease_seconds=0.3)
+        if item is None:
+            time.sleep(0.02)
+            continue
+        idle_since = time.monotonic()
+        if int(item.key) % 5 == 0 and item.attempts == 1:
+            continue
+        completed += queue.complete(item)
+    results.put(completed)
+
+
+def test_worker_processes_complete_every_item_once(queue):
+    for i in range(40):
+        queue.put("detail", str(i), {})
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=drain_abandoning, args=(queue.path, f"w{i}", results))
+                 for i in range(3)]
+    for process in processes:
+        process.start()
+    completed = [results.get(timeout=30) for _ in processes]
+    for process in processes:
+        process.join()
+
+    assert sum(completed) == 40
+    assert queue.counts() == {("detail", work_queue.DONE): 40}
+
+
+def test_expired_lease_is_handed_out_again(queue):
+    queue.put("detail", "a", {})
+    first = queue.lease("w1", lease_seconds=0.05)
+    assert queue.lease("w2", lease_seconds=60) is None
+
+    time.sleep(0.1)
+    second = queue.lease("w2", lease_seconds=60)
+    assert second.key == "a"
+    assert second.attempts == 2
+
+    # Only the current lease may complete the item
+    assert not queue.complete(first)
+    assert not queue.heartbeat(first)
+    assert queue.complete(second)
+
+
+def test_heartbeat_extends_the_lease(queue):
+    queue.put("detail", "a", {})
+    item = queue.lease("w1", lease_seconds=0.1)
+    assert queue.heartbeat(item, lease_seconds=60)
+
+    time.sleep(0.2)
+    assert queue.lease("w2") is None
+    assert queue.complete(item)
+
+
+def test_completing_twice_is_a_no_op(queue):
+    queue.put("detail", "a", {})
+    item = queue.lease("w1")
+    assert queue.complete(item, {"stored": True})
+    assert not queue.complete(item)
+    assert queue.lease("w1") is None
+    assert queue.counts() == {("detail", work_queue.DONE): 1}
+
+
+def test_failed_item_is_retried_until_max_attempts(queue):
+    queue.put("detail", "a", {})
+    for _ in range(3):
+        item = queue.lease("w1")
+        queue.fail(item, RuntimeError("boom"), max_attempts=3)
+    assert queue.lease("w1") is None
+    assert queue.counts() == {("detail", work_queue.FAILED): 1}
+
+
+def test_open_queue_rejects_unknown_schemes():
+    with pytest.raises(ValueError):
+        work_queue.open_queue("redis://localhost/0")
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Default queue location; point several hosts at the same file on a shared filesystem
+DEFAULT_QUEUE_URL = 'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'work_queue.db')
+
+# Seconds a leased item stays reserved without a heartbeat
+DEFAULT_LEASE_SECONDS = 300
+
+# Item states
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+# A leased work item.
+#   kind:     type of work, e.g. 'term', 'page' or 'detail'
+#   key:      unique key within the kind (search term, list URL, detail URL)
+#   payload:  JSON-serializable parameters
+#   token:    lease token; heartbeat() and complete() only succeed while it is current
+#   attempts: number of leases including this one
+WorkItem = namedtuple('WorkItem', ['kind', 'key', 'payload', 'token', 'attempts'])
+
+class WorkQueue(ABC):
+    """
+    Interface of a work queue backend
+
+    Items are identified by (kind, key); putting an existing item does not
+    duplicate it. A worker leases an item for a limited time, extends the lease
+    with heartbeat() while it works, and calls complete() or fail(). Items whose
+    lease expired (crashed or stalled worker) are handed out again, so handlers
+    must be idempotent; complete() only succeeds for the current lease, so each
+    item is completed once.
+    """
+    @abstractmethod
+    def put(self, kind, key, payload, priority=0, merge_field=None):
+        """
+        Add an item unless it exists
+
+        Args:
+            kind (str): Type of work
+            key (str): Unique key within the kind
+            payload (dict): Parameters of the item
+            priority (int): Higher priorities are leased first
+            merge_field (str, optional): List field of the payload that is merged into an
+                existing item; an item that was already done is reopened if the list grew
+
+        Returns:
+            bool: True if the item was added or changed
+        """
+
+    @abstractmethod
+    def lease(self, worker_id, kinds=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Reserve the next pending (or expired) item
+
+        Returns:
+            WorkItem: The leased item, or None if nothing is available
+        """
+
+    @abstractmethod
+    def heartbeat(self, item, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Extend the lease of an item
+
+        Returns:
+            bool: False if the lease was lost
+        """
+
+    @abstractmethod
+    def complete(self, item, result=None):
+        """
+        Mark a leased item as done
+
+        Returns:
+            bool: False if the item was already completed or the lease is no longer current
+        """
+
+    @abstractmethod
+    def fail(self, item, error, max_attempts=3):
+        """
+        Release an item after an error; it is retried until max_attempts leases failed
+        """
+
+    @abstractmethod
+    def counts(self):
+        """
+        Number of items per kind and status
+
+        Returns:
+            dict: {(kind, status): count}
+        """
+
+    def close(self):
+        pass
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue in a SQLite file
+
+    Leasing runs in a BEGIN IMMEDIATE transaction, so processes on one host (or
+    on hosts sharing the file on a filesystem with working locks) never lease
+    the same item at the same time.
+    """
+    def __init__(self, path):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS work_items (
+                kind TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                lease_owner TEXT,
+                lease_token TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (kind, item_key)
+            )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_ready "
+                         "ON work_items(status, priority DESC, updated_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def put(self, kind, key, payload, priority=0, merge_field=None):
+        conn = self._connect()
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute("SELECT payload, status FROM work_items WHERE kind = ? AND item_key = ?",
+                               (kind, key)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO work_items (kind, item_key, payload, priority, status, updated_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             (kind, key, json.dumps(payload, ensure_ascii=False), priority, PENDING, time.time()))
+                conn.commit()
+                return True
+
+            if merge_field is None:
+                conn.rollback()
+                return False
+
+            stored = json.loads(row[0])
+            values = stored.get(merge_field) or []
+            added = [value for value in payload.get(merge_field) or [] if value not in values]
+            if not added:
+                conn.rollback()
+                return False
+
+            stored[merge_field] = values + added
+            # A done or leased item is reopened with a new lease, so the new values are processed
+            conn.execute("UPDATE work_items SET payload = ?, status = ?, lease_token = NULL, updated_at = ? "
+                         "WHERE kind = ? AND item_key = ? AND status != ?",
+                         (json.dumps(stored, ensure_ascii=False), PENDING, time.time(), kind, key, FAILED))
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def lease(self, worker_id, kinds=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        query = ("SELECT kind, item_key, payload, attempts FROM work_items "
+                 "WHERE (status = ? OR (status = ? AND lease_expires < ?))")
+        params = [PENDING, LEASED, now]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+        query += " ORDER BY priority DESC, updated_at LIMIT 1"
+
+        conn = self._connect()
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            kind, key, payload, attempts = row
+            token = uuid.uuid4().hex
+            conn.execute("UPDATE work_items SET status = ?, lease_owner = ?, lease_token = ?, lease_expires = ?, "
+                         "attempts = attempts + 1, updated_at = ? WHERE kind = ? AND item_key = ?",
+                         (LEASED, worker_id, token, now + lease_seconds, now, kind, key))
+            conn.commit()
+            return WorkItem(kind, key, json.loads(payload), token, attempts + 1)
+        finally:
+            conn.close()
+
+    def _update_leased(self, item, assignments, params):
+        conn = self._connect()
+
+        try:
+            cursor = conn.execute(f"UPDATE work_items SET {assignments} "
+                                  "WHERE kind = ? AND item_key = ? AND status = ? AND lease_token = ?",
+                                  (*params, item.kind, item.key, LEASED, item.token))
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def heartbeat(self, item, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._update_leased(item, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def complete(self, item, result=None):
+        return self._update_leased(item, "status = ?, result = ?, lease_expires = NULL, updated_at = ?",
+                                   (DONE, None if result is None else json.dumps(result), time.time()))
+
+    def fail(self, item, error, max_attempts=3):
+        status = FAILED if item.attempts >= max_attempts else PENDING
+        if not self._update_leased(item, "status = ?, error = ?, lease_token = NULL, updated_at = ?",
+                                   (status, str(error), time.time())):
+            return
+        if status == FAILED:
+            logger.warning(f"Giving up on {item.kind} {item.key} after {item.attempts} attempts: {error}")
+
+    def counts(self):
+        conn = self._connect()
+
+        try:
+            rows = conn.execute("SELECT kind, status, COUNT(*) FROM work_items GROUP BY kind, status")
+            return {(kind, status): count for kind, status, count in rows}
+        finally:
+            conn.close()
+
+def open_queue(url=None):
+    """
+    Open a work queue by URL, e.g. 'sqlite:////mnt/shared/work_queue.db'
+
+    Returns:
+        WorkQueue
+    """
+    parsed = urlsplit(url or DEFAULT_QUEUE_URL)
+    if parsed.scheme != 'sqlite':
+        raise ValueError(f"Unknown work queue backend '{parsed.scheme}' (available: sqlite)")
+    # sqlite:///relative/path.db or sqlite:////absolute/path.db
+    return SQLiteWorkQueue(parsed.path[1:])